@@ -0,0 +1,547 @@
+"""
+ResumeInsight - Headless HTTP API
+JSON endpoints for the resume analyses, for ATS/HRIS integrations that cannot drive the UI
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import math
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from utils.pdf_processor import process_pdf_cached
+from utils.dedup import get_resume_deduplicator, text_key, DEDUP_REUSE
+from utils.document import Document
+from utils.gemini_client import (
+    initialize_gemini, generate_cached_response, last_call_info, get_transport_metrics, get_scheduler_metrics
+)
+from utils.result_store import get_result_store
+from utils.scores import parse_match_score, parse_ats_scores
+from utils.tracing import annotate_trace, current_span, span, use_span
+from utils.profiler import PROFILE_MAX_SECONDS, SamplingProfiler, check_admin_token, write_profile
+from utils.jd_profile import get_jd_profile, build_ats_prompt, build_comparison_prompt
+from utils.scheduler import SchedulerBusy, call_cost, get_scheduler, prometheus_text, session_scope
+from utils.prompts import (
+    get_hr_evaluation_prompt,
+    get_skill_enhancement_prompt,
+    get_chat_system_prompt,
+    get_simple_chat_prompt
+)
+
+
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", "64"))
+API_WORKERS = int(os.getenv("API_WORKERS", "8"))
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "32"))
+API_MAX_UPLOAD_MB = int(os.getenv("API_MAX_UPLOAD_MB", "10"))
+
+# Analyses whose results can be reused for near-duplicate resumes
+REUSABLE_ANALYSES = ("hr", "skills", "ats")
+# Analyses sent with the job profile instead of the job description, and the resume fields they need
+PROFILED_ANALYSES = {"ats": ("resume_text",), "comparison": ("resume1_text", "resume2_text")}
+
+QUEUE_KEY = web.AppKey("queue", asyncio.Queue)
+SETTINGS_KEY = web.AppKey("settings", dict)
+
+
+class InputError(Exception):
+    """Raised when a request is missing or has invalid input"""
+
+
+async def read_payload(request):
+    """
+    Read a JSON body or multipart form into a dict
+
+    PDF parts are extracted to text; other parts are kept as strings.
+
+    Returns:
+        dict: Request fields
+    """
+    if request.content_type.startswith("multipart/"):
+        payload = {}
+        reader = await request.multipart()
+        async for part in reader:
+            data = await part.read()
+            if part.filename:
+                _note_profile(request.app, pdfs=1, pdf_bytes=len(data))
+                # copy_context keeps the extraction spans in the request's trace
+                text = await asyncio.get_running_loop().run_in_executor(
+                    None, contextvars.copy_context().run, process_pdf_cached, bytes(data)
+                )
+                if not text or text.startswith("Error:"):
+                    raise InputError(f"Could not extract text from '{part.filename}'")
+                payload[f"{part.name}_text"] = text
+            else:
+                payload[part.name] = data.decode("utf-8", errors="ignore")
+        return payload
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise InputError("Request body must be JSON or multipart/form-data")
+    if not isinstance(payload, dict):
+        raise InputError("Request body must be a JSON object")
+    return payload
+
+
+def _require(payload, *fields):
+    """Return the named fields, raising InputError if any is empty"""
+    values = []
+    for field in fields:
+        value = payload.get(field)
+        if not value:
+            raise InputError(f"Missing required field '{field}'")
+        values.append(value)
+    return values
+
+
+async def fetch_jd_profiles(requests):
+    """
+    Job profiles needed by a set of requests, one lookup per distinct job description
+
+    Lookups run in the default executor since a new job description costs a
+    model call; requests missing input are skipped and rejected later by
+    build_prompt.
+
+    Args:
+        requests: (analysis, payload) pairs
+
+    Returns:
+        dict: Job description -> profile (None when profiles are disabled)
+    """
+    descriptions = {
+        payload["job_description"] for analysis, payload in requests
+        if analysis in PROFILED_ANALYSES and payload.get("job_description")
+        and all(payload.get(field) for field in PROFILED_ANALYSES[analysis])
+    }
+    loop = asyncio.get_running_loop()
+    profiles = await asyncio.gather(*(
+        loop.run_in_executor(None, contextvars.copy_context().run, get_jd_profile, jd) for jd in descriptions
+    ))
+    return dict(zip(descriptions, profiles))
+
+
+def build_prompt(analysis, payload, jd_profiles=None):
+    """
+    Build the prompt for an analysis from request fields
+
+    Args:
+        analysis: One of "hr", "skills", "ats", "comparison", "chat"
+        payload: Request fields
+        jd_profiles: Output of fetch_jd_profiles; ATS and comparison prompts
+                     look the profile up themselves if it is missing
+
+    Returns:
+        str: Prompt text
+    """
+    jd_profiles = jd_profiles or {}
+    if analysis == "hr":
+        return get_hr_evaluation_prompt(*_require(payload, "resume_text", "job_description"))
+    if analysis == "skills":
+        return get_skill_enhancement_prompt(*_require(payload, "resume_text", "job_description"))
+    if analysis == "ats":
+        resume_text, job_description = _require(payload, "resume_text", "job_description")
+        return build_ats_prompt(resume_text, job_description, jd_profiles.get(job_description))
+    if analysis == "comparison":
+        resume1_text, resume2_text, job_description = _require(
+            payload, "resume1_text", "resume2_text", "job_description"
+        )
+        return build_comparison_prompt(resume1_text, resume2_text, job_description, jd_profiles.get(job_description))
+    if analysis == "chat":
+        question, = _require(payload, "question")
+        if payload.get("resume_text") and payload.get("job_description"):
+            system_prompt = get_chat_system_prompt(payload["resume_text"], payload["job_description"])
+        else:
+            system_prompt = get_simple_chat_prompt()
+        return f"{system_prompt}\n\nUser Question: {question}"
+    raise InputError(f"Unknown analysis '{analysis}'")
+
+
+def trace_hashes(analysis, payload):
+    """Tag the active trace with the job description and resume hashes of a request"""
+    fields = ("resume1_text", "resume2_text") if analysis == "comparison" else ("resume_text",)
+    hashes = {
+        field.replace("_text", "_hash"): Document.from_text(payload[field]).content_hash
+        for field in fields if payload.get(field)
+    }
+    if payload.get("job_description"):
+        hashes["jd_hash"] = text_key(payload["job_description"])
+    annotate_trace(**hashes)
+
+
+def format_result(analysis, response, dedup=None):
+    """Shape a model response into the JSON result for an analysis"""
+    result = {"analysis": analysis, "report": response, "error": response.startswith("Error")}
+    if analysis == "ats":
+        result["match_score"] = parse_match_score(response)
+        result["scores"] = parse_ats_scores(response)
+    if dedup and dedup["near_duplicate"]:
+        result["near_duplicate"] = dedup["near_duplicate"]
+    return result
+
+
+def check_near_duplicate(analysis, payload):
+    """
+    Register the resume and look for an analyzed near-duplicate
+
+    Returns:
+        dict: Dedup context with "near_duplicate" info and a "reused" response, or None
+    """
+    if analysis not in REUSABLE_ANALYSES:
+        return None
+
+    dedup = get_resume_deduplicator()
+    resume_text = payload["resume_text"]
+    duplicate = dedup.find_near_duplicate(resume_text)
+    context = {
+        "resume_key": dedup.register(resume_text),
+        "jd_hash": text_key(payload["job_description"]),
+        "near_duplicate": None,
+        "reused": None,
+    }
+    if duplicate:
+        other_key, similarity = duplicate
+        reuse = str(payload.get("reuse_near_duplicates", DEDUP_REUSE)).lower() in ("1", "true", "yes")
+        reused = dedup.get_analysis(other_key, analysis, context["jd_hash"]) if reuse else None
+        context["reused"] = reused
+        context["near_duplicate"] = {"similarity": round(similarity, 3), "reused": reused is not None}
+    return context
+
+
+def record_result(analysis, context, response):
+    """Store a successful analysis so later near-duplicates can reuse it"""
+    if context and not response.startswith("Error"):
+        get_resume_deduplicator().record_analysis(
+            context["resume_key"], analysis, context["jd_hash"], response
+        )
+
+
+def store_result(analysis, payload, response, source="model", call_info=None):
+    """Record a successful analysis in the result store, keyed by resume and JD hash"""
+    store = get_result_store()
+    if store is None or analysis == "chat" or response.startswith("Error"):
+        return
+    fields = ("resume1_text", "resume2_text") if analysis == "comparison" else ("resume_text",)
+    jd_hash = text_key(payload["job_description"])
+    for field in fields:
+        resume_hash = Document.from_text(payload[field]).content_hash
+        store.record(analysis, resume_hash, jd_hash, response, source, call_info)
+
+
+def _store_later(app, *args):
+    """Write to the result store on its own thread, off the event loop"""
+    app[SETTINGS_KEY]["store_executor"].submit(store_result, *args)
+
+
+def _note_profile(app, **counts):
+    """Count what requests did while a process profile is being captured"""
+    stats = app[SETTINGS_KEY]["profiling"]
+    if stats is not None:
+        stats.update(counts)
+
+
+def request_session(request):
+    """Scheduling session of a request: the X-Session-Id header, else the client address"""
+    return request.headers.get("X-Session-Id") or request.remote
+
+
+def _enqueue(app, jobs, session=None):
+    """
+    Put (analysis, prompt) jobs on the bounded work queue
+
+    The model call scheduler is asked first, so a request that would wait
+    too long for a model slot is turned away before it queues.
+
+    Returns:
+        list: Futures resolved with (model response, call info) tuples
+
+    Raises:
+        web.HTTPTooManyRequests: When the queue cannot take all prompts or the scheduler rejects them
+    """
+    queue = app[QUEUE_KEY]
+    if queue.maxsize - queue.qsize() < len(jobs):
+        raise web.HTTPTooManyRequests(
+            text='{"error": "Server is busy, retry later"}',
+            content_type="application/json",
+            headers={"Retry-After": "1"}
+        )
+    scheduler = get_scheduler()
+    if scheduler and jobs:
+        try:
+            scheduler.admit(cost=max(call_cost(prompt) for _, prompt in jobs), count=len(jobs), session=session)
+        except SchedulerBusy as e:
+            raise web.HTTPTooManyRequests(
+                text=json.dumps({"error": "Model capacity is busy, retry later",
+                                 "estimated_wait_s": round(e.wait, 1)}),
+                content_type="application/json",
+                headers={"Retry-After": str(max(1, math.ceil(e.wait)))}
+            )
+    loop = asyncio.get_running_loop()
+    futures = []
+    for analysis, prompt in jobs:
+        future = loop.create_future()
+        queue.put_nowait((analysis, prompt, future, current_span(), time.perf_counter(), session))
+        futures.append(future)
+    return futures
+
+
+def _generate(generate, prompt, analysis, parent=None, queue_wait=0.0, session=None):
+    """Run one model call in a pool thread and capture its call details"""
+    with use_span(parent), session_scope(session), \
+            span("api.generate", analysis=analysis, queue_wait_s=queue_wait):
+        response = generate(prompt, analysis_type=analysis)
+    return response, last_call_info()
+
+
+async def _worker(app):
+    """Pull prompts off the queue and run them in the thread pool"""
+    queue = app[QUEUE_KEY]
+    settings = app[SETTINGS_KEY]
+    loop = asyncio.get_running_loop()
+    while True:
+        analysis, prompt, future, parent, enqueued, session = await queue.get()
+        try:
+            result = await loop.run_in_executor(
+                settings["executor"], functools.partial(
+                    _generate, settings["generate"], prompt, analysis, parent, time.perf_counter() - enqueued, session
+                )
+            )
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            if not future.done():
+                future.set_result((f"Error generating response: {str(e)}", None))
+        finally:
+            queue.task_done()
+
+
+def analysis_handler(analysis):
+    """Create a handler for a single-analysis endpoint"""
+    async def handler(request):
+        with span(f"api.{analysis}", path=request.path):
+            return await _handle(request)
+
+    async def _handle(request):
+        try:
+            payload = await read_payload(request)
+            prompt = build_prompt(analysis, payload, await fetch_jd_profiles([(analysis, payload)]))
+        except InputError as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+        trace_hashes(analysis, payload)
+        _note_profile(request.app, **{analysis: 1})
+        dedup = check_near_duplicate(analysis, payload)
+        if dedup and dedup["reused"]:
+            _store_later(request.app, analysis, payload, dedup["reused"], "reused")
+            return web.json_response(format_result(analysis, dedup["reused"], dedup))
+
+        future, = _enqueue(request.app, [(analysis, prompt)], request_session(request))
+        response, call_info = await future
+        record_result(analysis, dedup, response)
+        _store_later(request.app, analysis, payload, response, "model", call_info)
+        return web.json_response(format_result(analysis, response, dedup))
+    return handler
+
+
+async def batch_handler(request):
+    """
+    Run several analyses in one request
+
+    Body: {"requests": [{"analysis": "ats", "resume_text": "...", "job_description": "..."}, ...]}
+    Top-level fields other than "requests" (e.g. a shared job_description) apply to every item.
+    """
+    with span("api.batch", path=request.path) as batch_span:
+        return await _batch(request, batch_span)
+
+
+async def _batch(request, batch_span):
+    """batch_handler body, run inside its root span"""
+    try:
+        payload = await read_payload(request)
+        items = payload.get("requests")
+        if not isinstance(items, list) or not items:
+            raise InputError("Field 'requests' must be a non-empty list")
+        if len(items) > API_MAX_BATCH:
+            raise InputError(f"Batch size is limited to {API_MAX_BATCH}")
+        if not all(isinstance(item, dict) for item in items):
+            raise InputError("Each batch item must be an object")
+        if not all(isinstance(item.get("analysis"), str) for item in items):
+            raise InputError("Each batch item needs an 'analysis' string")
+        shared = {k: v for k, v in payload.items() if k != "requests"}
+        requests = [(item.get("analysis"), {**shared, **item}) for item in items]
+        # A shared job description is profiled once for the whole batch
+        jd_profiles = await fetch_jd_profiles(requests)
+        jobs = [(analysis, build_prompt(analysis, fields, jd_profiles)) for analysis, fields in requests]
+    except InputError as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+    batch_span.set(items=len(items))
+    trace_hashes(None, shared)
+    _note_profile(request.app, **Counter(item["analysis"] for item in items))
+
+    # Near-duplicates of analyzed resumes are answered without a model call
+    contexts = [
+        check_near_duplicate(item["analysis"], {**shared, **item}) for item in items
+    ]
+    pending = [i for i, context in enumerate(contexts) if not (context and context["reused"])]
+    futures = _enqueue(request.app, [jobs[i] for i in pending], request_session(request))
+    responses = [context["reused"] if context else None for context in contexts]
+    for i, (response, call_info) in zip(pending, await asyncio.gather(*futures)):
+        responses[i] = response
+        record_result(items[i]["analysis"], contexts[i], response)
+        _store_later(request.app, items[i]["analysis"], {**shared, **items[i]}, response, "model", call_info)
+    for i, context in enumerate(contexts):
+        if context and context["reused"]:
+            _store_later(request.app, items[i]["analysis"], {**shared, **items[i]}, context["reused"], "reused")
+
+    results = [
+        format_result(item["analysis"], response, context)
+        for item, response, context in zip(items, responses, contexts)
+    ]
+    return web.json_response({"results": results})
+
+
+async def health_handler(request):
+    """Liveness probe: the event loop is serving requests"""
+    return web.json_response({"status": "ok"})
+
+
+async def ready_handler(request):
+    """Readiness probe: the model client is configured and the queue has room; includes connection pool stats"""
+    queue = request.app[QUEUE_KEY]
+    settings = request.app[SETTINGS_KEY]
+    ready = settings["ready"] and queue.qsize() < queue.maxsize
+    body = {"ready": ready, "queue_depth": queue.qsize(), "queue_size": queue.maxsize}
+    transport = get_transport_metrics()
+    if transport:
+        body["transport"] = transport
+    scheduler = get_scheduler_metrics()
+    if scheduler:
+        # Histograms and quantiles are on /metrics
+        body["scheduler"] = {key: value for key, value in scheduler.items()
+                             if key not in ("wait_seconds", "queue_depth", "p50_wait_s", "p95_wait_s")}
+    return web.json_response(body, status=200 if ready else 503)
+
+
+async def metrics_handler(request):
+    """Prometheus metrics: work queue depth, and model call scheduler load with wait and queue depth histograms"""
+    queue = request.app[QUEUE_KEY]
+    text = (
+        "# HELP api_queue_depth Prompts waiting for an API worker\n"
+        "# TYPE api_queue_depth gauge\n"
+        f"api_queue_depth {queue.qsize()}\n"
+    )
+    scheduler = get_scheduler_metrics()
+    if scheduler:
+        text += prometheus_text(scheduler)
+    return web.Response(text=text, content_type="text/plain", headers={"Cache-Control": "no-store"})
+
+
+async def profile_handler(request):
+    """
+    Profile this worker process for a number of seconds (admin only)
+
+    Query: ?seconds=10. Requires an X-Admin-Token header matching ADMIN_TOKEN.
+    Every thread is sampled except those idle waiting for work; the response
+    lists the written collapsed-stack, flamegraph and metadata files and the
+    hottest stacks.
+    """
+    if not check_admin_token(request.headers.get("X-Admin-Token")):
+        return web.json_response({"error": "Forbidden"}, status=403)
+    try:
+        seconds = min(max(float(request.query.get("seconds", "10")), 0.1), PROFILE_MAX_SECONDS)
+    except ValueError:
+        return web.json_response({"error": "Query parameter 'seconds' must be a number"}, status=400)
+
+    settings = request.app[SETTINGS_KEY]
+    if settings["profiling"] is not None:
+        return web.json_response({"error": "A capture is already running"}, status=409)
+    settings["profiling"] = stats = Counter()
+    try:
+        profiler = SamplingProfiler().start()
+        await asyncio.sleep(seconds)
+        profiler.stop()
+    finally:
+        settings["profiling"] = None
+
+    metadata = {
+        "analyses": {k: v for k, v in stats.items() if k not in ("pdfs", "pdf_bytes")},
+        "pdfs": stats["pdfs"],
+        "pdf_bytes": stats["pdf_bytes"],
+        "queue_depth": request.app[QUEUE_KEY].qsize(),
+    }
+    paths = await asyncio.get_running_loop().run_in_executor(
+        None, write_profile, profiler, "process", metadata
+    )
+    return web.json_response({
+        **paths,
+        **metadata,
+        "samples": profiler.samples,
+        "top_stacks": [{"stack": stack, "samples": count} for stack, count in profiler.stacks.most_common(5)],
+    })
+
+
+def create_app(generate=generate_cached_response, ready_check=initialize_gemini,
+               queue_size=API_QUEUE_SIZE, workers=API_WORKERS):
+    """
+    Create the API application
+
+    Args:
+        generate: Function mapping (prompt, analysis_type=...) to a response string
+        ready_check: Function returning True when the model client is usable
+        queue_size: Maximum number of queued prompts before returning 429
+        workers: Number of concurrent model calls
+
+    Returns:
+        web.Application: Configured application
+    """
+    app = web.Application(client_max_size=API_MAX_UPLOAD_MB * 1024 * 1024)
+    app[QUEUE_KEY] = asyncio.Queue(maxsize=queue_size)
+    app[SETTINGS_KEY] = {
+        "generate": generate,
+        "ready_check": ready_check,
+        "ready": False,
+        "workers": workers,
+        "executor": ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api"),
+        "store_executor": ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-store"),
+        "profiling": None,
+    }
+
+    async def on_startup(app):
+        app[SETTINGS_KEY]["tasks"] = [
+            asyncio.create_task(_worker(app)) for _ in range(workers)
+        ]
+        app[SETTINGS_KEY]["ready"] = bool(ready_check())
+
+    async def on_cleanup(app):
+        for task in app[SETTINGS_KEY]["tasks"]:
+            task.cancel()
+        app[SETTINGS_KEY]["executor"].shutdown(wait=False)
+        app[SETTINGS_KEY]["store_executor"].shutdown(wait=True)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    app.router.add_post("/v1/hr-evaluation", analysis_handler("hr"))
+    app.router.add_post("/v1/skill-enhancement", analysis_handler("skills"))
+    app.router.add_post("/v1/ats-match", analysis_handler("ats"))
+    app.router.add_post("/v1/comparison", analysis_handler("comparison"))
+    app.router.add_post("/v1/chat", analysis_handler("chat"))
+    app.router.add_post("/v1/batch", batch_handler)
+    app.router.add_get("/healthz", health_handler)
+    app.router.add_get("/readyz", ready_handler)
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_post("/admin/profile", profile_handler)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(
+        create_app(),
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8080"))
+    )
@@ -4,19 +4,37 @@ A powerful AI-driven resume analysis tool using Google's Gemini AI
 """
 import streamlit as st
 import os
+import threading
 from datetime import datetime
+from functools import partial
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # Import utilities
-from utils.pdf_processor import extract_text_from_pdf, validate_pdf, process_pdf_cached
-from utils.gemini_client import initialize_gemini, generate_response, chat_with_gemini
+from utils.pdf_processor import process_pdf_cached
+from utils.gemini_client import initialize_gemini, generate_response, generate_cached_response, prime_cached_response, chat_with_gemini, get_routing_metrics, get_transport_metrics, get_scheduler_metrics, is_degraded, last_call_info
 from utils.prompts import (
     get_hr_evaluation_prompt,
     get_skill_enhancement_prompt,
-    get_ats_match_prompt,
-    get_resume_comparison_prompt,
     get_chat_system_prompt,
     get_simple_chat_prompt
 )
+from utils.speculative import start_speculation, get_precomputed, cancel_speculation
+from utils.upload_extraction import on_resume_upload, await_document
+from utils.local_analysis import local_ats_match, format_local_ats_report, local_comparison_scores
+from utils.jd_profile import get_jd_profile, format_jd_profile, build_ats_prompt, build_comparison_prompt
+from utils.multi_jd import split_job_descriptions, score_jobs, rank_results, MULTI_JD_MAX
+from utils.embeddings import requirement_evidence, evidence_coverage, EMBED_MATCH_THRESHOLD
+from utils.skill_matcher import get_skill_matcher, skills_radar_data, category_coverage
+from utils.dedup import get_resume_deduplicator, text_key, DEDUP_REUSE
+from utils.sections import analyze_sections, assemble_report, diff_versions, content_hash
+from utils.chat_memory import ChatMemory, CHAT_RENDER_PAGE
+from utils.result_store import get_result_store, RESULT_REUSE
+from utils.full_report import run_full_report, single_prompts, estimate_savings, SINGLE_PROMPTS
+from utils.scores import parse_match_score
+from utils.tracing import annotate_trace, set_attributes, span, traced
+from utils.profiler import annotate_profile, capture, check_admin_token, list_profiles
+from utils.session_memory import get_session_registry
+from utils.scheduler import session_scope, WAIT_BUCKETS
 from utils.visualizations import (
     create_match_gauge,
     create_category_bars,
@@ -213,104 +231,540 @@ def save_report(content, filename):
     return content, full_filename
 
 
-def hr_evaluation_page(resume_text, job_description):
+# Analyses whose results can be reused for near-duplicate resumes
+REUSABLE_ANALYSES = ("hr", "skills", "ats")
+
+
+def is_queued(key):
+    """Check whether an analysis was queued and the AI service is available again"""
+    return key in st.session_state.get("queued_analyses", set()) and not is_degraded()
+
+
+def check_near_duplicate(resume, job_description):
+    """
+    Register the resume and flag it if it nearly duplicates one analyzed before
+    
+    Sets st.session_state.analysis_context, which run_or_queue_analysis uses to
+    record results and, if the user opts in, reuse the near-duplicate's analyses.
+    """
+    dedup = get_resume_deduplicator()
+    duplicate = dedup.find_near_duplicate(resume.text)
+    context = {
+        "resume_key": dedup.register(resume.text),
+        "resume_hash": resume.content_hash,
+        "jd_hash": text_key(job_description),
+        "reuse_from": None,
+    }
+    annotate_trace(resume_hash=context["resume_hash"], jd_hash=context["jd_hash"])
+    
+    if duplicate:
+        other_key, similarity = duplicate
+        st.markdown(f'<div class="info-box">🔁 This resume is <strong>{similarity:.0%}</strong> similar to a resume that was already analyzed.</div>', unsafe_allow_html=True)
+        if st.checkbox("♻️ Reuse analyses of the near-duplicate instead of re-running them", value=DEDUP_REUSE, key="dedup_reuse"):
+            context["reuse_from"] = other_key
+    
+    st.session_state.analysis_context = context
+
+
+def stored_result(key):
+    """Latest stored result of an analysis for the current resume and job description, or None"""
+    context = st.session_state.get("analysis_context") if key in REUSABLE_ANALYSES else None
+    store = get_result_store()
+    if not (RESULT_REUSE and context and store):
+        return None
+    return store.latest(key, context["resume_hash"], context["jd_hash"])
+
+
+def show_stored_notice(created_at):
+    """Tell the user a report was loaded from the result store"""
+    when = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+    st.markdown(f'<div class="info-box">🗂️ Loaded the report from {when} for this resume and job description, without calling the AI again.</div>', unsafe_allow_html=True)
+
+
+def run_or_queue_analysis(key, prompt, fallback=None):
+    """
+    Run an analysis, or queue it while the AI service is in degraded mode
+    
+    Queued analyses run automatically on the next rerun after service resumes.
+    
+    Args:
+        key: Analysis key ("hr", "skills", "ats", "chat")
+        prompt: Prompt to send
+        fallback: Optional function producing a local result instead of queueing
+    
+    Returns:
+        str: Model response, or None if the analysis was queued
+    """
+    context = st.session_state.get("analysis_context") if key in REUSABLE_ANALYSES else None
+    dedup = get_resume_deduplicator()
+    
+    if context and context["reuse_from"]:
+        reused = dedup.get_analysis(context["reuse_from"], key, context["jd_hash"])
+        if reused:
+            st.markdown('<div class="info-box">♻️ Reused the analysis of a near-duplicate resume.</div>', unsafe_allow_html=True)
+            store_result(key, reused, "reused")
+            return reused
+    
+    queued = st.session_state.setdefault("queued_analyses", set())
+    stored = stored_result(key)
+    if stored:
+        show_stored_notice(stored["created_at"])
+        queued.discard(key)
+        return stored["response"]
+    
+    if not is_degraded():
+        response = get_precomputed(key, prompt)
+        source, call_info = "speculative", None
+        if response is None:
+            # Report analyses go through the shared response cache; chat turns are always fresh
+            generate = generate_cached_response if key in REUSABLE_ANALYSES else generate_response
+            response = generate(prompt, analysis_type=key)
+            call_info = last_call_info()
+            source = "cache" if call_info and call_info.get("cached") else "model"
+        if not (response.startswith("Error") and is_degraded()):
+            queued.discard(key)
+            record_analysis(key, response, source, call_info)
+            return response
+    
+    if fallback:
+        response = fallback()
+        store_result(key, response, "local")
+        return response
+    
+    queue_analysis(key)
+    return None
+
+
+def record_analysis(key, response, source, call_info=None):
+    """Register a successful analysis for near-duplicate reuse and in the result store"""
+    context = st.session_state.get("analysis_context") if key in REUSABLE_ANALYSES else None
+    if context and not response.startswith("Error"):
+        get_resume_deduplicator().record_analysis(context["resume_key"], key, context["jd_hash"], response)
+        store_result(key, response, source, call_info)
+
+
+def store_result(key, response, source, call_info=None):
+    """Record an analysis for the current resume in the result store"""
+    context = st.session_state.get("analysis_context")
+    store = get_result_store()
+    if context and store and key in REUSABLE_ANALYSES:
+        store.record(key, context["resume_hash"], context["jd_hash"], response, source, call_info)
+
+
+def queue_analysis(key):
+    """Mark an analysis as queued until the AI service resumes"""
+    st.session_state.setdefault("queued_analyses", set()).add(key)
+    st.markdown('<div class="warning-box">⏳ <strong>Queued</strong>: the AI service is temporarily unavailable (API quota). This analysis will run automatically once service resumes.</div>', unsafe_allow_html=True)
+
+
+def display_section_diff(changes):
+    """Show what changed between resume versions and how section scores moved"""
+    st.markdown("#### 🔀 Changes Since Previous Version")
+    st.dataframe(
+        [
+            {
+                "Section": c["name"],
+                "Status": c["status"],
+                "Previous Score": c["old_score"],
+                "Current Score": c["new_score"],
+            }
+            for c in changes
+        ],
+        hide_index=True
+    )
+    for change in changes:
+        if change["status"] == "unchanged":
+            continue
+        with st.expander(f"{change['name']} ({change['status']})"):
+            if change["old_score"] is not None and change["new_score"] is not None:
+                st.metric("Section Score", f"{change['new_score']:g}/10",
+                          delta=f"{change['new_score'] - change['old_score']:+g}")
+            st.code("\n".join(change["diff"]), language="diff")
+
+
+def run_section_analysis(resume, job_description):
+    """
+    Per-section HR evaluation for incremental re-analysis of edited resumes
+    
+    Unchanged sections come from the section cache; only changed sections are
+    sent to the model. The previous version is kept to show a diff.
+    
+    Returns:
+        str: Assembled report, or None if the analysis was queued
+    """
+    if is_degraded():
+        queue_analysis("hr")
+        return None
+    
+    results = analyze_sections(
+        resume.text, job_description,
+        lambda prompt: generate_response(prompt, analysis_type="hr")
+    )
+    st.session_state.setdefault("queued_analyses", set()).discard("hr")
+    
+    reused = sum(1 for r in results if r["cached"])
+    st.markdown(f'<div class="info-box">🧩 {len(results)} sections: {reused} reused from cache, {len(results) - reused} analyzed.</div>', unsafe_allow_html=True)
+    
+    # Keep the last two distinct versions of this resume for the same job description
+    version = {
+        "resume_hash": resume.content_hash,
+        "jd_hash": content_hash(job_description),
+        "results": results,
+    }
+    versions = st.session_state.get("section_versions", {})
+    current = versions.get("current")
+    if current and current["jd_hash"] == version["jd_hash"]:
+        if current["resume_hash"] != version["resume_hash"]:
+            versions["previous"] = current
+    else:
+        versions.pop("previous", None)
+    versions["current"] = version
+    st.session_state.section_versions = versions
+    
+    if versions.get("previous"):
+        display_section_diff(diff_versions(versions["previous"]["results"], results))
+    
+    report = assemble_report(results)
+    store_result("hr", report, "sections")
+    return report
+
+
+def hr_evaluation_page(resume, job_description):
     """HR Evaluation Feature"""
     st.markdown("### 🧠 HR Professional Evaluation")
     st.markdown('<div class="info-box">Get a comprehensive HR-style analysis of your resume with professional feedback on strengths, weaknesses, and hiring recommendations.</div>', unsafe_allow_html=True)
     
-    if st.button("🚀 Generate HR Evaluation", key="hr_eval_btn"):
+    per_section = st.checkbox("🧩 Per-section analysis (re-analyzes only the sections you changed)", key="hr_per_section")
+    
+    if st.button("🚀 Generate HR Evaluation", key="hr_eval_btn") or is_queued("hr"):
         with st.spinner("🔍 Analyzing your resume from an HR perspective..."):
-            prompt = get_hr_evaluation_prompt(resume_text, job_description)
-            response = generate_response(prompt)
-            
-            st.markdown('<div class="report-section">', unsafe_allow_html=True)
-            st.markdown(response)
-            st.markdown('</div>', unsafe_allow_html=True)
+            if per_section:
+                response = run_section_analysis(resume, job_description)
+            else:
+                prompt = get_hr_evaluation_prompt(resume, job_description)
+                response = run_or_queue_analysis("hr", prompt)
+            if response is None:
+                return
             
-            # Download button
-            report_content, filename = save_report(response, "HR_Evaluation_Report")
-            st.download_button(
-                label="📥 Download Report",
-                data=report_content,
-                file_name=filename,
-                mime="text/plain"
-            )
+            display_report(response, "HR_Evaluation_Report")
 
 
-def skill_enhancement_page(resume_text, job_description):
+def skill_enhancement_page(resume, job_description):
     """Skill Enhancement Feature"""
     st.markdown("### 🚀 Skill Enhancement Suggestions")
     st.markdown('<div class="info-box">Receive personalized recommendations on skills to develop, courses to take, and certifications to pursue for career growth.</div>', unsafe_allow_html=True)
     
-    if st.button("💡 Get Skill Recommendations", key="skill_btn"):
+    if st.button("💡 Get Skill Recommendations", key="skill_btn") or is_queued("skills"):
         with st.spinner("📚 Analyzing skill gaps and creating your learning roadmap..."):
-            prompt = get_skill_enhancement_prompt(resume_text, job_description)
-            response = generate_response(prompt)
-            
-            st.markdown('<div class="report-section">', unsafe_allow_html=True)
-            st.markdown(response)
-            st.markdown('</div>', unsafe_allow_html=True)
+            prompt = get_skill_enhancement_prompt(resume, job_description)
+            response = run_or_queue_analysis("skills", prompt)
+            if response is None:
+                return
             
-            # Download button
-            report_content, filename = save_report(response, "Skill_Enhancement_Report")
-            st.download_button(
-                label="📥 Download Report",
-                data=report_content,
-                file_name=filename,
-                mime="text/plain"
-            )
+            display_report(response, "Skill_Enhancement_Report")
 
 
-def ats_match_page(resume_text, job_description):
+def ats_match_page(resume, job_description):
     """ATS Match Analysis Feature"""
     st.markdown("### 📊 ATS Compatibility Analysis")
     st.markdown('<div class="info-box">Check how well your resume matches the job description and get a detailed ATS compatibility score with optimization tips.</div>', unsafe_allow_html=True)
     
     if st.button("🎯 Analyze ATS Match", key="ats_btn"):
         with st.spinner("⚙️ Running ATS compatibility analysis..."):
-            prompt = get_ats_match_prompt(resume_text, job_description)
-            response = generate_response(prompt)
+            prompt = build_ats_prompt(resume, job_description)
+            response = run_or_queue_analysis("ats", prompt, fallback=lambda: local_ats_report(resume, job_description))
             
-            # Try to extract percentage from response
-            try:
-                # Look for percentage in the response
-                import re
-                match = re.search(r'Overall Match Score[:\s]+(\d+)%', response)
-                if match:
-                    percentage = int(match.group(1))
-                    
-                    # Display gauge chart
-                    col1, col2 = st.columns([1, 2])
-                    with col1:
-                        fig = create_match_gauge(percentage)
-                        st.plotly_chart(fig, use_container_width=True)
-                    
-                    with col2:
-                        st.markdown('<div class="success-box">', unsafe_allow_html=True)
-                        if percentage >= 80:
-                            st.markdown("### ✅ Excellent Match!")
-                            st.markdown("Your resume is highly compatible with this job posting.")
-                        elif percentage >= 60:
-                            st.markdown("### 🟡 Good Match")
-                            st.markdown("Your resume shows good compatibility. Some improvements recommended.")
-                        else:
-                            st.markdown("### 🔴 Needs Improvement")
-                            st.markdown("Consider optimizing your resume for better ATS compatibility.")
-                        st.markdown('</div>', unsafe_allow_html=True)
-            except:
-                pass
-            
-            st.markdown('<div class="report-section">', unsafe_allow_html=True)
-            st.markdown(response)
-            st.markdown('</div>', unsafe_allow_html=True)
+            display_ats_charts(resume, job_description, response)
+            display_report(response, "ATS_Match_Report")
+            display_jd_profile(job_description)
+            display_requirement_evidence(resume, job_description)
+
+
+def multi_jd_page(resume, job_description):
+    """Multi-Job Match Feature"""
+    st.markdown("### 🎯 Multi-Job Match")
+    st.markdown('<div class="info-box">Paste several job postings to see which ones fit your resume best. Each posting is scored in parallel and the ranking fills in as results arrive.</div>', unsafe_allow_html=True)
+    
+    pasted = st.text_area(
+        f"Job descriptions (up to {MULTI_JD_MAX}), separated by a line containing only ---",
+        height=300, key="multi_jd_text",
+        placeholder="Senior Data Engineer\nWe are looking for...\n---\nBackend Developer\n..."
+    )
+    jobs = split_job_descriptions("\n---\n".join(filter(None, [job_description, pasted])))
+    if job_description:
+        st.caption("The job description from the sidebar is included as the first posting.")
+    
+    results_key = (resume.content_hash, tuple(text_key(jd) for jd in jobs))
+    saved = st.session_state.get("multi_jd_results")
+    if st.button(f"🎯 Rank {len(jobs)} Job Descriptions", key="multi_jd_btn", disabled=len(jobs) < 2):
+        generate = None if is_degraded() else generate_cached_response
+        if generate is None:
+            st.markdown('<div class="warning-box">⚠️ The AI service is temporarily unavailable (API quota). Scoring every posting with local keyword and skill matching instead.</div>', unsafe_allow_html=True)
+        placeholder = st.empty()
+        results = {}
+        with st.spinner(f"⚙️ Scoring your resume against {len(jobs)} job descriptions..."):
+            for index, result in score_jobs(resume.text, jobs, generate):
+                results[index] = result
+                with placeholder.container():
+                    display_job_ranking(list(results.values()), len(jobs), f"partial{len(results)}")
+        saved = {"key": results_key, "results": list(results.values())}
+        st.session_state.multi_jd_results = saved
+        placeholder.empty()
+    
+    if saved and saved["key"] == results_key:
+        display_job_ranking(saved["results"], len(jobs), "final", details=True)
+
+
+def display_job_ranking(results, total, key_prefix, details=False):
+    """Ranked table and per-job gauges for multi-job results, with pending jobs noted"""
+    ranked = rank_results(results)
+    if len(ranked) < total:
+        st.markdown(f'<div class="info-box">⏳ {len(ranked)} of {total} job descriptions scored...</div>', unsafe_allow_html=True)
+    st.dataframe([
+        {
+            "Rank": r["rank"], "Job": r["title"], "Match %": r["overall"], "Keywords %": r["keyword"],
+            "Skills %": r["skills"], "Experience %": r["experience"], "Education %": r["education"],
+            "Evidence %": r["evidence"], "Source": r["source"],
+        }
+        for r in ranked
+    ], hide_index=True)
+    
+    for row_start in range(0, len(ranked), 3):
+        cols = st.columns(3)
+        for col, r in zip(cols, ranked[row_start:row_start + 3]):
+            with col:
+                with span("chart.gauge"):
+                    fig = create_match_gauge(r["overall"], title=f"#{r['rank']} {r['title'][:24]}")
+                # Keys keep repeated renders of the same gauge apart within one run
+                st.plotly_chart(fig, use_container_width=True, key=f"multi_jd_{key_prefix}_{r['jd_hash'][:12]}")
+    
+    if details:
+        for r in ranked:
+            with st.expander(f"#{r['rank']} {r['title']}: {r['overall']}%"):
+                if r["verdict"]:
+                    st.markdown(f"**Verdict:** {r['verdict']}")
+                st.markdown(r["report"])
+                if r["unsupported"]:
+                    st.markdown("**Requirements without supporting evidence in your resume:**\n"
+                                + "\n".join(f"- {item}" for item in r["unsupported"]))
+
+
+def display_requirement_evidence(resume, job_description):
+    """Requirement-by-requirement evidence from the local semantic matcher"""
+    evidence = requirement_evidence(resume.text, job_description, get_jd_profile(job_description))
+    if not evidence:
+        return
+    coverage = evidence_coverage(evidence)
+    with st.expander(f"🔎 Requirement evidence: {coverage}% of requirements supported by your resume"):
+        st.caption("Each requirement is matched to the most similar line of your resume by local semantic matching, "
+                   "so synonyms and abbreviations (k8s, ML) count too.")
+        st.dataframe([
+            {
+                "Requirement": item["requirement"],
+                "Type": item["kind"],
+                "Status": "✅ Supported" if item["met"] else "⚠️ Weak" if item["similarity"] >= EMBED_MATCH_THRESHOLD * 0.6 else "❌ Missing",
+                "Similarity": item["similarity"],
+                "Best Evidence": f"{item['section']}: {item['evidence'][:160]}" if item["evidence"] else "",
+            }
+            for item in evidence
+        ], hide_index=True)
+
+
+def local_ats_report(resume, job_description):
+    """Serve a local keyword and skill analysis while the API is unavailable"""
+    st.markdown('<div class="warning-box">⚠️ The AI service is temporarily unavailable (API quota). Showing a local keyword and skill match instead.</div>', unsafe_allow_html=True)
+    return format_local_ats_report(local_ats_match(resume.text, job_description, get_jd_profile(job_description)))
+
+
+def display_jd_profile(job_description):
+    """Show the job requirements profile the ATS analysis was matched against"""
+    profile = get_jd_profile(job_description)
+    if profile:
+        source = "AI extraction" if profile["source"] == "model" else "local extraction"
+        with st.expander(f"🧾 Job requirements used for matching ({source})"):
+            st.markdown(format_jd_profile(profile).replace("\n", "  \n"))
+
+
+def display_ats_charts(resume, job_description, response):
+    """Match gauge from an ATS report, plus the local skill taxonomy overview"""
+    # Try to extract percentage from response
+    try:
+        with span("ats.parse_score", chars=len(response)) as parse_span:
+            percentage = parse_match_score(response)
+            parse_span.set(found=percentage is not None)
+        if percentage is not None:
+            # Display gauge chart
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                with span("chart.gauge"):
+                    fig = create_match_gauge(percentage)
+                st.plotly_chart(fig, use_container_width=True)
             
-            # Download button
-            report_content, filename = save_report(response, "ATS_Match_Report")
+            with col2:
+                st.markdown('<div class="success-box">', unsafe_allow_html=True)
+                if percentage >= 80:
+                    st.markdown("### ✅ Excellent Match!")
+                    st.markdown("Your resume is highly compatible with this job posting.")
+                elif percentage >= 60:
+                    st.markdown("### 🟡 Good Match")
+                    st.markdown("Your resume shows good compatibility. Some improvements recommended.")
+                else:
+                    st.markdown("### 🔴 Needs Improvement")
+                    st.markdown("Consider optimizing your resume for better ATS compatibility.")
+                st.markdown('</div>', unsafe_allow_html=True)
+    except:
+        pass
+    
+    # Local skill taxonomy overview
+    with span("ats.skill_scan"):
+        resume_skills = get_skill_matcher().scan(resume.text)
+        jd_skills = get_skill_matcher().scan(job_description)
+    if len(jd_skills) >= 3:
+        with span("chart.skills"):
+            radar = create_skills_radar(skills_radar_data(resume_skills, jd_skills))
+            bars = create_category_bars(category_coverage(resume_skills, jd_skills))
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(radar, use_container_width=True)
+        with col2:
+            st.plotly_chart(bars, use_container_width=True)
+
+
+def display_report(response, filename):
+    """Show a report with its download button"""
+    st.markdown('<div class="report-section">', unsafe_allow_html=True)
+    st.markdown(response)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Download button
+    report_content, filename = save_report(response, filename)
+    st.download_button(
+        label="📥 Download Report",
+        data=report_content,
+        file_name=filename,
+        mime="text/plain"
+    )
+
+
+def run_full_report_analysis(resume, job_description):
+    """
+    HR, skill enhancement and ATS analyses from one model call
+    
+    Each part is recorded like a separate analysis and seeded into the response
+    cache under its own prompt, so the individual pages open instantly
+    afterwards. Parts missing from the response are requested separately.
+    
+    Returns:
+        tuple: (dict of "hr", "skills", "ats" -> report or None if queued, savings dict or None),
+               or (None, None) if the whole report was queued
+    """
+    stored = {key: stored_result(key) for key in SINGLE_PROMPTS}
+    if all(stored.values()):
+        show_stored_notice(min(row["created_at"] for row in stored.values()))
+        st.session_state.setdefault("queued_analyses", set()).discard("full")
+        return {key: row["response"] for key, row in stored.items()}, None
+    
+    if is_degraded():
+        queue_analysis("full")
+        return None, None
+    
+    prompts = single_prompts(resume, job_description)
+    context = st.session_state.get("analysis_context")
+    if context and context["reuse_from"]:
+        dedup = get_resume_deduplicator()
+        if all(dedup.get_analysis(context["reuse_from"], key, context["jd_hash"]) for key in SINGLE_PROMPTS):
+            return {key: run_or_queue_analysis(key, prompts[key]) for key in SINGLE_PROMPTS}, None
+    
+    prompt, response, parts = run_full_report(
+        resume, job_description,
+        lambda full_prompt: generate_cached_response(full_prompt, analysis_type="full")
+    )
+    call_info = last_call_info()
+    if response.startswith("Error") and is_degraded():
+        queue_analysis("full")
+        return None, None
+    st.session_state.setdefault("queued_analyses", set()).discard("full")
+    if response.startswith("Error"):
+        return {key: response for key in SINGLE_PROMPTS}, None
+    
+    cached = bool(call_info and call_info.get("cached"))
+    part_info = {"model": call_info["model"]} if call_info else None
+    for key, report in parts.items():
+        prime_cached_response(prompts[key], report, part_info, analysis_type=key)
+        record_analysis(key, report, "cache" if cached else "combined", part_info)
+    
+    reports = dict(parts)
+    for key in SINGLE_PROMPTS:
+        if key not in reports:
+            fallback = (lambda: local_ats_report(resume, job_description)) if key == "ats" else None
+            reports[key] = run_or_queue_analysis(key, prompts[key], fallback=fallback)
+    
+    savings = None
+    if not cached and len(parts) == len(SINGLE_PROMPTS):
+        store = get_result_store()
+        baseline = store.averages(SINGLE_PROMPTS) if store else None
+        savings = estimate_savings(prompt, prompts, call_info, baseline)
+    return reports, savings
+
+
+def display_savings(savings):
+    """Token and latency of the full report against three separate analyses"""
+    cols = st.columns(2)
+    with cols[0]:
+        saved = savings["three_call_prompt_tokens"] - savings["prompt_tokens"]
+        st.metric(
+            "Input Tokens", f"{savings['prompt_tokens']:,}",
+            delta=f"-{saved:,} vs. {savings['three_call_prompt_tokens']:,} for three analyses",
+            delta_color="inverse"
+        )
+    with cols[1]:
+        if savings["latency"] is not None and savings["three_call_latency"] is not None:
+            st.metric(
+                "Response Time", f"{savings['latency']:.1f}s",
+                delta=f"{savings['latency'] - savings['three_call_latency']:+.1f}s vs. "
+                      f"{savings['three_call_latency']:.1f}s for three analyses",
+                delta_color="inverse"
+            )
+        elif savings["latency"] is not None:
+            st.metric("Response Time", f"{savings['latency']:.1f}s", delta="1 request instead of 3", delta_color="off")
+
+
+def full_report_page(resume, job_description):
+    """Full Report Feature"""
+    st.markdown("### 📑 Full Report")
+    st.markdown('<div class="info-box">Get the HR evaluation, skill enhancement plan and ATS match from a single AI request. Each part is saved, so the individual pages open instantly afterwards.</div>', unsafe_allow_html=True)
+    
+    if st.button("📑 Generate Full Report", key="full_report_btn") or is_queued("full"):
+        with st.spinner("🔍 Running the HR, skills and ATS analyses together..."):
+            reports, savings = run_full_report_analysis(resume, job_description)
+        if reports is None:
+            return
+        
+        if savings:
+            display_savings(savings)
+        
+        hr_tab, skills_tab, ats_tab = st.tabs(["🧠 HR Evaluation", "🚀 Skill Enhancement", "📊 ATS Match"])
+        for tab, key, filename in (
+            (hr_tab, "hr", "HR_Evaluation_Report"),
+            (skills_tab, "skills", "Skill_Enhancement_Report"),
+            (ats_tab, "ats", "ATS_Match_Report"),
+        ):
+            with tab:
+                if reports[key] is None:
+                    st.markdown('<div class="info-box">⏳ This part is queued and will run once the AI service resumes.</div>', unsafe_allow_html=True)
+                    continue
+                if key == "ats":
+                    display_ats_charts(resume, job_description, reports[key])
+                display_report(reports[key], filename)
+        
+        if all(reports.values()):
+            report_content, filename = save_report("\n\n".join(reports[key] for key in SINGLE_PROMPTS), "Full_Report")
             st.download_button(
-                label="📥 Download Report",
+                label="📥 Download Full Report",
                 data=report_content,
                 file_name=filename,
-                mime="text/plain"
+                mime="text/plain",
+                key="full_report_download"
             )
 
 
@@ -323,11 +777,13 @@ def resume_comparison_page():
     
     with col1:
         st.markdown("#### 📄 Resume 1")
-        resume1_file = st.file_uploader("Upload First Resume (PDF)", type=['pdf'], key="resume1")
+        resume1_file = st.file_uploader("Upload First Resume (PDF)", type=['pdf'], key="resume1",
+                                        on_change=on_resume_upload, args=("resume1",))
     
     with col2:
         st.markdown("#### 📄 Resume 2")
-        resume2_file = st.file_uploader("Upload Second Resume (PDF)", type=['pdf'], key="resume2")
+        resume2_file = st.file_uploader("Upload Second Resume (PDF)", type=['pdf'], key="resume2",
+                                        on_change=on_resume_upload, args=("resume2",))
     
     job_desc = st.text_area("📋 Job Description", height=150, key="comp_job_desc", 
                             placeholder="Paste the job description here...")
@@ -343,12 +799,36 @@ def resume_comparison_page():
         
         with st.spinner("⚖️ Comparing resumes..."):
             # Extract text from both resumes
-            resume1_text = extract_text_from_pdf(resume1_file)
-            resume2_text = extract_text_from_pdf(resume2_file)
+            resume1 = await_document(resume1_file)
+            resume2 = await_document(resume2_file)
             
-            if resume1_text and resume2_text:
-                prompt = get_resume_comparison_prompt(resume1_text, resume2_text, job_desc)
-                response = generate_response(prompt)
+            if resume1 and resume2:
+                response = None
+                source, call_info = "model", None
+                if not is_degraded():
+                    prompt = build_comparison_prompt(resume1, resume2, job_desc)
+                    response = generate_cached_response(prompt, analysis_type="comparison")
+                    call_info = last_call_info()
+                    source = "cache" if call_info and call_info.get("cached") else "model"
+                
+                if response is None or (response.startswith("Error") and is_degraded()):
+                    source, call_info = "local", None
+                    # Side-by-side local scores while the API is unavailable
+                    st.markdown('<div class="warning-box">⚠️ The AI service is temporarily unavailable (API quota). Showing local side-by-side scores instead.</div>', unsafe_allow_html=True)
+                    categories, scores1, scores2 = local_comparison_scores(
+                        resume1.text, resume2.text, job_desc, get_jd_profile(job_desc)
+                    )
+                    st.plotly_chart(create_comparison_table(scores1, scores2, categories), use_container_width=True)
+                    rows = "\n".join(
+                        f"| {c} | {a}/10 | {b}/10 |" for c, a, b in zip(categories, scores1, scores2)
+                    )
+                    response = f"| Category | Resume 1 | Resume 2 |\n|----------|----------|----------|\n{rows}\n\n*Generated by local keyword analysis while the AI service is unavailable.*"
+                
+                # Record the comparison in the history of both resumes
+                store = get_result_store()
+                if store and not response.startswith("Error"):
+                    for resume in (resume1, resume2):
+                        store.record("comparison", resume.content_hash, text_key(job_desc), response, source, call_info)
                 
                 st.markdown('<div class="report-section">', unsafe_allow_html=True)
                 st.markdown(response)
@@ -364,19 +844,93 @@ def resume_comparison_page():
                 )
 
 
-def chat_assistant_page(resume_text=None, job_description=None):
+ANALYSIS_LABELS = {
+    "hr": "🧠 HR Evaluation",
+    "skills": "🚀 Skill Enhancement",
+    "ats": "📊 ATS Match",
+    "comparison": "⚖️ Comparison",
+}
+
+
+def history_page(resume):
+    """Analysis History Feature"""
+    st.markdown("### 🗂️ Analysis History")
+    st.markdown('<div class="info-box">Browse earlier analyses of this resume. Stored reports open instantly, without calling the AI again.</div>', unsafe_allow_html=True)
+    
+    store = get_result_store()
+    if store is None:
+        st.markdown('<div class="warning-box">⚠️ The result store is disabled (RESULT_STORE=false).</div>', unsafe_allow_html=True)
+        return
+    
+    rows = store.history(resume.content_hash)
+    if not rows:
+        st.markdown('<div class="warning-box">📭 No analyses recorded for this resume yet. Run an analysis and it will show up here.</div>', unsafe_allow_html=True)
+        return
+    
+    st.dataframe(
+        [
+            {
+                "When": datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d %H:%M"),
+                "Analysis": ANALYSIS_LABELS.get(row["analysis"], row["analysis"]),
+                "Match Score": f"{row['overall_score']}%" if row["overall_score"] is not None else "",
+                "Model": row["model"] or row["source"],
+                "Latency (s)": round(row["latency"], 2) if row["latency"] is not None else None,
+                "Tokens": (row["prompt_tokens"] or 0) + (row["output_tokens"] or 0) or None,
+            }
+            for row in rows
+        ],
+        hide_index=True
+    )
+    
+    selected = st.selectbox(
+        "📄 Open a stored report",
+        rows,
+        format_func=lambda row: f"{datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M')} · {ANALYSIS_LABELS.get(row['analysis'], row['analysis'])}",
+        key="history_select"
+    )
+    result = store.get(selected["id"])
+    scores = {
+        name.title(): f"{value}%" for name, value in (result["scores"] or {}).items() if value is not None
+    }
+    if scores:
+        display_metric_cards(scores)
+    
+    st.markdown('<div class="report-section">', unsafe_allow_html=True)
+    st.markdown(result["response"])
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    report_content, filename = save_report(result["response"], f"{result['analysis'].upper()}_Report")
+    st.download_button(
+        label="📥 Download Report",
+        data=report_content,
+        file_name=filename,
+        mime="text/plain"
+    )
+
+
+def chat_assistant_page(resume=None, job_description=None):
     """AI Chat Assistant Feature"""
     st.markdown("### 💬 AI Chat Assistant")
     st.markdown('<div class="info-box">Ask questions about your resume, get personalized advice, and receive real-time feedback from our AI assistant.</div>', unsafe_allow_html=True)
     
-    # Initialize chat history
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+    # Initialize bounded chat memory
+    if 'chat_memory' not in st.session_state:
+        # A partial rather than a lambda keeps the memory picklable for session spilling
+        st.session_state.chat_memory = ChatMemory(
+            partial(generate_response, analysis_type="chat_summary")
+        )
+        st.session_state.chat_visible = CHAT_RENDER_PAGE
+    memory = st.session_state.chat_memory
     
-    # Display chat history
+    # Display recent chat history; older messages are paged in on demand
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.chat_history:
+        hidden = len(memory.messages) - st.session_state.chat_visible
+        if hidden > 0 and st.button(f"⬆️ Show older messages ({hidden} hidden)", key="chat_older"):
+            st.session_state.chat_visible += CHAT_RENDER_PAGE
+            st.rerun()
+        
+        for message in memory.visible(st.session_state.chat_visible):
             if message['role'] == 'user':
                 st.markdown(f'<div class="chat-message user-message">👤 <strong>You:</strong> {message["content"]}</div>', unsafe_allow_html=True)
             else:
@@ -391,37 +945,89 @@ def chat_assistant_page(resume_text=None, job_description=None):
         send_button = st.button("📤 Send", key="send_chat")
     with col2:
         if st.button("🗑️ Clear Chat", key="clear_chat"):
-            st.session_state.chat_history = []
+            memory.clear()
+            st.session_state.chat_visible = CHAT_RENDER_PAGE
             st.rerun()
     
     if send_button and user_question:
         # Add user message to history
-        st.session_state.chat_history.append({
-            'role': 'user',
-            'content': user_question
-        })
+        memory.add('user', user_question)
+    
+    resume_queued = (
+        is_queued("chat") and memory.messages
+        and memory.messages[-1]['role'] == 'user'
+    )
+    if (send_button and user_question) or resume_queued:
+        user_question = memory.messages[-1]['content']
         
         with st.spinner("🤔 Thinking..."):
-            # Generate response
-            if resume_text and job_description:
-                system_prompt = get_chat_system_prompt(resume_text, job_description)
-                full_prompt = f"{system_prompt}\n\nUser Question: {user_question}"
+            # Generate response with a bounded summary of the conversation so far
+            if resume and job_description:
+                system_prompt = get_chat_system_prompt(resume, job_description)
             else:
-                full_prompt = f"{get_simple_chat_prompt()}\n\nUser Question: {user_question}"
+                system_prompt = get_simple_chat_prompt()
             
-            ai_response = generate_response(full_prompt)
+            conversation = memory.context(exclude_last=True)
+            if conversation:
+                system_prompt = f"{system_prompt}\n\n{conversation}"
+            full_prompt = f"{system_prompt}\n\nUser Question: {user_question}"
+            
+            ai_response = run_or_queue_analysis("chat", full_prompt)
+            if ai_response is None:
+                return
             
             # Add AI response to history
-            st.session_state.chat_history.append({
-                'role': 'assistant',
-                'content': ai_response
-            })
+            memory.add('assistant', ai_response)
         
         st.rerun()
 
 
+def is_admin():
+    """Admin tools are shown when the page URL carries ?admin=<ADMIN_TOKEN>"""
+    return check_admin_token(st.query_params.get("admin"))
+
+
+def profiler_panel():
+    """Admin controls to profile the next reruns of this session and download the flamegraphs"""
+    with st.expander("🔬 Profiler"):
+        remaining = st.session_state.get("profile_reruns", 0)
+        if remaining:
+            st.caption(f"⏺️ Capturing the next {remaining} rerun(s)")
+        reruns = st.number_input("Reruns to profile", min_value=1, max_value=20, value=3, key="profile_reruns_input")
+        if st.button("Start capture", key="profile_start_btn"):
+            st.session_state.profile_reruns = int(reruns)
+            st.markdown(f'<div class="success-box">✅ The next {int(reruns)} rerun(s) of this session will be profiled</div>', unsafe_allow_html=True)
+        
+        for profile in list_profiles(limit=5):
+            pdf = f" · {profile['pdf_bytes'] // 1024} KB" if profile.get("pdf_bytes") else ""
+            pages = f", {profile['pdf_pages']} pages" if profile.get("pdf_pages") else ""
+            st.caption(f"{os.path.basename(profile['svg'])[:15]} · {profile.get('page') or profile['label']}"
+                       f"{pdf}{pages} · {profile['duration_s']}s, {profile['samples']} samples")
+            if os.path.exists(profile["svg"]):
+                with open(profile["svg"], "rb") as f:
+                    st.download_button("Flamegraph (SVG)", f.read(), file_name=os.path.basename(profile["svg"]),
+                                       mime="image/svg+xml", key=f"profile_{profile['svg']}")
+
+
+def sessions_panel():
+    """Admin view of memory held by sessions and the spill counters"""
+    metrics = get_session_registry().metrics()
+    with st.expander("🧮 Sessions"):
+        st.caption(
+            f"{metrics['sessions']} sessions · {metrics['total_mb']} MB of {metrics['limit_mb']} MB · "
+            f"{metrics['spilled_sessions']} spills ({metrics['spilled_bytes'] // 1024} KB), "
+            f"{metrics['restored_sessions']} restored"
+        )
+        if metrics["per_session"]:
+            st.dataframe(metrics["per_session"][:20], hide_index=True)
+
+
+@traced("app.run")
 def main():
     """Main application"""
+    ctx = get_script_run_ctx()
+    annotate_trace(session_id=ctx.session_id if ctx else None)
+    
     # Initialize Gemini
     if not initialize_gemini():
         st.error("⚠️ Failed to initialize Gemini AI. Please check your API key in the .env file.")
@@ -431,10 +1037,15 @@ def main():
     # Display header
     display_header()
     
+    if is_degraded():
+        st.markdown('<div class="warning-box">⚠️ <strong>Limited mode</strong>: the AI service has hit its quota. ATS Match and Resume Comparison use local analysis; other requests are queued and run automatically once service resumes.</div>', unsafe_allow_html=True)
+    
     # Sidebar
     with st.sidebar:
         st.markdown("## 📁 Upload Resume")
-        uploaded_file = st.file_uploader("Choose your resume (PDF)", type=['pdf'], key="main_resume")
+        # Extraction starts on upload, so it overlaps with typing the job description
+        uploaded_file = st.file_uploader("Choose your resume (PDF)", type=['pdf'], key="main_resume",
+                                         on_change=on_resume_upload, args=("main_resume",))
         
         st.markdown("## 📋 Job Description")
         job_description = st.text_area("Paste the job description here", height=200, 
@@ -449,11 +1060,18 @@ def main():
                 "🧠 HR Evaluation",
                 "🚀 Skill Enhancement",
                 "📊 ATS Match Analysis",
+                "🎯 Multi-Job Match",
+                "📑 Full Report",
                 "⚖️ Resume Comparison",
-                "💬 AI Chat Assistant"
+                "💬 AI Chat Assistant",
+                "🗂️ Analysis History"
             ],
             index=0
         )
+        set_attributes(page=analysis_type)
+        annotate_profile(page=analysis_type)
+        if uploaded_file:
+            annotate_profile(pdf_bytes=uploaded_file.size)
         
         st.markdown("---")
         st.markdown("### 📚 About")
@@ -466,20 +1084,62 @@ def main():
         - ✅ Get AI-powered advice
         """)
         
+        routing_metrics = get_routing_metrics()
+        if routing_metrics["decisions"]:
+            with st.expander("📈 Model Routing"):
+                st.dataframe(routing_metrics["decisions"], hide_index=True)
+                st.dataframe(
+                    [{"model": name, **stats} for name, stats in routing_metrics["models"].items()],
+                    hide_index=True
+                )
+                transport_metrics = get_transport_metrics()
+                if transport_metrics and transport_metrics["requests"]:
+                    st.caption(
+                        f"🔌 {transport_metrics['requests']} requests, {transport_metrics['reused']} on warm connections · "
+                        f"connect {transport_metrics['avg_connect_ms']} ms (cold only) · "
+                        f"time to first byte {transport_metrics['avg_ttfb_ms']} ms"
+                    )
+                scheduler_metrics = get_scheduler_metrics()
+                if scheduler_metrics and scheduler_metrics["admitted"]:
+                    p95 = scheduler_metrics["p95_wait_s"]
+                    p95_text = "n/a" if p95 is None else f"over {WAIT_BUCKETS[-1]:g} s" if p95 == float("inf") else f"≤ {p95:g} s"
+                    st.caption(
+                        f"🚦 {scheduler_metrics['in_flight']}/{scheduler_metrics['concurrency']} calls in flight, "
+                        f"{scheduler_metrics['queued']} queued · p95 queue wait {p95_text} · "
+                        f"{sum(scheduler_metrics['rejected'].values())} rejected as busy"
+                    )
+        
+        if is_admin():
+            profiler_panel()
+            sessions_panel()
+        
         st.markdown("---")
-        st.markdown("🔒 **Privacy**: All data is processed securely. No resume data is stored permanently.")
+        st.markdown("🔒 **Privacy**: All data is processed securely. Resume text is not stored; analysis reports are kept in a local database for the history view.")
     
     # Main content area
     if analysis_type == "⚖️ Resume Comparison":
         resume_comparison_page()
     elif analysis_type == "💬 AI Chat Assistant":
-        resume_text = None
-        if uploaded_file and validate_pdf(uploaded_file):
-            resume_text = extract_text_from_pdf(uploaded_file)
-        chat_assistant_page(resume_text, job_description)
+        resume = await_document(uploaded_file) if uploaded_file else None
+        chat_assistant_page(resume, job_description)
+    elif analysis_type == "🎯 Multi-Job Match":
+        if not uploaded_file:
+            st.markdown('<div class="warning-box">⚠️ Please upload your resume to match it against job descriptions</div>', unsafe_allow_html=True)
+        else:
+            resume = await_document(uploaded_file)
+            if resume:
+                multi_jd_page(resume, job_description)
+    elif analysis_type == "🗂️ Analysis History":
+        if not uploaded_file:
+            st.markdown('<div class="warning-box">⚠️ Please upload your resume to see its analysis history</div>', unsafe_allow_html=True)
+        else:
+            resume = await_document(uploaded_file)
+            if resume:
+                history_page(resume)
     else:
         # For other features, require resume and job description
         if not uploaded_file:
+            cancel_speculation()
             st.markdown('<div class="warning-box">⚠️ Please upload your resume to get started</div>', unsafe_allow_html=True)
             
             # Show feature preview
@@ -514,28 +1174,65 @@ def main():
             return
         
         if not job_description:
+            cancel_speculation()
             st.markdown('<div class="warning-box">⚠️ Please provide a job description for better analysis</div>', unsafe_allow_html=True)
             return
         
-        # Validate and extract text from PDF
-        if validate_pdf(uploaded_file):
-            resume_text = extract_text_from_pdf(uploaded_file)
-            
-            if not resume_text:
-                st.error("❌ Could not extract text from the PDF. Please ensure it's a valid text-based PDF.")
+        # Wait for the extraction that started when the file was uploaded
+        resume = await_document(uploaded_file)
+        
+        if not resume:
+            cancel_speculation()
+            st.error("❌ Could not extract text from the PDF. Please ensure it's a valid text-based PDF.")
+            return
+        
+        # Start likely analyses in the background while the user decides
+        start_speculation(uploaded_file, job_description)
+        
+        # Show success message
+        st.markdown(f'<div class="success-box">✅ Resume uploaded successfully! ({len(resume)} characters from {len(resume.pages)} pages extracted)</div>', unsafe_allow_html=True)
+        
+        # Flag near-duplicates of resumes analyzed before
+        check_near_duplicate(resume, job_description)
+        
+        # Route to appropriate page
+        if analysis_type == "🧠 HR Evaluation":
+            hr_evaluation_page(resume, job_description)
+        elif analysis_type == "🚀 Skill Enhancement":
+            skill_enhancement_page(resume, job_description)
+        elif analysis_type == "📊 ATS Match Analysis":
+            ats_match_page(resume, job_description)
+        elif analysis_type == "📑 Full Report":
+            full_report_page(resume, job_description)
+
+
+def run_main():
+    """
+    Run main(), under the sampling profiler while an admin capture is armed for this session
+    
+    The session registry restores anything spilled while the session was idle
+    before the page runs, and measures the session afterwards. Model calls made
+    during the run are scheduled as this session's.
+    """
+    ctx = get_script_run_ctx()
+    sessions = get_session_registry() if ctx else None
+    if sessions:
+        restored = sessions.enter(ctx)
+        if restored:
+            st.toast("♻️ Restored your session after inactivity")
+    try:
+        with session_scope(ctx.session_id if ctx else None):
+            remaining = st.session_state.get("profile_reruns", 0)
+            if not remaining:
+                main()
                 return
-            
-            # Show success message
-            st.markdown(f'<div class="success-box">✅ Resume uploaded successfully! ({len(resume_text)} characters extracted)</div>', unsafe_allow_html=True)
-            
-            # Route to appropriate page
-            if analysis_type == "🧠 HR Evaluation":
-                hr_evaluation_page(resume_text, job_description)
-            elif analysis_type == "🚀 Skill Enhancement":
-                skill_enhancement_page(resume_text, job_description)
-            elif analysis_type == "📊 ATS Match Analysis":
-                ats_match_page(resume_text, job_description)
+            st.session_state.profile_reruns = remaining - 1
+            with capture("rerun", thread_ids=[threading.get_ident()], session_id=ctx.session_id if ctx else None):
+                main()
+    finally:
+        if sessions:
+            sessions.leave(ctx)
 
 
 if __name__ == "__main__":
-    main()
+    run_main()
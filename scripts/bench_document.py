@@ -0,0 +1,89 @@
+"""
+Document Memory Check
+Compares per-session memory of plain extracted strings with shared Document objects
+
+Simulates concurrent sessions that each hold an uploaded 50-page resume the
+way the app does: the foreground extraction plus the speculative path's
+cached copy. The old path builds a fresh string per session and rerun; the
+Document path shares one lazily extracted object per file.
+
+Usage:
+    python scripts/bench_document.py --sessions 20 --pages 50
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("PDF_SANDBOX", "false")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pdf_sandbox import build_pdf  # noqa: E402
+from utils import pdf_processor  # noqa: E402
+from utils.pdf_processor import get_pdf_engine, load_document  # noqa: E402
+from utils.pdf_sandbox import extract_pages  # noqa: E402
+from utils.prompts import get_ats_match_prompt  # noqa: E402
+
+
+def resume_pdf(pages):
+    lines = [f"Built data pipelines in Python and Spark for team {i}, cutting costs by {i % 40}%" for i in range(40)]
+    streams = []
+    for page in range(pages):
+        ops = "".join(f"BT /F1 9 Tf 50 {760 - 18 * i} Td (p{page} {line}) Tj ET\n" for i, line in enumerate(lines))
+        streams.append((ops.encode(), False))
+    return build_pdf(streams)
+
+
+def old_session(pdf_bytes, engine):
+    """Previous flow: join pages, strip, plus an st.cache_data copy for speculation"""
+    pages, _ = extract_pages(pdf_bytes, engine=engine)
+    text = "".join(pages).strip()
+    speculative_copy = pickle.loads(pickle.dumps(text))
+    return [text, speculative_copy]
+
+
+def new_session(pdf_bytes, engine):
+    document = load_document(pdf_bytes)
+    return [document, load_document(pdf_bytes)]
+
+
+def measure(label, session, pdf_bytes, engine, sessions, reruns):
+    jd = "Senior data engineer with Python, Spark and Airflow"
+    tracemalloc.start()
+    held = []
+    start = time.perf_counter()
+    for _ in range(sessions):
+        state = None
+        for _ in range(reruns):
+            state = session(pdf_bytes, engine)
+            get_ats_match_prompt(state[0], jd)
+        held.append(state)
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} held {current / 1024 / sessions:8.1f} KB/session, peak {peak / 1024 / 1024:6.1f} MB, "
+          f"{seconds * 1000 / (sessions * reruns):6.1f} ms/rerun")
+    return held
+
+
+def main(args):
+    pdf_bytes = resume_pdf(args.pages)
+    engine = get_pdf_engine()
+    document = load_document(pdf_bytes)
+    print(f"{args.pages}-page resume, {len(document):,} characters, engine {engine}, "
+          f"{args.sessions} sessions x {args.reruns} reruns")
+    # Start the Document run without the warm-up extraction above
+    pdf_processor._documents.clear()
+
+    measure("string", old_session, pdf_bytes, engine, args.sessions, args.reruns)
+    measure("document", new_session, pdf_bytes, engine, args.sessions, args.reruns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=3)
+    main(parser.parse_args())
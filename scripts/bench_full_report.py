@@ -0,0 +1,79 @@
+"""
+Full Report Benchmark
+Compares one full report call with the three separate HR, skills and ATS calls
+
+Offline, input tokens are estimated from prompt length (about four characters
+per token) for a range of resume and job description sizes. With --live and a
+GOOGLE_API_KEY, both paths are run against the API and measured prompt tokens,
+output tokens and latency are reported, along with whether the full report
+split cleanly into its three parts.
+
+Usage:
+    python scripts/bench_full_report.py
+    python scripts/bench_full_report.py --live --resume resume.pdf --jd jd.txt
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.full_report import SINGLE_PROMPTS, estimate_savings, single_prompts, split_full_report  # noqa: E402
+from utils.prompts import get_full_report_prompt  # noqa: E402
+
+
+RESUME_LINE = "Senior Python developer with 6 years of experience in Django, AWS and PostgreSQL. "
+JD_LINE = "We are hiring a backend engineer with Python, Django, AWS and Kubernetes experience. "
+
+
+def offline(args):
+    print(f"{'resume chars':>12} {'jd chars':>9} {'3 calls':>9} {'full':>9} {'saved':>7}   (estimated input tokens)")
+    for resume_chars, jd_chars in ((2000, 800), (4000, 1500), (8000, 3000), (16000, 5000)):
+        resume = (RESUME_LINE * (resume_chars // len(RESUME_LINE) + 1))[:resume_chars]
+        jd = (JD_LINE * (jd_chars // len(JD_LINE) + 1))[:jd_chars]
+        savings = estimate_savings(get_full_report_prompt(resume, jd), single_prompts(resume, jd))
+        separate, full = savings["three_call_prompt_tokens"], savings["prompt_tokens"]
+        print(f"{resume_chars:12d} {jd_chars:9d} {separate:9,d} {full:9,d} {1 - full / separate:6.0%}")
+
+
+def live(args):
+    from utils.gemini_client import generate_response, initialize_gemini, last_call_info
+    from utils.pdf_processor import load_document
+
+    if not initialize_gemini():
+        sys.exit("GOOGLE_API_KEY is not set")
+    with open(args.resume, "rb") as f:
+        resume = load_document(f.read()).text
+    with open(args.jd) as f:
+        jd = f.read()
+
+    totals = {"prompt_tokens": 0, "output_tokens": 0, "latency": 0.0}
+    for key, prompt in single_prompts(resume, jd).items():
+        start = time.perf_counter()
+        generate_response(prompt, analysis_type=key)
+        info = last_call_info() or {}
+        totals["latency"] += time.perf_counter() - start
+        totals["prompt_tokens"] += info.get("prompt_tokens") or 0
+        totals["output_tokens"] += info.get("output_tokens") or 0
+
+    start = time.perf_counter()
+    response = generate_response(get_full_report_prompt(resume, jd), analysis_type="full")
+    latency = time.perf_counter() - start
+    info = last_call_info() or {}
+    parts = split_full_report(response)
+
+    print(f"{'':14} {'3 calls':>10} {'full report':>12}")
+    print(f"{'input tokens':14} {totals['prompt_tokens']:10,d} {info.get('prompt_tokens') or 0:12,d}")
+    print(f"{'output tokens':14} {totals['output_tokens']:10,d} {info.get('output_tokens') or 0:12,d}")
+    print(f"{'latency':14} {totals['latency']:9.1f}s {latency:11.1f}s")
+    print(f"parts found: {sorted(parts)} of {sorted(SINGLE_PROMPTS)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--resume", help="Resume PDF for --live")
+    parser.add_argument("--jd", help="Job description text file for --live")
+    args = parser.parse_args()
+    live(args) if args.live else offline(args)
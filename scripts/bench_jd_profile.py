@@ -0,0 +1,113 @@
+"""
+Job Profile Check
+Compares ATS prompts and local scoring with the raw job description against a shared job profile
+
+Screens a batch of resumes against one long job description. The raw path
+sends the full job description in every ATS prompt and re-extracts keywords
+and skills for every local score; the profile path extracts the job profile
+once (a model stub stands in for the extraction call) and reuses it.
+
+Usage:
+    python scripts/bench_jd_profile.py --resumes 50
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import jd_profile  # noqa: E402
+from utils.jd_profile import build_ats_prompt, format_jd_profile, get_jd_profile  # noqa: E402
+from utils.local_analysis import local_ats_match  # noqa: E402
+from utils.prompts import get_ats_match_prompt  # noqa: E402
+
+
+JD = """Senior Data Engineer
+
+About us: we are a fast-growing logistics company moving millions of parcels a day across Europe.
+Our data platform team builds the pipelines, warehouse and tooling every other team relies on.
+
+Responsibilities:
+- Design, build and operate batch and streaming pipelines in Python and Spark
+- Own our Airflow deployment and help teams write reliable DAGs
+- Model data in the warehouse and keep SQL transformations tested and documented
+- Work with analysts and product engineers to turn requirements into data products
+- Take part in the on-call rotation for the data platform
+
+Requirements:
+- 5+ years of experience as a data or backend engineer
+- Strong Python and SQL, production experience with Spark
+- Experience with Airflow or a similar orchestrator
+- Experience with AWS (S3, EMR, IAM) and infrastructure as code with Terraform
+- Bachelor's degree in Computer Science or a related field
+
+Nice to have:
+- dbt and Snowflake
+- Kafka or another streaming platform
+- Kubernetes experience is a plus
+
+We offer a hybrid setup, a learning budget and 30 days of holiday.
+"""
+
+
+def resumes(count):
+    stacks = ["Python, Spark, Airflow, SQL, AWS", "Java, Kafka, Kubernetes, SQL", "Python, dbt, Snowflake, Terraform"]
+    return [
+        f"Data engineer with {3 + i % 6} years of experience. Skills: {stacks[i % 3]}. "
+        f"B.Sc computer science. Built pipelines for team {i}. " * 20
+        for i in range(count)
+    ]
+
+
+def fake_generate(prompt, analysis_type=None):
+    fake_generate.calls += 1
+    time.sleep(0.3)  # typical latency of a short extraction call
+    return json.dumps({
+        "title": "Senior Data Engineer",
+        "required_skills": ["Python", "SQL", "Apache Spark", "Apache Airflow", "AWS", "Terraform"],
+        "nice_to_have": ["dbt", "Snowflake", "Apache Kafka", "Kubernetes"],
+        "min_years": 5, "education": "bachelor",
+        "keywords": [{"keyword": k, "weight": w} for k, w in [
+            ("python", 1.0), ("sql", 1.0), ("spark", 1.0), ("airflow", 0.9), ("aws", 0.8), ("terraform", 0.7),
+            ("data pipelines", 0.8), ("streaming", 0.5), ("dbt", 0.4), ("snowflake", 0.4), ("kafka", 0.4),
+        ]],
+    })
+
+
+fake_generate.calls = 0
+
+
+def main(args):
+    jd_profile.generate_response = fake_generate
+    jd_profile.is_degraded = lambda: False
+    batch = resumes(args.resumes)
+
+    raw_chars = sum(len(get_ats_match_prompt(resume, JD)) for resume in batch)
+    start = time.perf_counter()
+    profiled_chars = sum(len(build_ats_prompt(resume, JD)) for resume in batch)
+    profile_seconds = time.perf_counter() - start
+    profile = get_jd_profile(JD)
+    jd_tokens, profile_tokens = len(JD) / 4, len(format_jd_profile(profile)) / 4
+    print(f"job description ~{jd_tokens:.0f} tokens, profile ~{profile_tokens:.0f} tokens "
+          f"({profile['source']}, {fake_generate.calls} extraction call for {args.resumes} resumes, "
+          f"{profile_seconds:.2f}s total)")
+    print(f"ATS prompts for {args.resumes} resumes: {raw_chars / 4:,.0f} -> {profiled_chars / 4:,.0f} input tokens "
+          f"({1 - profiled_chars / raw_chars:.1%} less)")
+
+    start = time.perf_counter()
+    raw_scores = [local_ats_match(resume, JD)["overall"] for resume in batch]
+    raw_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    profiled_scores = [local_ats_match(resume, JD, profile)["overall"] for resume in batch]
+    profiled_seconds = time.perf_counter() - start
+    print(f"local scoring: {raw_seconds * 1000 / len(batch):.2f} ms/resume re-extracting the job description, "
+          f"{profiled_seconds * 1000 / len(batch):.2f} ms/resume with the shared profile")
+    print(f"local scores (first 6): local profile {raw_scores[:6]}, model profile {profiled_scores[:6]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--resumes", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,94 @@
+"""
+Multi-Job Match Check
+Measures time to first and last result when one resume is scored against many job descriptions
+
+Runs score_jobs against a model stub with a fixed latency at several
+concurrency limits, checks the in-flight bound, and reports how much of each
+job prompt is the shared resume prefix a provider prompt cache can reuse.
+
+Usage:
+    python scripts/bench_multi_jd.py --jobs 20 --latency 0.5 --concurrency 1 4 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("JD_PROFILE_SOURCE", "local")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.multi_jd import rank_results, score_jobs  # noqa: E402
+
+
+RESUME = ("Senior data engineer, 7 years. Python, Spark, Airflow, Kafka, AWS, Terraform, PostgreSQL. "
+          "Built streaming pipelines and led a team of five. B.Sc computer science. ") * 30
+STACKS = ["Python Spark Airflow", "Java Kafka Kubernetes", "Go gRPC PostgreSQL", "dbt Snowflake SQL", "React TypeScript"]
+
+
+def job_descriptions(count):
+    return [
+        f"Job {i}: {STACKS[i % len(STACKS)].split()[0]} engineer\n"
+        f"Requirements:\n- {3 + i % 5}+ years of experience\n- {STACKS[i % len(STACKS)]}\n"
+        f"Nice to have:\n- {STACKS[(i + 1) % len(STACKS)]}\n"
+        for i in range(count)
+    ]
+
+
+class StubModel:
+    """Fixed-latency model recording prompts and the peak number of calls in flight"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+        self.prompts = []
+
+    def __call__(self, prompt, analysis_type=None):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.prompts.append(prompt)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        score = 40 + len(self.prompts) * 7 % 55
+        return f"Overall Match Score: {score}%\n- Keyword Match: {score}%\n\n**Verdict:** Stub.\n"
+
+
+def shared_prefix(prompts):
+    first = prompts[0]
+    length = len(first)
+    for prompt in prompts[1:]:
+        length = min(length, next((i for i, (a, b) in enumerate(zip(first, prompt)) if a != b), len(prompt)))
+    return length
+
+
+def main(args):
+    jobs = job_descriptions(args.jobs)
+    print(f"{args.jobs} job descriptions, model latency {args.latency * 1000:.0f} ms")
+    print(f"{'in flight':>9} {'first result':>13} {'all results':>12} {'peak':>5}")
+    stub = None
+    for limit in args.concurrency:
+        stub = StubModel(args.latency)
+        start = time.perf_counter()
+        first, results = None, []
+        for _, result in score_jobs(RESUME, jobs, stub, max_in_flight=limit):
+            first = first or time.perf_counter() - start
+            results.append(result)
+        total = time.perf_counter() - start
+        print(f"{limit:9d} {first:12.2f}s {total:11.2f}s {stub.peak:5d}" + ("" if stub.peak <= limit else "  OVER LIMIT"))
+
+    prefix = shared_prefix(stub.prompts)
+    average = sum(map(len, stub.prompts)) / len(stub.prompts)
+    print(f"\nshared resume prefix: {prefix:,} of {average:,.0f} prompt chars on average ({prefix / average:.0%})")
+    best = rank_results(results)[0]
+    print(f"best match: {best['title']} ({best['overall']}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per model call")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    main(parser.parse_args())
@@ -0,0 +1,107 @@
+"""
+PDF Engine Benchmark
+Compares installed extraction engines on speed, memory and text quality
+
+Runs every installed engine over a sample corpus, reports pages/second,
+peak memory and quality, and with --save writes the profile that
+PDF_ENGINE=auto uses to pick the fastest engine that passed the quality check.
+
+The default corpus is generated: single-column resumes plus two-column
+resumes whose content streams interleave the columns row by row, with the
+expected reading order as the reference text. Pass --corpus DIR to use real
+PDFs instead (quality is then judged on readable tokens only).
+
+Usage:
+    python scripts/bench_pdf_engines.py --documents 40 --save
+    python scripts/bench_pdf_engines.py --corpus ~/resumes --repeat 3
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pdf_sandbox import build_pdf  # noqa: E402
+from utils.pdf_engines import (  # noqa: E402
+    ENGINES, PDF_ENGINE_PROFILE, QUALITY_THRESHOLD, available_engines, benchmark_engines, save_profile
+)
+
+SKILLS = ["Python", "Django", "Kubernetes", "PostgreSQL", "Terraform", "React", "Airflow", "Spark"]
+
+
+def line_text(index, row, column):
+    return f"{column} {SKILLS[(index + row) % len(SKILLS)]} project {row} delivered results"
+
+
+def single_column(index, pages=3, rows=30):
+    """Resume with one text column; returns (pdf bytes, reference text)"""
+    streams, reference = [], []
+    for page in range(pages):
+        lines = [line_text(index, page * rows + row, "Experience") for row in range(rows)]
+        reference.extend(lines)
+        ops = "".join(f"BT /F1 10 Tf 72 {740 - 22 * row} Td ({line}) Tj ET\n" for row, line in enumerate(lines))
+        streams.append((ops.encode(), False))
+    return build_pdf(streams), "\n".join(reference)
+
+
+def two_column(index, pages=2, rows=30):
+    """Resume with two columns drawn row by row; reference reads left column then right"""
+    streams, reference = [], []
+    for page in range(pages):
+        left = [line_text(index, page * rows + row, "Skills") for row in range(rows)]
+        right = [line_text(index, page * rows + row, "Projects") for row in range(rows)]
+        reference.extend(left + right)
+        ops = "".join(
+            f"BT /F1 8 Tf 40 {740 - 10 * row} Td ({l}) Tj ET\nBT /F1 8 Tf 320 {740 - 10 * row} Td ({r}) Tj ET\n"
+            for row, (l, r) in enumerate(zip(left, right))
+        )
+        streams.append((ops.encode(), False))
+    return build_pdf(streams), "\n".join(reference)
+
+
+def load_corpus(args):
+    if args.corpus:
+        paths = sorted(glob.glob(os.path.join(os.path.expanduser(args.corpus), "*.pdf")))
+        if not paths:
+            sys.exit(f"No PDFs found in {args.corpus}")
+        corpus = []
+        for path in paths:
+            with open(path, "rb") as f:
+                corpus.append((f.read(), None))
+        return corpus
+    half = args.documents // 2
+    return [single_column(i) for i in range(args.documents - half)] + [two_column(i) for i in range(half)]
+
+
+def main(args):
+    corpus = load_corpus(args)
+    engines = args.engines.split(",") if args.engines else available_engines()
+    missing = sorted(set(ENGINES) - set(available_engines()))
+    print(f"corpus: {len(corpus)} documents, engines: {', '.join(engines)}"
+          + (f" (not installed: {', '.join(missing)})" if missing else ""))
+
+    report = benchmark_engines(corpus, engines, repeat=args.repeat, threshold=args.threshold)
+    print(f"{'engine':<10} {'pages/s':>9} {'peak MB':>8} {'quality':>8} {'mean':>6} {'errors':>6}  passed")
+    for r in sorted(report["results"], key=lambda r: -r["pages_per_second"]):
+        print(f"{r['engine']:<10} {r['pages_per_second']:>9.1f} {r['peak_memory_mb']:>8.1f} "
+              f"{r['quality']:>8.3f} {r['mean_quality']:>6.3f} {r['errors']:>6}  {'yes' if r['passed'] else 'no'}")
+    print(f"selected: {report['selected'] or 'none passed the quality check'}")
+
+    if args.save:
+        if report["selected"] is None:
+            sys.exit("Not saving: no engine passed the quality check")
+        save_profile(report, args.profile)
+        print(f"saved profile to {args.profile}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--corpus", help="Directory of sample PDFs (default: generated corpus)")
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--engines", help="Comma-separated engine names (default: all installed)")
+    parser.add_argument("--threshold", type=float, default=QUALITY_THRESHOLD)
+    parser.add_argument("--profile", default=PDF_ENGINE_PROFILE)
+    parser.add_argument("--save", action="store_true", help="Write the profile used by PDF_ENGINE=auto")
+    main(parser.parse_args())
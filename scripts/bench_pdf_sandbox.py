@@ -0,0 +1,154 @@
+"""
+PDF Sandbox Corpus Check
+Shows that a pathological PDF no longer slows down concurrent extractions
+
+Builds a small corpus of normal resumes plus a decompression-bomb PDF, then
+extracts the normal files while the bomb is being processed, first in-process
+and then through the sandboxed worker pool.
+
+Usage:
+    python scripts/bench_pdf_sandbox.py --normal 40 --bomb-mb 60
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_engines import resolve_engine  # noqa: E402
+from utils.pdf_sandbox import ExtractionPool, ExtractionError, extract_pages  # noqa: E402
+
+
+def build_pdf(page_streams):
+    """Assemble a minimal PDF with one content stream per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for stream, filtered in page_streams:
+        content_id = len(objects) + 2
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        header = f"<< /Length {len(stream)}{' /Filter /FlateDecode' if filtered else ''} >>\nstream\n"
+        objects.append(header.encode() + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def normal_resume(index):
+    """Two-page text resume"""
+    lines = [f"Candidate {index} - Senior Python Engineer", "Experience: Django, AWS, Docker, Kubernetes"]
+    pages = []
+    for page in range(2):
+        ops = "".join(f"BT /F1 11 Tf 72 {720 - 16 * i} Td ({line} p{page}) Tj ET\n" for i, line in enumerate(lines * 10))
+        pages.append((ops.encode(), False))
+    return build_pdf(pages)
+
+
+def bomb(size_mb):
+    """Page whose tiny compressed content stream inflates to size_mb of text operators"""
+    chunk = b"BT /F1 1 Tf 0 0 Td (x) Tj ET\n" * 4096
+    compressor = zlib.compressobj(9)
+    data = b"".join(compressor.compress(chunk) for _ in range(size_mb * 1024 * 1024 // len(chunk)))
+    return build_pdf([(data + compressor.flush(), True)])
+
+
+def run(label, extract, corpus, hostile, workers, wait):
+    """Extract the corpus concurrently while the hostile file is processed"""
+    latencies = []
+    hostile_result = {}
+
+    def timed(pdf_bytes):
+        start = time.perf_counter()
+        extract(pdf_bytes)
+        latencies.append(time.perf_counter() - start)
+
+    def run_hostile():
+        start = time.perf_counter()
+        try:
+            extract(hostile)
+            hostile_result["outcome"] = "completed"
+        except ExtractionError as e:
+            hostile_result["outcome"] = f"stopped ({e})"
+        except Exception as e:
+            hostile_result["outcome"] = f"failed ({type(e).__name__})"
+        hostile_result["seconds"] = time.perf_counter() - start
+
+    baseline_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, corpus))
+    baseline = time.perf_counter() - baseline_start
+    baseline_latencies = sorted(latencies)
+    latencies.clear()
+
+    thread = threading.Thread(target=run_hostile, daemon=True)
+    thread.start()
+    time.sleep(0.2)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, corpus))
+    loaded = time.perf_counter() - start
+    thread.join(timeout=wait)
+    loaded_latencies = sorted(latencies)
+    if thread.is_alive():
+        hostile_result["outcome"] = "still running, holding a core in the server process"
+        hostile_result["seconds"] = time.perf_counter() - start
+
+    print(f"[{label}]")
+    print(f"  corpus alone:         {baseline:.2f}s total, p50 {baseline_latencies[len(baseline_latencies) // 2] * 1000:.0f}ms")
+    print(f"  corpus + hostile PDF: {loaded:.2f}s total, p50 {loaded_latencies[len(loaded_latencies) // 2] * 1000:.0f}ms, "
+          f"max {loaded_latencies[-1] * 1000:.0f}ms")
+    print(f"  hostile PDF:          {hostile_result['outcome']} after {hostile_result['seconds']:.1f}s")
+
+
+def main(args):
+    corpus = [normal_resume(i) for i in range(args.normal)]
+    hostile = bomb(args.bomb_mb)
+    engine = resolve_engine(args.engine)
+    print(f"corpus: {len(corpus)} normal PDFs, hostile PDF {len(hostile) / 1024:.0f} KB "
+          f"inflating to ~{args.bomb_mb} MB, engine {engine}", flush=True)
+
+    if not args.skip_in_process:
+        run("in-process", partial(extract_pages, engine=engine), corpus, hostile, args.threads, args.wait)
+
+    pool = ExtractionPool(size=args.workers, timeout=args.timeout, memory_mb=args.memory_mb,
+                          cpu_seconds=args.cpu_seconds, engine=engine)
+    try:
+        run("sandboxed", pool.extract, corpus, hostile, args.threads, args.wait)
+        print(f"  workers replaced:     {pool.replaced}")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--normal", type=int, default=40)
+    parser.add_argument("--bomb-mb", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--memory-mb", type=int, default=512)
+    parser.add_argument("--cpu-seconds", type=int, default=5)
+    parser.add_argument("--wait", type=float, default=30, help="Seconds to wait for the hostile PDF")
+    parser.add_argument("--engine", default="pypdf2", help="PDF engine name or 'auto'")
+    parser.add_argument("--skip-in-process", action="store_true")
+    main(parser.parse_args())
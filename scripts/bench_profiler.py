@@ -0,0 +1,77 @@
+"""
+Profiler Overhead Check
+Measures the slowdown of a local analysis workload with the sampling profiler off and on
+
+The workload is the local ATS match and skill scan the app runs on the ATS
+page. "off" is the normal rerun path (profiler never started); the other rows
+sample the workload's thread at the given intervals, as an admin capture does.
+
+Usage:
+    python scripts/bench_profiler.py --rounds 5 --intervals 1 5 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.local_analysis import local_ats_match  # noqa: E402
+from utils.profiler import SamplingProfiler, write_profile  # noqa: E402
+
+
+RESUME = ("Senior data engineer with Python, Spark, Airflow, Kafka, AWS, Terraform and PostgreSQL. "
+          "Built streaming pipelines and led a team of five. ") * 60
+JD = ("We are hiring a data engineer with Python, Spark, Airflow, dbt, Snowflake, Kubernetes "
+      "and strong SQL skills. ") * 10
+
+
+def workload(iterations):
+    for _ in range(iterations):
+        local_ats_match(RESUME, JD)
+
+
+def timed(iterations, interval=None):
+    profiler = None
+    if interval is not None:
+        profiler = SamplingProfiler([threading.get_ident()], interval=interval / 1000).start()
+    start = time.perf_counter()
+    workload(iterations)
+    elapsed = time.perf_counter() - start
+    if profiler is not None:
+        profiler.stop()
+    return elapsed, profiler
+
+
+def main(args):
+    workload(args.iterations // 10)  # warm caches
+    baseline = statistics.median(timed(args.iterations)[0] for _ in range(args.rounds))
+    print(f"workload: {args.iterations} local ATS matches, median of {args.rounds} rounds")
+    print(f"{'profiler':12} {'time':>9} {'overhead':>9} {'samples':>8} {'sampler cpu':>12}")
+    print(f"{'off':12} {baseline * 1000:7.1f}ms {'':>9} {'':>8} {'':>12}")
+    last = None
+    for interval in args.intervals:
+        runs = [timed(args.iterations, interval) for _ in range(args.rounds)]
+        elapsed = statistics.median(r[0] for r in runs)
+        last = runs[-1][1]
+        print(f"{f'{interval:g} ms':12} {elapsed * 1000:7.1f}ms {elapsed / baseline - 1:8.1%} "
+              f"{last.samples:8d} {last.sampler_cpu * 1000:10.1f}ms")
+
+    if last is not None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_profile(last, "bench", {"iterations": args.iterations}, tmp)
+            print(f"\nflamegraph: {os.path.getsize(paths['svg']):,} bytes, "
+                  f"{len(last.stacks)} distinct stacks; hottest:")
+            for stack, count in last.stacks.most_common(3):
+                print(f"  {count:5d}  ...{stack[-110:]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--intervals", type=float, nargs="+", default=[1, 5, 10])
+    main(parser.parse_args())
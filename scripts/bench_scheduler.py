@@ -0,0 +1,102 @@
+"""
+Fair Scheduler Check
+Compares how long light sessions wait for a model slot behind a heavy session, FIFO vs fair scheduling
+
+One heavy session submits a burst of large comparison prompts while several
+light sessions send a few chat turns each, all against a fixed-latency model
+stub. The FIFO baseline is a plain semaphore with the same concurrency, which
+is how calls were admitted before the scheduler. Also reports calls rejected
+up front and the wait histogram the scheduler exports.
+
+Usage:
+    python scripts/bench_scheduler.py --heavy 40 --light 5 --latency 0.2 --concurrency 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scheduler import FairScheduler, SchedulerBusy, call_cost  # noqa: E402
+
+
+HEAVY_PROMPT = "x" * 16000
+LIGHT_PROMPT = "x" * 800
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def run(make_call, args):
+    """Start the heavy burst, then the light sessions; return waits per kind and rejections"""
+    waits = {"heavy": [], "light": []}
+    rejected = []
+    lock = threading.Lock()
+
+    def call(session, kind, prompt):
+        start = time.perf_counter()
+        try:
+            make_call(session, "comparison" if kind == "heavy" else "chat", prompt,
+                      lambda: waits[kind].append(time.perf_counter() - start))
+        except SchedulerBusy as e:
+            with lock:
+                rejected.append((kind, e.reason))
+
+    def light_session(index):
+        for _ in range(args.turns):
+            call(f"light-{index}", "light", LIGHT_PROMPT)
+
+    threads = [threading.Thread(target=call, args=("heavy", "heavy", HEAVY_PROMPT)) for _ in range(args.heavy)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.latency / 2)
+    light = [threading.Thread(target=light_session, args=(i,)) for i in range(args.light)]
+    for thread in light:
+        thread.start()
+    for thread in threads + light:
+        thread.join()
+    return waits, rejected
+
+
+def main(args):
+    semaphore = threading.Semaphore(args.concurrency)
+
+    def fifo_call(session, analysis, prompt, on_start):
+        with semaphore:
+            on_start()
+            time.sleep(args.latency)
+
+    scheduler = FairScheduler(concurrency=args.concurrency, max_wait=args.max_wait)
+
+    def fair_call(session, analysis, prompt, on_start):
+        with scheduler.acquire(analysis, call_cost(prompt), session=session):
+            on_start()
+            time.sleep(args.latency)
+
+    print(f"{args.heavy} heavy calls + {args.light} light sessions x {args.turns} turns, "
+          f"{args.concurrency} slots, {args.latency * 1000:.0f} ms per call")
+    print(f"{'':5} {'light p50':>10} {'light p95':>10} {'heavy p95':>10} {'rejected':>9}")
+    for label, make_call in (("fifo", fifo_call), ("fair", fair_call)):
+        waits, rejected = run(make_call, args)
+        print(f"{label:5} {percentile(waits['light'], 0.5):9.2f}s {percentile(waits['light'], 0.95):9.2f}s "
+              f"{percentile(waits['heavy'], 0.95):9.2f}s {len(rejected):9d}")
+
+    stats = scheduler.stats()
+    print(f"\nrejected: {stats['rejected'] or 'none'}; wait histogram (le: cumulative count):")
+    histogram = stats["wait_seconds"]
+    print("  " + ", ".join(f"{bound:g}: {count}" for bound, count in zip(histogram["buckets"], histogram["counts"])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--heavy", type=int, default=40)
+    parser.add_argument("--light", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per model call")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-wait", type=float, default=60.0, help="Reject calls expected to wait longer")
+    main(parser.parse_args())
@@ -0,0 +1,135 @@
+"""
+Session Memory Check
+Simulates many Streamlit sessions to check memory accounting, idle spilling and the global ceiling
+
+Each simulated session holds a chat memory, section analysis versions and
+an uploaded resume in Streamlit's in-memory upload manager. The check
+reports accounted vs traced heap memory, what an idle sweep and the memory
+ceiling spill (least recently used first), and how long restoring a
+returning session takes.
+
+Usage:
+    python scripts/bench_session_memory.py --sessions 300 --upload-kb 300 --limit-mb 40
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager  # noqa: E402
+from streamlit.runtime.state.safe_session_state import SafeSessionState  # noqa: E402
+from streamlit.runtime.state.session_state import SessionState  # noqa: E402
+from streamlit.runtime.uploaded_file_manager import UploadedFileRec  # noqa: E402
+
+from utils.cache import SQLiteBackend  # noqa: E402
+from utils.chat_memory import ChatMemory  # noqa: E402
+from utils.session_memory import SessionRegistry  # noqa: E402
+
+
+class Clock:
+    """Simulated monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def summarize(prompt, analysis_type=None):
+    return "summary"
+
+
+def make_session(index, file_mgr, upload_kb):
+    state = SafeSessionState(SessionState(), lambda: None)
+    memory = ChatMemory(partial(summarize, analysis_type="chat_summary"), recent_turns=100)
+    for turn in range(40):
+        memory.messages.append({"role": "user", "content": f"Session {index} question {turn}: " + "how do I improve? " * 8})
+        memory.messages.append({"role": "assistant", "content": f"Answer {turn}: " + "add measurable results. " * 25})
+    state["chat_memory"] = memory
+    state["section_versions"] = {"current": {"resume_hash": f"{index:064x}", "results": [
+        {"section": f"Section {n}", "assessment": "Strong experience section. " * 40} for n in range(6)
+    ]}}
+    state["chat_visible"] = 10
+    ctx = SimpleNamespace(session_id=f"session-{index:04d}", session_state=state, uploaded_file_mgr=file_mgr)
+    data = os.urandom(upload_kb * 1024)
+    file_mgr.add_file(ctx.session_id, UploadedFileRec(f"file-{index}", f"resume-{index}.pdf", "application/pdf", data))
+    return ctx
+
+
+def traced_mb():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 1024 / 1024
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = Clock()
+        registry = SessionRegistry(
+            SQLiteBackend(os.path.join(tmp, "spill.db")), idle_seconds=args.idle, memory_limit=args.limit_mb * 1024 * 1024,
+            min_spill_bytes=16 * 1024, sweep_interval=float("inf"), clock=clock
+        )
+        file_mgr = MemoryUploadedFileManager("/upload")
+
+        tracemalloc.start()
+        baseline = traced_mb()
+        sessions = []
+        for i in range(args.sessions):
+            ctx = make_session(i, file_mgr, args.upload_kb)
+            registry.enter(ctx)
+            registry.leave(ctx)
+            sessions.append(ctx)
+            clock.now += args.idle * 2 / args.sessions  # the first half goes idle by the end
+        held = traced_mb() - baseline
+        metrics = registry.metrics()
+        print(f"{args.sessions} sessions: accounted {metrics['total_mb']:.1f} MB, traced heap {held:.1f} MB")
+
+        # Idle sweep only: ceiling out of the way
+        registry.memory_limit = float("inf")
+        registry.sweep()
+        metrics = registry.metrics()
+        print(f"after idle sweep ({args.idle:g}s): accounted {metrics['total_mb']:.1f} MB, traced heap "
+              f"{traced_mb() - baseline:.1f} MB, {metrics['spilled_sessions']} sessions spilled")
+
+        # Ceiling: active sessions over the limit are spilled least recently used first
+        registry.memory_limit = args.limit_mb * 1024 * 1024
+        before = {e.session_id for e in registry.entries.values() if not e.spilled_files}
+        registry.sweep()
+        after = {e.session_id for e in registry.entries.values() if not e.spilled_files}
+        spilled = sorted(before - after)
+        kept = sorted(after)
+        metrics = registry.metrics()
+        print(f"after ceiling sweep ({args.limit_mb:g} MB): accounted {metrics['total_mb']:.1f} MB, traced heap "
+              f"{traced_mb() - baseline:.1f} MB; spilled {len(spilled)} more "
+              f"({spilled[0] if spilled else '-'} .. {spilled[-1] if spilled else '-'}), "
+              f"kept {len(kept)} most recent ({kept[0] if kept else '-'} .. {kept[-1] if kept else '-'})")
+        lru_ok = not spilled or not kept or max(spilled) < min(kept)
+        print(f"least recently used spilled first: {lru_ok}")
+
+        # A spilled session returns
+        ctx = sessions[0]
+        start = time.perf_counter()
+        restored = registry.enter(ctx)
+        elapsed = time.perf_counter() - start
+        memory = ctx.session_state["chat_memory"]
+        files = file_mgr.get_files(ctx.session_id, ["file-0"])
+        intact = len(memory.messages) == 80 and files and len(files[0].data) == args.upload_kb * 1024
+        print(f"restore of {ctx.session_id}: {elapsed * 1000:.1f} ms, keys/files {restored}, intact: {bool(intact)}")
+        registry.leave(ctx)
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--upload-kb", type=int, default=300)
+    parser.add_argument("--idle", type=float, default=900, help="Idle seconds before a session is spilled")
+    parser.add_argument("--limit-mb", type=float, default=40, help="Global memory ceiling")
+    main(parser.parse_args())
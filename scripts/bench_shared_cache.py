@@ -0,0 +1,98 @@
+"""
+Shared Cache Check
+Simulates several replicas sharing the tiered cache through a SQLite file
+
+Each replica is a separate process. The check covers:
+  1. Stampede: all replicas ask for the same cold key at once; it should be computed once.
+  2. Sharing: keys computed by one replica are served to the others from the shared tier.
+  3. Lookup latency of local and shared hits.
+
+Usage:
+    python scripts/bench_shared_cache.py --replicas 6 --keys 50 --compute-ms 300
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def replica(index, path, keys, compute_ms, start_at, results):
+    from utils.cache import SQLiteBackend, TieredCache
+
+    cache = TieredCache("bench", ttl=600, local_size=1024, shared=SQLiteBackend(path))
+    computed = []
+
+    def compute(key):
+        def run():
+            time.sleep(compute_ms / 1000)
+            computed.append(key)
+            return {"key": key, "by": index}
+        return run
+
+    time.sleep(max(0.0, start_at - time.time()))
+    stampede = cache.get_or_compute(("cold-key",), compute("cold-key"))
+
+    # Replica i computes its share of the keys; everyone then reads all of them
+    for key in range(index, keys, results["replicas"]):
+        cache.get_or_compute((key,), compute(key))
+    time.sleep(max(0.0, start_at + 2 + compute_ms / 1000 * keys / results["replicas"] - time.time()))
+    shared_start = time.perf_counter()
+    for key in range(keys):
+        cache.get_or_compute((key,), compute(key))
+    shared_seconds = time.perf_counter() - shared_start
+
+    local_start = time.perf_counter()
+    for key in range(keys):
+        cache.get_or_compute((key,), compute(key))
+    local_seconds = time.perf_counter() - local_start
+
+    results[index] = {
+        "computed": len(computed),
+        "stampede_value_by": stampede["by"],
+        "shared_pass_ms": shared_seconds * 1000,
+        "local_pass_ms": local_seconds * 1000,
+        "stats": dict(cache.stats),
+    }
+
+
+def main(args):
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp, context.Manager() as manager:
+        path = os.path.join(tmp, "shared_cache.db")
+        results = manager.dict(replicas=args.replicas)
+        from utils.cache import SQLiteBackend
+        SQLiteBackend(path)
+
+        start_at = time.time() + 2
+        processes = [
+            context.Process(target=replica, args=(i, path, args.keys, args.compute_ms, start_at, results))
+            for i in range(args.replicas)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        rows = [results[i] for i in range(args.replicas)]
+
+    total = sum(r["computed"] for r in rows)
+    owners = {r["stampede_value_by"] for r in rows}
+    print(f"replicas: {args.replicas}, keys: {args.keys} + 1 cold key, compute {args.compute_ms} ms")
+    print(f"computations: {total} (ideal {args.keys + 1}, without a shared tier "
+          f"{(args.keys + 1) * args.replicas})")
+    print(f"stampede key computed by {len(owners)} replica(s): {sorted(owners)}")
+    for i, r in enumerate(rows):
+        print(f"  replica {i}: computed {r['computed']:3d}, read all keys in {r['shared_pass_ms']:6.1f} ms "
+              f"(shared tier), {r['local_pass_ms']:5.2f} ms (local tier), stats {r['stats']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=40)
+    parser.add_argument("--compute-ms", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,147 @@
+"""
+Model Transport Check
+Measures connect time vs time to first byte of the pooled transport against a local TLS stub
+
+The stub serves generateContent over HTTPS with a self-signed certificate,
+adds --handshake-ms to every new connection (standing in for DNS, TCP and TLS
+round trips to the real API) and closes keep-alive connections idle longer
+than --server-idle seconds, as API frontends do. Scenarios:
+  1. cold: no pre-connection, the first call opens a connection
+  2. warm: connections opened at startup, the first call reuses one
+  3. idle, no ping: the server drops the idle connection before the next call
+  4. idle, with ping: keep-alive pings hold the connection open through the idle period
+
+Usage:
+    python scripts/bench_transport.py --handshake-ms 150 --model-ms 200 --server-idle 1.5
+"""
+import argparse
+import json
+import os
+import re
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_transport import ConnectionPool, GeminiRestTransport  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal generateContent and model metadata endpoints"""
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(200, {"name": self.path.rsplit("/", 1)[-1]})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not re.search(r"/models/[^/]+:generateContent$", self.path):
+            self._reply(404, {"error": {"code": 404, "status": "NOT_FOUND", "message": self.path}})
+            return
+        time.sleep(self.server.model_ms / 1000)
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        self._reply(200, {
+            "candidates": [{"content": {"parts": [{"text": f"Echo: {prompt[:40]}"}]}}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 12},
+        })
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """HTTPS stub with a simulated connection setup cost and an idle timeout"""
+    daemon_threads = True
+
+    def __init__(self, address, context, handshake_ms, model_ms, idle_timeout):
+        super().__init__(address, StubHandler)
+        self.context = context
+        self.handshake_ms = handshake_ms
+        self.model_ms = model_ms
+        self.idle_timeout = idle_timeout
+
+    def finish_request(self, request, client_address):
+        time.sleep(self.handshake_ms / 1000)
+        request = self.context.wrap_socket(request, server_side=True)
+        request.settimeout(self.idle_timeout)
+        self.RequestHandlerClass(request, client_address, self)
+
+
+def self_signed_cert(directory):
+    """Create a certificate for 127.0.0.1 with the openssl CLI; returns (cert, key) paths"""
+    cert, key = os.path.join(directory, "stub.pem"), os.path.join(directory, "stub.key")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def run_scenario(name, base_url, cert, warm, idle_ping, idle_wait):
+    pool = ConnectionPool(base_url, "stub-key", size=4, warm=warm, idle_ping=idle_ping, ca_bundle=cert)
+    transport = GeminiRestTransport(pool)
+    if warm:
+        pool.wait_warm()
+    if idle_wait:
+        # One call, then an idle period before the measured call
+        transport.generate("stub-model", "first call")
+        time.sleep(idle_wait)
+    _, usage = transport.generate("stub-model", "Analyze this resume")
+    stats = pool.stats()
+    pool.close()
+    return {
+        "scenario": name,
+        "connect_ms": usage["connect_latency"] * 1000,
+        "ttfb_ms": usage["ttfb"] * 1000,
+        "stale_retries": stats["stale_retries"],
+        "pings": stats["pings"],
+    }
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = self_signed_cert(tmp)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server = StubServer(("127.0.0.1", 0), context, args.handshake_ms, args.model_ms, args.server_idle)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"https://127.0.0.1:{server.server_address[1]}/v1beta"
+
+        idle_wait = args.server_idle * 2
+        rows = [
+            run_scenario("cold start", base_url, cert, warm=0, idle_ping=0, idle_wait=0),
+            run_scenario("pre-connected", base_url, cert, warm=2, idle_ping=0, idle_wait=0),
+            run_scenario(f"after {idle_wait:g}s idle, no ping", base_url, cert, warm=1, idle_ping=0, idle_wait=idle_wait),
+            run_scenario(f"after {idle_wait:g}s idle, ping", base_url, cert, warm=1,
+                         idle_ping=args.server_idle / 2, idle_wait=idle_wait),
+        ]
+        server.shutdown()
+
+    print(f"stub: connection setup {args.handshake_ms} ms, model {args.model_ms} ms, "
+          f"server idle timeout {args.server_idle}s")
+    print(f"{'scenario':32} {'connect':>10} {'ttfb':>10} {'stale retries':>14} {'pings':>6}")
+    for r in rows:
+        print(f"{r['scenario']:32} {r['connect_ms']:8.1f}ms {r['ttfb_ms']:8.1f}ms {r['stale_retries']:14d} {r['pings']:6d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--handshake-ms", type=float, default=150)
+    parser.add_argument("--model-ms", type=float, default=200)
+    parser.add_argument("--server-idle", type=float, default=1.5)
+    main(parser.parse_args())
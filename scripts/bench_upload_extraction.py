@@ -0,0 +1,70 @@
+"""
+Upload Extraction Check
+Measures how long an analysis page waits for the resume with upload-time background extraction
+
+Simulates a user who uploads a PDF, spends some think-time typing the job
+description, then opens an analysis. The synchronous path validates and
+extracts only when the page runs; the background path starts at upload and
+the page awaits the job. Each run uses a distinct copy of the PDF so no
+cached Document is reused.
+
+Usage:
+    python scripts/bench_upload_extraction.py --pages 50 --think 0 1 3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_document import resume_pdf  # noqa: E402
+from utils.pdf_processor import PDF_SANDBOX, count_pdf_pages, get_extraction_pool, load_document  # noqa: E402
+from utils.upload_extraction import start_extraction  # noqa: E402
+
+
+def variant(pdf_bytes, run):
+    # Trailing comments keep the PDF valid but change its content hash
+    return pdf_bytes + f"\n% run {run}\n".encode()
+
+
+def synchronous(pdf_bytes, think):
+    time.sleep(think)
+    start = time.perf_counter()
+    count_pdf_pages(pdf_bytes)
+    document = load_document(pdf_bytes)
+    _ = document.content_hash, document.text
+    return time.perf_counter() - start
+
+
+def background(pdf_bytes, think):
+    job = start_extraction(pdf_bytes)
+    time.sleep(think)
+    start = time.perf_counter()
+    job.future.result()
+    return time.perf_counter() - start, job
+
+
+def main(args):
+    if PDF_SANDBOX:
+        get_extraction_pool()  # spawn the workers before timing
+    pdf_bytes = resume_pdf(args.pages)
+    synchronous(variant(pdf_bytes, 0), 0)  # import the engine before timing
+    print(f"{args.pages}-page resume, {len(pdf_bytes) / 1024:.0f} KB, sandbox: {PDF_SANDBOX}")
+    print(f"{'think':>6} {'synchronous wait':>17} {'background wait':>16}")
+    run = 0
+    for think in args.think:
+        run += 1
+        sync_wait = synchronous(variant(pdf_bytes, run), think)
+        run += 1
+        background_wait, job = background(variant(pdf_bytes, run), think)
+        print(f"{think:5.1f}s {sync_wait * 1000:15.0f} ms {background_wait * 1000:14.0f} ms")
+    print(f"last background job: {job.stage}, {job.pages_done}/{job.pages_total} pages reported as progress")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--think", type=float, nargs="+", default=[0, 1, 3],
+                        help="Seconds between upload and opening an analysis")
+    main(parser.parse_args())
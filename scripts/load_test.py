@@ -0,0 +1,113 @@
+"""
+API Load Test
+Drives the headless API against an offline model stub and reports requests/second
+
+Usage:
+    python scripts/load_test.py --requests 2000 --concurrency 64 --latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import create_app  # noqa: E402
+
+
+STUB_REPORT = """
+## 📊 Overall Match Score
+Overall Match Score: 72%
+- Keyword Match: 70%
+- Skills Match: 75%
+"""
+
+RESUME_TEXT = "Senior Python developer with 6 years of experience in Django, AWS and PostgreSQL. " * 20
+JOB_DESCRIPTION = "We are hiring a backend engineer with Python, Django, AWS and Kubernetes experience. " * 5
+
+
+def make_stub(latency_ms):
+    """Return an offline generate function that sleeps like a model call"""
+    def generate(prompt, analysis_type=None):
+        time.sleep(latency_ms / 1000)
+        return STUB_REPORT
+    return generate
+
+
+async def run_load(url, total, concurrency, batch_size):
+    """Send requests with bounded concurrency and collect status codes and latencies"""
+    statuses = {}
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    if batch_size > 1:
+        endpoint = f"{url}/v1/batch"
+        body = {
+            "job_description": JOB_DESCRIPTION,
+            "requests": [{"analysis": "ats", "resume_text": RESUME_TEXT}] * batch_size,
+        }
+    else:
+        endpoint = f"{url}/v1/ats-match"
+        body = {"resume_text": RESUME_TEXT, "job_description": JOB_DESCRIPTION}
+
+    async with aiohttp.ClientSession() as session:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.post(endpoint, json=body) as resp:
+                    await resp.read()
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return statuses, sorted(latencies), elapsed
+
+
+async def main(args):
+    app = create_app(
+        generate=make_stub(args.latency_ms),
+        ready_check=lambda: True,
+        queue_size=args.queue_size,
+        workers=args.workers
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    try:
+        statuses, latencies, elapsed = await run_load(
+            f"http://127.0.0.1:{args.port}", args.requests, args.concurrency, args.batch_size
+        )
+    finally:
+        await runner.cleanup()
+
+    ok = statuses.get(200, 0)
+    print(f"requests:     {args.requests} (batch size {args.batch_size})")
+    print(f"elapsed:      {elapsed:.2f}s")
+    print(f"throughput:   {args.requests / elapsed:.1f} req/s, "
+          f"{ok * args.batch_size / elapsed:.1f} analyses/s")
+    print(f"statuses:     {dict(sorted(statuses.items()))}")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"latency:      p50={p50 * 1000:.1f}ms p99={p99 * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--queue-size", type=int, default=128)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+"""
+Visualization Soak Test
+Renders charts many times and checks that process memory stays flat
+
+Inputs are drawn from a pool larger than the chart caches, so the run mixes
+cache hits with real renders and evictions. Every --sample renders the live
+Python heap (tracemalloc) and RSS are recorded; after warm-up the heap should
+stay flat. RSS is reported too but wobbles by a few MB as the allocator
+reuses the large word cloud buffers. --legacy N first renders N word clouds
+the old way (pyplot figures that are never closed) for contrast.
+
+Usage:
+    python scripts/soak_visualizations.py --renders 10000 --pool 400
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "python java sql docker kubernetes aws azure react node typescript spark kafka airflow "
+    "terraform linux git tensorflow pytorch pandas numpy tableau excel agile scrum leadership "
+    "communication mentoring analytics testing security networking golang rust graphql redis"
+).split()
+
+
+def rss_mb():
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_inputs(pool, seed=7):
+    """Pool of distinct argument sets for each chart builder"""
+    rng = random.Random(seed)
+    inputs = []
+    for i in range(pool):
+        skills = rng.sample(WORDS, 6)
+        inputs.append({
+            "gauge": (i % 101,),
+            "bars": ({s: rng.randint(0, 100) for s in skills},),
+            "radar": ({s: rng.randint(0, 10) for s in skills},),
+            "table": ([rng.randint(0, 10) for _ in skills], [rng.randint(0, 10) for _ in skills], skills),
+            "wordcloud": (" ".join(rng.choices(WORDS, k=80)),),
+        })
+    return inputs
+
+
+def legacy_wordcloud(text):
+    """The previous implementation: a pyplot figure that is never closed"""
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(width=800, height=400, background_color="white", max_words=50).generate(text)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.imshow(wordcloud, interpolation="bilinear")
+    ax.axis("off")
+    return fig
+
+
+def main(args):
+    import plotly.io as pio
+    from utils import visualizations as viz
+
+    builders = {
+        "gauge": viz.create_match_gauge,
+        "bars": viz.create_category_bars,
+        "radar": viz.create_skills_radar,
+        "table": viz.create_comparison_table,
+        "wordcloud": viz.create_wordcloud,
+    }
+    inputs = make_inputs(args.pool)
+    rng = random.Random(11)
+
+    if args.legacy:
+        import matplotlib
+        matplotlib.use("Agg")
+        before = rss_mb()
+        for i in range(args.legacy):
+            legacy_wordcloud(inputs[i % len(inputs)]["wordcloud"][0])
+        gc.collect()
+        print(f"legacy pyplot word clouds: {args.legacy} renders, RSS {before:.0f} -> {rss_mb():.0f} MB")
+
+    samples = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(1, args.renders + 1):
+        name = rng.choice(list(builders))
+        # Word clouds are slow to render; draw them from a smaller pool so the run stays short
+        pool = inputs[:args.wordcloud_pool] if name == "wordcloud" else inputs
+        result = builders[name](*rng.choice(pool)[name])
+        if name != "wordcloud":
+            # Serialize like st.plotly_chart does on every rerun
+            pio.to_json(result.to_dict(), validate=False)
+        if i % args.sample == 0:
+            gc.collect()
+            samples.append((i, tracemalloc.get_traced_memory()[0] / 1024 / 1024, rss_mb()))
+    elapsed = time.perf_counter() - start
+
+    print(f"renders: {args.renders} in {elapsed:.1f}s, input pool {args.pool} "
+          f"(word clouds {args.wordcloud_pool}), cache sizes {viz.FIGURE_CACHE_SIZE}/{viz.WORDCLOUD_CACHE_SIZE}")
+    for i, heap, rss in samples:
+        print(f"  after {i:6d} renders: Python heap {heap:6.1f} MB, RSS {rss:7.1f} MB")
+    warm = [heap for i, heap, rss in samples if i >= args.renders // 4]
+    growth = max(warm) - min(warm)
+    print(f"heap spread after warm-up: {growth:.1f} MB ({'flat' if growth <= args.tolerance_mb else 'growing'})")
+    return 0 if growth <= args.tolerance_mb else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--renders", type=int, default=10000)
+    parser.add_argument("--pool", type=int, default=400)
+    parser.add_argument("--wordcloud-pool", type=int, default=64)
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--tolerance-mb", type=float, default=2.0)
+    parser.add_argument("--legacy", type=int, default=0)
+    sys.exit(main(parser.parse_args()))
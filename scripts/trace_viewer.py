@@ -0,0 +1,151 @@
+"""
+Trace Viewer
+Prints the slowest traces from the trace file as indented span trees
+
+Reads the OTLP/JSON lines written with TRACE_EXPORT=file (including the
+rotated .1 file), groups spans by trace and shows where the time of the
+slowest page runs or API requests went: PDF parsing, prompt building,
+queue wait, model attempts and chart creation.
+
+Usage:
+    python scripts/trace_viewer.py --limit 5
+    python scripts/trace_viewer.py --name api.ats --resume-hash 3f2a...
+    python scripts/trace_viewer.py --session 6c1e... --min-ms 500
+"""
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tracing import TRACE_FILE  # noqa: E402
+
+
+# Attributes shown next to each span; the rest are available in the file
+SHOWN_ATTRIBUTES = (
+    "page", "analysis", "model", "attempt", "attempts", "hit", "source", "pages", "ocr_pages", "engine",
+    "queue_wait_s", "retry_s", "connect_latency", "ttfb", "stream_latency",
+    "prompt_tokens", "output_tokens", "error",
+)
+TRACE_ATTRIBUTES = ("session_id", "resume_hash", "resume1_hash", "resume2_hash", "jd_hash")
+
+
+def _value(value):
+    for kind in ("stringValue", "boolValue", "doubleValue"):
+        if kind in value:
+            return value[kind]
+    if "intValue" in value:
+        return int(value["intValue"])
+    return None
+
+
+def load_spans(paths):
+    """Spans from OTLP/JSON lines files, as dicts with decoded attributes"""
+    spans = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                for resource in request.get("resourceSpans", []):
+                    for scope in resource.get("scopeSpans", []):
+                        for item in scope.get("spans", []):
+                            item["attributes"] = {a["key"]: _value(a["value"]) for a in item.get("attributes", [])}
+                            item["start"] = int(item["startTimeUnixNano"])
+                            item["duration"] = (int(item["endTimeUnixNano"]) - item["start"]) / 1e9
+                            spans.append(item)
+    return spans
+
+
+def group_traces(spans):
+    """Traces as dicts with root, spans and duration; traces without a root span are skipped"""
+    by_trace = defaultdict(list)
+    for item in spans:
+        by_trace[item["traceId"]].append(item)
+    traces = []
+    for trace_id, items in by_trace.items():
+        roots = [item for item in items if "parentSpanId" not in item]
+        if roots:
+            traces.append({"id": trace_id, "root": roots[0], "spans": items, "duration": roots[0]["duration"]})
+    return traces
+
+
+def _matches(trace, args):
+    root = trace["root"]["attributes"]
+    if args.name and trace["root"]["name"] != args.name:
+        return False
+    if args.session and not str(root.get("session_id", "")).startswith(args.session):
+        return False
+    if args.resume_hash and not any(
+        str(root.get(key, "")).startswith(args.resume_hash)
+        for key in ("resume_hash", "resume1_hash", "resume2_hash")
+    ):
+        return False
+    return trace["duration"] * 1000 >= args.min_ms
+
+
+def _format_attributes(attributes, keys):
+    shown = []
+    for key in keys:
+        value = attributes.get(key)
+        if value is None:
+            continue
+        if isinstance(value, float):
+            value = f"{value * 1000:.0f}ms" if key.endswith(("_s", "latency", "ttfb")) else f"{value:g}"
+        elif key.endswith("_hash") or key == "session_id":
+            value = str(value)[:12]
+        shown.append(f"{key}={value}")
+    return " ".join(shown)
+
+
+def print_trace(trace):
+    children = defaultdict(list)
+    for item in trace["spans"]:
+        children[item.get("parentSpanId")].append(item)
+
+    root = trace["root"]
+    print(f"{trace['duration'] * 1000:9.1f} ms  trace {trace['id'][:16]}  "
+          f"{_format_attributes(root['attributes'], TRACE_ATTRIBUTES)}")
+
+    def walk(item, depth):
+        status = " ERROR " + item["status"].get("message", "") if item.get("status", {}).get("code") == 2 else ""
+        offset = (item["start"] - root["start"]) / 1e6
+        print(f"  {item['duration'] * 1000:9.1f} ms  +{offset:7.1f}  {'  ' * depth}{item['name']}  "
+              f"{_format_attributes(item['attributes'], SHOWN_ATTRIBUTES)}{status}")
+        for child in sorted(children[item["spanId"]], key=lambda c: c["start"]):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    print()
+
+
+def main(args):
+    paths = [args.file + ".1", args.file]
+    traces = [trace for trace in group_traces(load_spans(paths)) if _matches(trace, args)]
+    if not traces:
+        sys.exit(f"No matching traces in {args.file}")
+    traces.sort(key=lambda trace: trace["duration"], reverse=True)
+
+    durations = sorted(trace["duration"] for trace in traces)
+    p50 = durations[len(durations) // 2]
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"{len(traces)} traces, p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms; slowest {args.limit}:\n")
+    for trace in traces[:args.limit]:
+        print_trace(trace)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--file", default=TRACE_FILE, help="Trace file (default: TRACE_FILE)")
+    parser.add_argument("--limit", type=int, default=10, help="Number of traces to show")
+    parser.add_argument("--name", help="Only traces whose root span has this name, e.g. app.run or api.ats")
+    parser.add_argument("--session", help="Only traces of this Streamlit session id (prefix)")
+    parser.add_argument("--resume-hash", help="Only traces for this resume hash (prefix)")
+    parser.add_argument("--min-ms", type=float, default=0, help="Only traces at least this slow")
+    main(parser.parse_args())
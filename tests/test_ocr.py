@@ -0,0 +1,43 @@
+"""
+OCR Pool Tests
+Starts the real OCR process pool to check its workers initialize
+"""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr import create_ocr_executor, fill_missing_pages, ocr_available  # noqa: E402
+
+resource = pytest.importorskip("resource")
+
+
+def test_ocr_workers_start_with_memory_limit():
+    executor = create_ocr_executor(workers=1, memory_mb=512)
+    try:
+        # A failing initializer breaks the pool, so this raises BrokenProcessPool
+        soft, hard = executor.submit(resource.getrlimit, resource.RLIMIT_AS).result(timeout=60)
+    finally:
+        executor.shutdown(cancel_futures=True)
+    assert soft == hard == 512 * 1024 * 1024
+
+
+@pytest.mark.skipif(not ocr_available(), reason="Tesseract or pypdfium2 not installed")
+def test_fill_missing_pages_runs_in_pool():
+    pypdfium2 = pytest.importorskip("pypdfium2")
+    pdf = pypdfium2.PdfDocument.new()
+    pdf.new_page(612, 792)
+    buffer = io.BytesIO()
+    pdf.save(buffer)
+    pdf.close()
+
+    executor = create_ocr_executor(workers=1)
+    try:
+        pages, ocr_count, failed = fill_missing_pages(buffer.getvalue(), [""], executor)
+    finally:
+        executor.shutdown(cancel_futures=True)
+    # A blank page OCRs to no text, but must not fail
+    assert (len(pages), ocr_count, failed) == (1, 0, 0)
@@ -0,0 +1,359 @@
+"""
+Tiered Cache
+In-process LRU in front of an optional shared tier (Redis or a SQLite file) for multi-replica deployments
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+
+
+# Shared tier: "none" (per-process only), "sqlite" or "redis"
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "none").lower()
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_SQLITE_PATH = os.getenv(
+    "CACHE_SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".shared_cache.db")
+)
+# How long a replica may hold a key's compute lock before others stop waiting
+CACHE_LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT", "120"))
+CACHE_POLL_INTERVAL = 0.05
+# Bump when the format of cached values changes
+CACHE_KEY_VERSION = "v1"
+
+logger = logging.getLogger(__name__)
+
+# In-flight result when the computing thread was interrupted rather than failed
+_INTERRUPTED = object()
+
+
+def make_key(namespace, *parts):
+    """
+    Stable cache key for a namespace and key parts
+
+    Bytes are hashed as-is; everything else as canonical JSON. Each part is
+    length-prefixed so different splits of the same data never collide.
+
+    Args:
+        namespace: Cache namespace, e.g. "pdf" or "llm"
+        *parts: Key components (bytes, str, numbers, None, lists, dicts)
+
+    Returns:
+        str: "resumeinsight:<version>:<namespace>:<sha256>"
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else json.dumps(part, sort_keys=True, default=str).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return f"resumeinsight:{CACHE_KEY_VERSION}:{namespace}:{digest.hexdigest()}"
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl if ttl else None)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class SQLiteBackend:
+    """Shared tier in a SQLite file that every replica on the host (or a shared volume) can open"""
+
+    def __init__(self, path=CACHE_SQLITE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self._connect().executescript(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL);"
+            "CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache (expires_at);"
+        )
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, time.time() + ttl if ttl else None)
+        )
+
+    def add(self, key, value, ttl):
+        """Set only if absent (or expired); returns True if this call set it"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, time.time()))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key, value=None):
+        """Delete a key, optionally only if it still holds value"""
+        if value is None:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+        else:
+            self._connect().execute("DELETE FROM cache WHERE key = ? AND value = ?", (key, value))
+
+    def purge_expired(self):
+        """Drop expired entries"""
+        self._connect().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+
+class RedisBackend:
+    """Shared tier on a Redis-compatible server (Redis, Valkey, KeyDB, ...)"""
+
+    def __init__(self, url=CACHE_URL):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, nx=True, px=int(ttl * 1000)))
+
+    def delete(self, key, value=None):
+        if value is None:
+            self.client.delete(key)
+            return
+        # Release a lock only if we still own it
+        self.client.eval(
+            "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0",
+            1, key, value
+        )
+
+
+class TieredCache:
+    """
+    Local LRU in front of an optional shared tier, with stampede protection
+
+    On a miss only one caller computes a key: threads in this process wait on
+    that key's in-flight Future and get its result, and other replicas wait on
+    a lock entry in the shared tier until the value appears there. Shared-tier failures are logged and treated
+    as misses so the app keeps working without it.
+    """
+
+    def __init__(self, namespace, ttl=None, local_size=256, shared=None, lock_timeout=CACHE_LOCK_TIMEOUT):
+        """
+        Args:
+            namespace: Key namespace
+            ttl: Default time-to-live in seconds (None = no expiry)
+            local_size: Entries kept in this process (0 disables the local tier)
+            shared: SQLiteBackend, RedisBackend or None
+            lock_timeout: Seconds before a held compute lock is considered abandoned
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LocalLRU(local_size)
+        self.shared = shared
+        self.lock_timeout = lock_timeout
+        # key -> Future of the computation in progress; the lock is only held to look up or register one
+        self.inflight = {}
+        self.inflight_lock = threading.Lock()
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "waits": 0}
+
+    def _shared_call(self, method, *args):
+        if self.shared is None:
+            return None
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            logger.warning("Shared cache %s failed: %s", method, e)
+            return None
+
+    def _shared_get(self, key):
+        raw = self._shared_call("get", key)
+        return None if raw is None else json.loads(raw)
+
+    def get(self, *parts):
+        """Cached value for key parts, or None"""
+        key = make_key(self.namespace, *parts)
+        value = self.local.get(key)
+        if value is None:
+            value = self._shared_get(key)
+            if value is not None:
+                self.local.set(key, value, self.ttl)
+        return value
+
+    def set(self, parts, value, ttl=None):
+        """Store a JSON-serializable value in both tiers"""
+        key = make_key(self.namespace, *parts)
+        ttl = ttl or self.ttl
+        self.local.set(key, value, ttl)
+        self._shared_call("set", key, json.dumps(value), ttl)
+
+    def get_or_compute(self, parts, compute, ttl=None, should_cache=None):
+        """
+        Return the cached value or compute it once across threads and replicas
+
+        Args:
+            parts: Tuple of key parts
+            compute: Zero-argument function producing a JSON-serializable value
+            ttl: Time-to-live override in seconds
+            should_cache: Optional predicate; values failing it are returned but not stored
+
+        Returns:
+            Cached or freshly computed value
+
+        Threads that ask for a key while another thread computes it get that
+        thread's value (or exception), even one should_cache rejected.
+        """
+        key = make_key(self.namespace, *parts)
+        ttl = ttl or self.ttl
+        while True:
+            value = self.local.get(key)
+            if value is not None:
+                self.stats["local_hits"] += 1
+                return value
+            with self.inflight_lock:
+                future = self.inflight.get(key)
+                if future is None:
+                    future = self.inflight[key] = Future()
+                    break
+            self.stats["waits"] += 1
+            value = future.result()
+            if value is not _INTERRUPTED:
+                return value
+            # The computing thread was interrupted (e.g. a Streamlit rerun): take over
+
+        try:
+            value = self._load_or_compute(key, compute, ttl, should_cache)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.set_result(_INTERRUPTED)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self.inflight_lock:
+                del self.inflight[key]
+        return value
+
+    def _load_or_compute(self, key, compute, ttl, should_cache):
+        """Shared-tier lookup, then compute under the shared-tier lock; called by one thread per key"""
+        value = self._shared_get(key)
+        if value is not None:
+            self.stats["shared_hits"] += 1
+            self.local.set(key, value, ttl)
+            return value
+
+        lock_key, token = key + ":lock", uuid.uuid4().hex
+        owns_lock = self._shared_call("add", lock_key, token, self.lock_timeout)
+        if self.shared is not None and owns_lock is False:
+            value = self._wait_for(key)
+            if value is not None:
+                self.local.set(key, value, ttl)
+                return value
+
+        self.stats["misses"] += 1
+        try:
+            value = compute()
+            if should_cache is None or should_cache(value):
+                self.local.set(key, value, ttl)
+                self._shared_call("set", key, json.dumps(value), ttl)
+        finally:
+            if owns_lock:
+                self._shared_call("delete", lock_key, token)
+        return value
+
+    def _wait_for(self, key):
+        """Poll the shared tier while another replica computes the key"""
+        self.stats["waits"] += 1
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            value = self._shared_get(key)
+            if value is not None:
+                return value
+            if not self._shared_call("get", key + ":lock"):
+                # The owner finished without caching (or crashed); compute ourselves
+                return self._shared_get(key)
+            time.sleep(CACHE_POLL_INTERVAL)
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_shared_backend():
+    """
+    Shared tier configured by CACHE_BACKEND
+
+    Returns:
+        SQLiteBackend, RedisBackend or None
+    """
+    try:
+        if CACHE_BACKEND == "sqlite":
+            return SQLiteBackend()
+        if CACHE_BACKEND == "redis":
+            return RedisBackend()
+    except Exception as e:
+        logger.warning("Shared cache unavailable, using per-process caching only: %s", e)
+    return None
+
+
+@lru_cache(maxsize=None)
+def get_cache(namespace, ttl=None, local_size=256):
+    """
+    Process-wide tiered cache for a namespace
+
+    Args:
+        namespace: Key namespace, e.g. "pdf", "llm" or "sections"
+        ttl: Default time-to-live in seconds
+        local_size: Entries kept in the in-process tier
+
+    Returns:
+        TieredCache: Shared instance for these settings
+    """
+    return TieredCache(namespace, ttl=ttl, local_size=local_size, shared=get_shared_backend())
@@ -0,0 +1,178 @@
+"""
+Chat Memory Manager
+Keeps recent chat turns verbatim and folds older turns into a running summary
+"""
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.prompts import get_chat_summary_prompt
+from utils.tracing import current_span, span, use_span
+
+
+CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "4"))
+CHAT_TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", "1500"))
+CHAT_HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", "200"))
+CHAT_RENDER_PAGE = int(os.getenv("CHAT_RENDER_PAGE", "10"))
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+@st.cache_resource
+def _get_executor():
+    """Process-wide pool for background summarization"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+
+def _summarize_in_background(summarize, prompt, trigger_trace_id):
+    """
+    Pool task: run the summary call as its own trace
+
+    The rerun that started it has usually finished by now, so the call gets
+    a new root span that names the triggering trace instead of a parent.
+    """
+    with use_span(None), span("chat.summary", trigger_trace_id=trigger_trace_id):
+        return summarize(prompt)
+
+
+def _format_turns(messages):
+    """Render messages as 'User: ...' / 'Assistant: ...' lines"""
+    return "\n".join(
+        f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in messages
+    )
+
+
+class ChatMemory:
+    """
+    Bounded conversation memory for the chat assistant
+
+    The last `recent_turns` user/assistant turns are kept verbatim. Older
+    turns are folded into a summary by a background model call, and the
+    context sent to the model never exceeds `token_budget`.
+    """
+
+    def __init__(self, summarize, recent_turns=CHAT_RECENT_TURNS,
+                 token_budget=CHAT_TOKEN_BUDGET, history_limit=CHAT_HISTORY_LIMIT):
+        """
+        Args:
+            summarize: Function mapping a prompt to a response string
+            recent_turns: Turns kept verbatim in the model context
+            token_budget: Maximum estimated tokens of summary plus recent turns
+            history_limit: Maximum messages kept for display
+        """
+        self.summarize = summarize
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.history_limit = history_limit
+        self.messages = []
+        self.summary = ""
+        self.folded = 0
+        self._pending = None
+
+    def __getstate__(self):
+        # For spilling idle sessions: a summary still being produced is dropped
+        # and redone after the next message
+        self._collect()
+        state = self.__dict__.copy()
+        state["_pending"] = None
+        return state
+
+    def add(self, role, content):
+        """Append a message and fold older turns in the background if needed"""
+        self.messages.append({"role": role, "content": content})
+        self._collect()
+        self._trim_history()
+        self._maybe_summarize()
+
+    def clear(self):
+        """Forget the whole conversation"""
+        self.messages = []
+        self.summary = ""
+        self.folded = 0
+        self._pending = None
+
+    def _trim_history(self):
+        """Drop the oldest already-summarized messages beyond the history limit"""
+        excess = min(len(self.messages) - self.history_limit, self.folded)
+        if excess > 0:
+            del self.messages[:excess]
+            self.folded -= excess
+            if self._pending:
+                future, upto = self._pending
+                self._pending = (future, upto - excess)
+
+    def _collect(self):
+        """Apply a finished background summary"""
+        if not self._pending:
+            return
+        future, upto = self._pending
+        if not future.done():
+            return
+        self._pending = None
+        try:
+            summary = future.result()
+        except Exception:
+            return
+        if summary and not summary.startswith("Error"):
+            max_chars = self.token_budget // 3 * 4
+            self.summary = summary.strip()[:max_chars]
+            self.folded = max(self.folded, upto)
+
+    def _maybe_summarize(self):
+        """Start folding turns older than the recent window into the summary"""
+        if self._pending:
+            return
+        older_end = len(self.messages) - 2 * self.recent_turns
+        if older_end <= self.folded:
+            return
+        prompt = get_chat_summary_prompt(self.summary, _format_turns(self.messages[self.folded:older_end]))
+        # A copy of this context keeps the call in the session's scheduler flow
+        active = current_span()
+        future = _get_executor().submit(
+            contextvars.copy_context().run, _summarize_in_background, self.summarize, prompt,
+            active.trace_id if active else None
+        )
+        self._pending = (future, older_end)
+
+    def context(self, exclude_last=False):
+        """
+        Conversation context for the next model call, within the token budget
+
+        Turns whose summary is still being produced are included verbatim
+        while they fit; the oldest turns are dropped first when over budget.
+
+        Args:
+            exclude_last: Leave out the newest message (the question being asked)
+
+        Returns:
+            str: Summary and recent turns, or "" if there is no history
+        """
+        self._collect()
+        end = len(self.messages) - 1 if exclude_last else len(self.messages)
+        turns = self.messages[self.folded:end]
+
+        budget = self.token_budget - (estimate_tokens(self.summary) if self.summary else 0)
+        kept = []
+        for message in reversed(turns):
+            cost = estimate_tokens(message["content"]) + 3
+            if cost > budget:
+                break
+            kept.append(message)
+            budget -= cost
+        kept.reverse()
+
+        parts = []
+        if self.summary:
+            parts.append(f"Conversation summary: {self.summary}")
+        if kept:
+            parts.append(f"Recent conversation:\n{_format_turns(kept)}")
+        return "\n\n".join(parts)
+
+    def visible(self, count):
+        """The newest `count` messages for rendering"""
+        return self.messages[-count:] if count else []
@@ -0,0 +1,223 @@
+"""
+Near-Duplicate Resume Detection
+MinHash signatures and an LSH index to spot re-submitted or templated resumes
+"""
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+DEDUP_MAX_RESUMES = int(os.getenv("DEDUP_MAX_RESUMES", "5000"))
+DEDUP_REUSE = os.getenv("DEDUP_REUSE", "false").lower() in ("1", "true", "yes")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_for_dedup(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def text_key(text):
+    """Content key of the normalized text"""
+    return hashlib.sha256(normalize_for_dedup(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text, size=DEDUP_SHINGLE_SIZE):
+    """
+    Hashed word shingles of a normalized text
+
+    Args:
+        text: Normalized text
+        size: Words per shingle
+
+    Returns:
+        np.ndarray: Unique 32-bit shingle hashes
+    """
+    words = text.split()
+    if len(words) < size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64))
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures with vectorized universal hashing"""
+
+    __slots__ = ("num_perm", "a", "b")
+
+    def __init__(self, num_perm=DEDUP_NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        """
+        MinHash signature of a text
+
+        Args:
+            text: Raw or normalized text
+
+        Returns:
+            np.ndarray: uint32 signature of length num_perm
+        """
+        hashes = shingles(normalize_for_dedup(text))
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        permuted = ((hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimate_jaccard(sig1, sig2):
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(sig1 == sig2))
+
+
+def lsh_params(threshold, num_perm):
+    """
+    Pick (bands, rows) so the LSH S-curve crosses near the threshold
+
+    Returns:
+        tuple: (bands, rows) with bands * rows <= num_perm
+    """
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHashLSH:
+    """Banded LSH index over MinHash signatures"""
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = {}
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def insert(self, key, signature):
+        """Add or replace a signature"""
+        if key in self.signatures:
+            self.remove(key)
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, key):
+        """Drop a signature from the index"""
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in self._band_keys(signature):
+            bucket = self.buckets[band].get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band][band_key]
+
+    def query(self, signature):
+        """
+        Indexed entries whose estimated Jaccard similarity reaches the threshold
+
+        Returns:
+            list: (key, similarity) tuples, most similar first
+        """
+        candidates = set()
+        for band, band_key in self._band_keys(signature):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        scored = [(key, estimate_jaccard(signature, self.signatures[key])) for key in candidates]
+        return sorted(
+            [(key, sim) for key, sim in scored if sim >= self.threshold],
+            key=lambda item: (-item[1], item[0])
+        )
+
+
+class ResumeDeduplicator:
+    """
+    Process-wide registry of analyzed resumes and their analysis results
+
+    Analyses are stored per (resume key, analysis type, job description hash)
+    so a near-duplicate resume can reuse them instead of calling the model.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=DEDUP_NUM_PERM, max_resumes=DEDUP_MAX_RESUMES):
+        self.hasher = MinHasher(num_perm)
+        self.index = MinHashLSH(threshold, num_perm)
+        self.max_resumes = max_resumes
+        self.analyses = OrderedDict()
+        self.lock = threading.Lock()
+
+    def register(self, text):
+        """
+        Index a resume text
+
+        Returns:
+            str: Resume key
+        """
+        key = text_key(text)
+        signature = self.hasher.signature(text)
+        with self.lock:
+            self.index.insert(key, signature)
+            self.analyses.setdefault(key, {})
+            self.analyses.move_to_end(key)
+            while len(self.analyses) > self.max_resumes:
+                old_key, _ = self.analyses.popitem(last=False)
+                self.index.remove(old_key)
+        return key
+
+    def find_near_duplicate(self, text):
+        """
+        Most similar previously analyzed resume, excluding the identical text
+
+        Returns:
+            tuple: (resume key, similarity) or None
+        """
+        key = text_key(text)
+        signature = self.hasher.signature(text)
+        with self.lock:
+            for other_key, similarity in self.index.query(signature):
+                if other_key != key and self.analyses.get(other_key):
+                    return other_key, similarity
+        return None
+
+    def record_analysis(self, key, analysis, jd_hash, response):
+        """Store an analysis result for a registered resume"""
+        with self.lock:
+            if key in self.analyses:
+                self.analyses[key][(analysis, jd_hash)] = response
+
+    def get_analysis(self, key, analysis, jd_hash):
+        """Stored analysis result, or None"""
+        with self.lock:
+            return self.analyses.get(key, {}).get((analysis, jd_hash))
+
+
+@lru_cache(maxsize=1)
+def get_resume_deduplicator():
+    """
+    Shared deduplicator for this process
+
+    Returns:
+        ResumeDeduplicator: Process-wide instance
+    """
+    return ResumeDeduplicator()
@@ -0,0 +1,139 @@
+"""
+Resume Document
+Compact, lazily extracted page-based representation of an extracted PDF
+"""
+import hashlib
+import threading
+from array import array
+from bisect import bisect_right
+
+
+class Document:
+    """
+    Extracted document held as page texts plus page start offsets
+
+    Pages are extracted on first access through the loader. The joined text
+    and the content hash are computed at most once, so prompt builders
+    (``f"{document}"``), ``len(document)`` and cache keys never re-join or
+    re-hash the pages. Instances are immutable once loaded and safe to share
+    between sessions.
+    """
+
+    __slots__ = ("_loader", "_lock", "_pages", "_offsets", "_text", "_hash", "page_count", "ocr_pages")
+
+    def __init__(self, pages=None, page_count=None, loader=None, ocr_pages=0):
+        """
+        Args:
+            pages: Page texts, or None to extract lazily with loader
+            page_count: Total pages in the source PDF (may exceed len(pages))
+            loader: Callable returning (pages, page_count, ocr_pages)
+            ocr_pages: Number of pages whose text came from OCR
+        """
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._pages = None
+        self._offsets = None
+        self._text = None
+        self._hash = None
+        self.page_count = page_count
+        self.ocr_pages = ocr_pages
+        if pages is not None:
+            self._set_pages(pages, page_count, ocr_pages)
+
+    @classmethod
+    def from_text(cls, text):
+        """Single-page document wrapping already extracted text"""
+        return cls([text], 1)
+
+    def _set_pages(self, pages, page_count, ocr_pages):
+        pages = list(pages)
+        if pages:
+            # Match the stripped text the extractor used to return
+            pages[0] = pages[0].lstrip()
+            pages[-1] = pages[-1].rstrip()
+        offsets = array("L", [0])
+        for page in pages:
+            offsets.append(offsets[-1] + len(page))
+        self._pages = tuple(pages)
+        self._offsets = offsets
+        self.page_count = len(pages) if page_count is None else page_count
+        self.ocr_pages = ocr_pages
+        self._loader = None
+
+    def _load(self):
+        if self._pages is None:
+            with self._lock:
+                if self._pages is None:
+                    self._set_pages(*self._loader())
+        return self._pages
+
+    @property
+    def loaded(self):
+        """Whether the pages have been extracted"""
+        return self._pages is not None
+
+    @property
+    def pages(self):
+        """Tuple of page texts"""
+        return self._load()
+
+    @property
+    def text(self):
+        """Full text, joined once and reused"""
+        if self._text is None:
+            self._text = "".join(self._load())
+        return self._text
+
+    @property
+    def content_hash(self):
+        """SHA-256 of the page texts, computed once without joining them"""
+        if self._hash is None:
+            digest = hashlib.sha256()
+            for page in self._load():
+                digest.update(page.encode("utf-8", errors="ignore"))
+            self._hash = digest.hexdigest()
+        return self._hash
+
+    @property
+    def truncated(self):
+        """Whether pages beyond the extraction limit were skipped"""
+        return self.page_count > len(self._load())
+
+    def page_span(self, index):
+        """(start, end) character offsets of a page in the full text"""
+        self._load()
+        return self._offsets[index], self._offsets[index + 1]
+
+    def page_at(self, offset):
+        """Zero-based page number containing a character offset"""
+        self._load()
+        return min(bisect_right(self._offsets, offset) - 1, len(self._pages) - 1)
+
+    def has_text(self):
+        """Whether any page contains non-whitespace text"""
+        return any(page.strip() for page in self._load())
+
+    def __len__(self):
+        self._load()
+        return self._offsets[-1]
+
+    def __str__(self):
+        return self.text
+
+    def __format__(self, format_spec):
+        return format(self.text, format_spec)
+
+    def __eq__(self, other):
+        return isinstance(other, Document) and self.content_hash == other.content_hash
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+    def __reduce__(self):
+        # Pickle (e.g. for st.cache_data) as loaded pages only
+        return Document, (self.pages, self.page_count, None, self.ocr_pages)
+
+    def __repr__(self):
+        if not self.loaded:
+            return "Document(<not loaded>)"
+        return f"Document(pages={len(self._pages)}, chars={self._offsets[-1]}, hash={self.content_hash[:12]})"
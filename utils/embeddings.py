@@ -0,0 +1,328 @@
+"""
+Local Embeddings
+Hashed character n-gram embeddings, a float32 vector index and requirement-by-requirement match evidence
+"""
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+from utils.cache import LocalLRU
+from utils.local_analysis import NICE_TO_HAVE_PATTERN, normalize_text, split_requirements, tokenize
+from utils.sections import content_hash, split_sections
+from utils.skill_matcher import get_skill_matcher
+from utils.tracing import traced
+
+
+EMBED_DIM = int(os.getenv("EMBED_DIM", "1024"))
+NGRAM_SIZES = (3, 4, 5)
+# Optional (EMBED_DIM, k) float matrix in .npy format applied after hashing, e.g. one
+# learned offline on resume/job pairs; without it the hashed vectors are used directly
+EMBED_PROJECTION_PATH = os.getenv("EMBED_PROJECTION_PATH", "")
+# Cosine similarity at which a resume line counts as evidence for a requirement
+EMBED_MATCH_THRESHOLD = float(os.getenv("EMBED_MATCH_THRESHOLD", "0.25"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "64"))
+# Corpus rows scored per matrix product, bounding memory when searching memory-mapped vectors
+SEARCH_BLOCK_ROWS = 65536
+
+# Weights of the n-gram, word and skill blocks; each block is unit length before weighting,
+# so a shared canonical skill counts as much as heavy spelling overlap
+NGRAM_WEIGHT = 1.0
+WORD_WEIGHT = 1.0
+SKILL_WEIGHT = 1.2
+# Within the skill block, a shared taxonomy category counts for a fraction of a shared skill
+CATEGORY_WEIGHT = 0.3
+_PRIME = np.uint64(1099511628211)
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•▪●◦]|\d+[.)])\s*")
+
+_projection = None
+
+
+def _get_projection():
+    """Projection matrix from EMBED_PROJECTION_PATH, loaded once (None when unset)"""
+    global _projection
+    if _projection is None and EMBED_PROJECTION_PATH:
+        matrix = np.load(EMBED_PROJECTION_PATH).astype(np.float32)
+        if matrix.shape[0] != EMBED_DIM:
+            raise ValueError(f"Projection has {matrix.shape[0]} rows, expected EMBED_DIM={EMBED_DIM}")
+        _projection = matrix
+    return _projection
+
+
+def _word_bucket(feature, dim):
+    """Stable bucket of a word-level feature (crc32, unlike hash(), is not salted per process)"""
+    return zlib.crc32(feature.encode("utf-8")) % dim
+
+
+def _unit_rows(flat, count, dim):
+    """Reshape flat bucket counts to (count, dim) rows of unit length (empty rows stay zero)"""
+    rows = flat.reshape(count, dim)
+    return rows / np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+
+
+@traced("embed.texts")
+def embed(texts, dim=EMBED_DIM):
+    """
+    Embed texts as L2-normalized float32 vectors
+
+    Character 3-5-grams of every text are hashed into dim signed buckets in
+    one vectorized pass over the concatenated bytes. Words and canonical
+    taxonomy skills form two more blocks, so aliases land on the same
+    features ("k8s" and "Kubernetes" both add the Kubernetes skill) and
+    related skills share their category.
+
+    Args:
+        texts: List of strings
+        dim: Number of hash buckets
+
+    Returns:
+        np.ndarray: (len(texts), dim, or the projection's width) float32 C-contiguous array
+    """
+    count = len(texts)
+    if not count:
+        return np.zeros((0, dim), dtype=np.float32)
+    matcher = get_skill_matcher()
+    normalized = [normalize_text(text) for text in texts]
+
+    # Character n-grams: rolling hashes over all texts at once, dropping n-grams that span two texts
+    encoded = [f" {text} ".encode("utf-8") for text in normalized]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=count)
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    rows = np.repeat(np.arange(count, dtype=np.int64), lengths)
+    counts = np.zeros(count * dim, dtype=np.float64)
+    with np.errstate(over="ignore"):
+        for size in NGRAM_SIZES:
+            windows = len(data) - size + 1
+            if windows <= 0:
+                continue
+            hashes = np.full(windows, size, dtype=np.uint64)
+            for offset in range(size):
+                hashes = hashes * _PRIME + data[offset:offset + windows]
+            inside = rows[:windows] == rows[size - 1:size - 1 + windows]
+            hashes = hashes[inside] ^ (hashes[inside] >> np.uint64(29))
+            signs = np.where(hashes >> np.uint64(63), 1.0, -1.0)
+            buckets = (hashes % np.uint64(dim)).astype(np.int64)
+            counts += np.bincount(rows[:windows][inside] * dim + buckets, weights=signs, minlength=count * dim)
+
+    # Words and canonical skills (plus their categories)
+    word_cells, skill_cells, skill_weights = [], [], []
+    for row, text in enumerate(normalized):
+        for token in tokenize(text):
+            word_cells.append(row * dim + _word_bucket(token, dim))
+        for name, entry in matcher.scan(text).items():
+            skill_cells += [row * dim + _word_bucket(f"skill:{name.lower()}", dim),
+                            row * dim + _word_bucket(f"category:{entry['category'].lower()}", dim)]
+            skill_weights += [1.0, CATEGORY_WEIGHT]
+    words = np.bincount(np.array(word_cells, dtype=np.int64), minlength=count * dim)
+    skills = np.bincount(np.array(skill_cells, dtype=np.int64), weights=np.array(skill_weights), minlength=count * dim)
+
+    vectors = (
+        NGRAM_WEIGHT * _unit_rows(np.sign(counts) * np.log1p(np.abs(counts)), count, dim)
+        + WORD_WEIGHT * _unit_rows(np.log1p(words), count, dim)
+        + SKILL_WEIGHT * _unit_rows(skills, count, dim)
+    ).astype(np.float32)
+    projection = _get_projection() if dim == EMBED_DIM else None
+    if projection is not None:
+        vectors = vectors @ projection
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.ascontiguousarray(vectors / np.maximum(norms, 1e-12), dtype=np.float32)
+
+
+class VectorIndex:
+    """
+    Unit vectors in one contiguous float32 matrix, with batched cosine top-k search
+
+    Indexes saved with save() can be opened memory-mapped, so large corpora
+    are paged in by the OS instead of loaded; search() scores them in blocks
+    of SEARCH_BLOCK_ROWS rows.
+    """
+
+    def __init__(self, vectors, items=None):
+        """
+        Args:
+            vectors: (n, dim) float32 array of unit vectors (may be a np.memmap)
+            items: Per-row metadata (JSON-serializable), defaults to row numbers
+        """
+        self.vectors = vectors
+        self.items = list(items) if items is not None else list(range(len(vectors)))
+
+    @classmethod
+    def build(cls, texts, items=None):
+        """Index of embedded texts; items default to the texts themselves"""
+        return cls(embed(texts), items if items is not None else texts)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, queries, k=5):
+        """
+        Top-k rows by cosine similarity for each query
+
+        Args:
+            queries: (q, dim) unit vectors, or a list of texts to embed
+            k: Results per query
+
+        Returns:
+            tuple: (scores, indices) as (q, k) arrays, best first; k is capped at len(self)
+        """
+        if isinstance(queries, list) and queries and isinstance(queries[0], str):
+            queries = embed(queries)
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, len(self))
+        if not len(queries) or not k:
+            return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_indices = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(self), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS])
+            scores = queries @ block.T
+            indices = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            indices = np.concatenate([best_indices, indices], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                indices = np.take_along_axis(indices, keep, axis=1)
+            best_scores, best_indices = scores, indices
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+    def save(self, path):
+        """Write <path>.npy (vectors) and <path>.json (items)"""
+        np.save(path + ".npy", np.ascontiguousarray(self.vectors, dtype=np.float32))
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.items, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open an index written by save(), memory-mapped read-only by default"""
+        vectors = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        with open(path + ".json", encoding="utf-8") as f:
+            items = json.load(f)
+        return cls(vectors, items)
+
+
+def resume_chunks(resume_text, max_chunks=400):
+    """
+    Resume lines worth citing as evidence, tagged with their section
+
+    Short wrapped lines are joined to the previous line of the same section.
+
+    Returns:
+        list: {"section", "text"} dicts
+    """
+    chunks = []
+    for section, text in split_sections(resume_text).items():
+        current = None
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            starts_item = (BULLET_PATTERN.match(line) or current is None
+                           or current["text"].endswith((".", "!", "?", ":")) or len(current["text"]) > 160)
+            if starts_item:
+                current = {"section": section, "text": BULLET_PATTERN.sub("", line)}
+                chunks.append(current)
+            else:
+                current["text"] += " " + line
+    return [chunk for chunk in chunks if len(chunk["text"].split()) >= 2][:max_chunks]
+
+
+def requirement_lines(job_description, profile=None, max_requirements=30):
+    """
+    Individual requirements of a job description
+
+    Bullet lines are used when the posting has them, otherwise its sentences.
+    Required skills from the job profile that no line mentions are added.
+
+    Args:
+        job_description: Job description text
+        profile: Job profile (see utils.jd_profile), optional
+
+    Returns:
+        list: {"text", "kind"} dicts, kind "required" or "nice"
+    """
+    required_text, nice_text = split_requirements(job_description)
+    requirements = []
+    for kind, text in (("required", required_text), ("nice", nice_text)):
+        lines = [BULLET_PATTERN.sub("", line).strip() for line in text.splitlines() if BULLET_PATTERN.match(line)]
+        if not lines:
+            # No bullets: fall back to sentences, skipping fragments too short to be a requirement
+            lines = [s.strip() for s in re.split(r"[.;\n]", text) if len(s.split()) >= 3]
+        for line in lines:
+            if line and not line.endswith(":"):
+                requirements.append({
+                    "text": line, "kind": "nice" if NICE_TO_HAVE_PATTERN.search(line.lower()) else kind
+                })
+    matcher = get_skill_matcher()
+    listed = " \n ".join(r["text"] for r in requirements)
+    mentioned = matcher.scan(listed)
+    for skill in (profile or {}).get("required_skills", []):
+        # Model profiles may name skills differently from the taxonomy ("Spark" vs "Apache Spark")
+        canonical = matcher.scan(skill)
+        if canonical and not all(name in mentioned for name in canonical):
+            requirements.append({"text": skill, "kind": "required"})
+        elif not canonical and skill.lower() not in listed.lower():
+            requirements.append({"text": skill, "kind": "required"})
+    return requirements[:max_requirements]
+
+
+_resume_indexes = LocalLRU(EMBED_CACHE_SIZE)
+
+
+def resume_index(resume_text):
+    """VectorIndex of a resume's evidence chunks, built once per resume content"""
+    key = content_hash(resume_text)
+    index = _resume_indexes.get(key)
+    if index is None:
+        chunks = resume_chunks(resume_text)
+        index = VectorIndex.build([chunk["text"] for chunk in chunks], chunks)
+        _resume_indexes.set(key, index)
+    return index
+
+
+@traced("embed.evidence")
+def requirement_evidence(resume_text, job_description, profile=None, threshold=EMBED_MATCH_THRESHOLD):
+    """
+    Best supporting resume line for each requirement of a job description
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        profile: Job profile, used to add required skills missing from the requirement lines
+        threshold: Similarity at which a requirement counts as met
+
+    Returns:
+        list: {"requirement", "kind", "evidence", "section", "similarity", "met"} dicts,
+              in job description order; evidence is None when the resume has no lines
+    """
+    requirements = requirement_lines(job_description, profile)
+    if not requirements:
+        return []
+    index = resume_index(resume_text)
+    scores, indices = index.search(embed([r["text"] for r in requirements]), k=1)
+    evidence = []
+    for row, requirement in enumerate(requirements):
+        chunk = index.items[indices[row, 0]] if indices.shape[1] else None
+        similarity = float(scores[row, 0]) if chunk else 0.0
+        evidence.append({
+            "requirement": requirement["text"],
+            "kind": requirement["kind"],
+            "evidence": chunk["text"] if chunk else None,
+            "section": chunk["section"] if chunk else None,
+            "similarity": round(similarity, 3),
+            "met": similarity >= threshold,
+        })
+    return evidence
+
+
+def evidence_coverage(evidence):
+    """Share of requirements met (0-100), nice-to-haves counting half; None without requirements"""
+    weights = [1.0 if item["kind"] == "required" else 0.5 for item in evidence]
+    if not weights:
+        return None
+    met = sum(w for w, item in zip(weights, evidence) if item["met"])
+    return round(100 * met / sum(weights))
@@ -0,0 +1,109 @@
+"""
+Full Report
+Runs the HR, skill enhancement and ATS analyses as one model call and splits the result
+"""
+import re
+
+from utils.prompts import (
+    FULL_REPORT_PARTS,
+    get_full_report_prompt,
+    get_hr_evaluation_prompt,
+    get_skill_enhancement_prompt
+)
+from utils.jd_profile import build_ats_prompt
+
+
+# Must build the same prompts as the single-analysis pages, so primed responses are found
+SINGLE_PROMPTS = {
+    "hr": get_hr_evaluation_prompt,
+    "skills": get_skill_enhancement_prompt,
+    "ats": build_ats_prompt,
+}
+
+# Marker lines, tolerating markdown emphasis or heading marks the model may add
+MARKER_PATTERN = re.compile(r"^[#*_\s]*\[\[\s*REPORT:\s*(.+?)\s*\]\][*_\s]*$", re.MULTILINE | re.IGNORECASE)
+PART_KEYS = {title: key for key, title, _ in FULL_REPORT_PARTS}
+
+
+def split_full_report(response):
+    """
+    Split a full report response into its three reports
+
+    Args:
+        response: Model response to get_full_report_prompt
+
+    Returns:
+        dict: "hr", "skills", "ats" -> report text, for the parts that were found
+    """
+    markers = list(MARKER_PATTERN.finditer(response))
+    parts = {}
+    for marker, following in zip(markers, markers[1:] + [None]):
+        key = PART_KEYS.get(marker.group(1).upper())
+        end = following.start() if following else len(response)
+        text = response[marker.end():end].strip()
+        if key and text and key not in parts:
+            parts[key] = text
+    return parts
+
+
+def single_prompts(resume_text, job_description):
+    """Prompts the three separate analyses would send, keyed by analysis"""
+    return {key: build(resume_text, job_description) for key, build in SINGLE_PROMPTS.items()}
+
+
+def estimate_savings(full_prompt, prompts, call_info=None, baseline=None):
+    """
+    Compare one full report call with running the three analyses separately
+
+    Input tokens of the three-call path are scaled from the combined call's
+    measured count by prompt length. Its latency is the sum of recent average
+    latencies of the single analyses, when there is history for all three.
+
+    Args:
+        full_prompt: Combined prompt that was sent
+        prompts: Dict of the three single prompts
+        call_info: last_call_info() of the combined call
+        baseline: ResultStore.averages() for "hr", "skills" and "ats"
+
+    Returns:
+        dict: prompt_tokens, three_call_prompt_tokens, latency and three_call_latency
+              (None where unknown)
+    """
+    call_info = call_info or {}
+    baseline = baseline or {}
+    prompt_tokens = call_info.get("prompt_tokens")
+    separate_chars = sum(len(p) for p in prompts.values())
+    if prompt_tokens:
+        three_call_tokens = round(prompt_tokens * separate_chars / len(full_prompt))
+    else:
+        # Roughly four characters per token for English text
+        prompt_tokens = round(len(full_prompt) / 4)
+        three_call_tokens = round(separate_chars / 4)
+
+    three_call_latency = None
+    if all(baseline.get(key) for key in SINGLE_PROMPTS):
+        three_call_latency = sum(baseline[key]["latency"] for key in SINGLE_PROMPTS)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "three_call_prompt_tokens": three_call_tokens,
+        "latency": call_info.get("latency"),
+        "three_call_latency": three_call_latency,
+    }
+
+
+def run_full_report(resume_text, job_description, generate):
+    """
+    Run the full report and split it into the three analyses
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        generate: Function mapping a prompt to a response string
+
+    Returns:
+        tuple: (full prompt, raw response, dict of parts found)
+    """
+    prompt = get_full_report_prompt(resume_text, job_description)
+    response = generate(prompt)
+    parts = {} if response.startswith("Error") else split_full_report(response)
+    return prompt, response, parts
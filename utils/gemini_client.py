@@ -5,13 +5,263 @@ Handles all interactions with Google's Gemini AI API
 import google.generativeai as genai
 import streamlit as st
 import os
+import json
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 
+from utils.cache import get_cache
+from utils.model_transport import get_transport
+from utils.scheduler import SchedulerBusy, call_cost, get_scheduler
+from utils.tracing import set_attributes, span, traced
+
 
 # Load environment variables
 load_dotenv()
 
 
+# Model routing configuration
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+LIGHT_MODEL = os.getenv("GEMINI_LIGHT_MODEL", "gemini-2.0-flash-lite")
+STRONG_MODEL = os.getenv("GEMINI_STRONG_MODEL", DEFAULT_MODEL)
+FALLBACK_MODEL = os.getenv("GEMINI_FALLBACK_MODEL", "gemini-1.5-flash")
+
+MODEL_ROUTES = {
+    "chat": [LIGHT_MODEL, DEFAULT_MODEL],
+    "chat_summary": [LIGHT_MODEL, DEFAULT_MODEL],
+    "ats": [LIGHT_MODEL, DEFAULT_MODEL],
+    "hr": [STRONG_MODEL, FALLBACK_MODEL],
+    "skills": [STRONG_MODEL, FALLBACK_MODEL],
+    "comparison": [STRONG_MODEL, FALLBACK_MODEL],
+    None: [DEFAULT_MODEL, FALLBACK_MODEL],
+}
+# Override per analysis type, e.g. GEMINI_MODEL_ROUTES='{"chat": ["gemini-2.0-flash-lite"]}'
+MODEL_ROUTES.update({
+    (None if analysis == "default" else analysis): models
+    for analysis, models in json.loads(os.getenv("GEMINI_MODEL_ROUTES", "{}")).items()
+})
+
+# "pooled": REST over warm keep-alive connections (utils/model_transport.py); "sdk": google-generativeai
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "pooled").lower()
+
+# Shared response cache for generate_cached_response (0 disables it)
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+
+# Errors that move a call on to the next model in its route
+FAILOVER_ERRORS = ("quota", "rate_limit", "overload")
+STATS_WINDOW = int(os.getenv("GEMINI_STATS_WINDOW", "50"))
+QUOTA_COOLDOWN_SECONDS = float(os.getenv("GEMINI_QUOTA_COOLDOWN", "60"))
+MAX_ERROR_RATE = float(os.getenv("GEMINI_MAX_ERROR_RATE", "0.5"))
+
+_stats_lock = threading.Lock()
+_model_stats = {}
+_routing_decisions = {}
+# Per-thread details of the last successful call, for the result store
+_call_info = threading.local()
+
+# Degraded mode: entered after repeated quota/overload failures, left once a health probe succeeds
+DEGRADED_ERROR_THRESHOLD = int(os.getenv("GEMINI_DEGRADED_THRESHOLD", "3"))
+HEALTH_PROBE_INTERVAL = float(os.getenv("GEMINI_HEALTH_PROBE_INTERVAL", "30"))
+DEGRADED_RESPONSE = "Error: API quota exceeded. Please try again later"
+BUSY_RESPONSE = "Error: The AI service is busy (estimated wait {wait:.0f}s). Please try again shortly"
+
+_health = {
+    "degraded": False,
+    "consecutive_failures": 0,
+    "degraded_since": 0.0,
+    "last_probe": 0.0,
+    "probing": False,
+}
+
+
+def _get_stats(model_name):
+    """Return the rolling stats record for a model (caller holds the lock)"""
+    if model_name not in _model_stats:
+        _model_stats[model_name] = {
+            "calls": deque(maxlen=STATS_WINDOW),
+            "last_failover_error": 0.0,
+        }
+    return _model_stats[model_name]
+
+
+def _record_call(model_name, latency, error_kind):
+    """Record latency and outcome of one model call"""
+    with _stats_lock:
+        stats = _get_stats(model_name)
+        stats["calls"].append((latency, error_kind is None))
+        if error_kind in FAILOVER_ERRORS:
+            stats["last_failover_error"] = time.time()
+
+
+def _record_decision(analysis_type, model_name, failovers, total_latency, failover_latency):
+    """Record which model served an analysis and the latency added by failover"""
+    with _stats_lock:
+        key = (analysis_type or "default", model_name or "failed")
+        decision = _routing_decisions.setdefault(key, {
+            "count": 0, "failovers": 0, "total_latency": 0.0, "failover_latency": 0.0
+        })
+        decision["count"] += 1
+        decision["failovers"] += failovers
+        decision["total_latency"] += total_latency
+        decision["failover_latency"] += failover_latency or 0.0
+
+
+def _is_healthy(model_name, now):
+    """A model is unhealthy while cooling down from quota/overload or erroring too often"""
+    stats = _model_stats.get(model_name)
+    if not stats:
+        return True
+    if now - stats["last_failover_error"] < QUOTA_COOLDOWN_SECONDS:
+        return False
+    calls = stats["calls"]
+    if len(calls) >= 5:
+        error_rate = sum(1 for _, ok in calls if not ok) / len(calls)
+        return error_rate <= MAX_ERROR_RATE
+    return True
+
+
+def route_models(analysis_type=None):
+    """
+    Pick the models to try for an analysis, in order
+
+    Healthy models from the configured route come first; unhealthy ones are
+    kept at the end so a call can still fall through to them.
+    
+    Args:
+        analysis_type: Analysis key ("hr", "skills", "ats", "comparison", "chat")
+        
+    Returns:
+        list: Model names to try in order
+    """
+    route = MODEL_ROUTES.get(analysis_type) or MODEL_ROUTES[None]
+    route = list(dict.fromkeys(route))
+    now = time.time()
+    with _stats_lock:
+        healthy = [m for m in route if _is_healthy(m, now)]
+    return healthy + [m for m in route if m not in healthy]
+
+
+def _record_outcome(error_kind):
+    """Update the degraded-mode state after a routed call"""
+    with _stats_lock:
+        if error_kind is None:
+            _health["consecutive_failures"] = 0
+            return
+        if error_kind not in FAILOVER_ERRORS:
+            return
+        _health["consecutive_failures"] += 1
+        if not _health["degraded"] and _health["consecutive_failures"] >= DEGRADED_ERROR_THRESHOLD:
+            _health["degraded"] = True
+            _health["degraded_since"] = time.time()
+            _health["last_probe"] = time.time()
+
+
+def probe_health():
+    """
+    Send a minimal request to check whether the API is serving again
+    
+    Leaves degraded mode on success.
+    
+    Returns:
+        bool: True if the probe succeeded
+    """
+    try:
+        _call_model("Reply with OK.", route_models(None)[0])
+        ok = True
+    except Exception:
+        ok = False
+    
+    with _stats_lock:
+        _health["last_probe"] = time.time()
+        _health["probing"] = False
+        if ok:
+            _health["degraded"] = False
+            _health["consecutive_failures"] = 0
+    return ok
+
+
+def is_degraded():
+    """
+    Whether the client is in degraded (local analysis only) mode
+    
+    While degraded, a background health probe is started at most once per
+    HEALTH_PROBE_INTERVAL; full service resumes automatically when it succeeds.
+    
+    Returns:
+        bool: True if model calls are currently suspended
+    """
+    with _stats_lock:
+        if not _health["degraded"]:
+            return False
+        due = time.time() - _health["last_probe"] >= HEALTH_PROBE_INTERVAL
+        start_probe = due and not _health["probing"]
+        if start_probe:
+            _health["probing"] = True
+    
+    if start_probe:
+        threading.Thread(target=probe_health, name="gemini-health-probe", daemon=True).start()
+    return True
+
+
+def get_transport_metrics():
+    """
+    Connection pool counters with connect time vs time to first byte
+    
+    Returns:
+        dict: ConnectionPool.stats(), or None when the SDK transport is used or no pool was started
+    """
+    # Report only; do not start a pool in processes that never initialized one
+    if GEMINI_TRANSPORT != "pooled" or not get_transport.cache_info().currsize:
+        return None
+    transport = get_transport()
+    return transport.pool.stats() if transport else None
+
+
+def get_scheduler_metrics():
+    """
+    Fair scheduler load, rejections and wait/queue depth histograms
+    
+    Returns:
+        dict: FairScheduler.stats(), or None when the scheduler is disabled
+    """
+    scheduler = get_scheduler()
+    return scheduler.stats() if scheduler else None
+
+
+def get_routing_metrics():
+    """
+    Snapshot of per-model health and per-analysis routing decisions
+    
+    Returns:
+        dict: {"models": {...}, "decisions": [...]}
+    """
+    with _stats_lock:
+        models = {}
+        for name, stats in _model_stats.items():
+            calls = list(stats["calls"])
+            latencies = sorted(latency for latency, _ in calls)
+            models[name] = {
+                "calls": len(calls),
+                "error_rate": round(sum(1 for _, ok in calls if not ok) / len(calls), 3) if calls else 0.0,
+                "avg_latency_s": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                "p95_latency_s": round(latencies[int(len(latencies) * 0.95)], 3) if latencies else 0.0,
+            }
+        decisions = [
+            {
+                "analysis": analysis,
+                "model": model,
+                "count": d["count"],
+                "failovers": d["failovers"],
+                "avg_latency_s": round(d["total_latency"] / d["count"], 3),
+                "avg_failover_latency_s": round(d["failover_latency"] / d["count"], 3),
+            }
+            for (analysis, model), d in _routing_decisions.items()
+        ]
+    return {"models": models, "decisions": decisions}
+
+
 def initialize_gemini():
     """
     Initialize Gemini AI with API key
@@ -27,6 +277,9 @@ def initialize_gemini():
             return False
         
         genai.configure(api_key=api_key)
+        if GEMINI_TRANSPORT == "pooled":
+            # Start pre-connecting now so the first analysis finds a warm connection
+            get_transport()
         return True
     
     except Exception as e:
@@ -35,7 +288,7 @@ def initialize_gemini():
 
 
 @st.cache_resource
-def get_gemini_model(model_name="gemini-2.0-flash-exp"):
+def get_gemini_model(model_name=DEFAULT_MODEL):
     """
     Get Gemini model instance (cached)
     
@@ -52,83 +305,256 @@ def get_gemini_model(model_name="gemini-2.0-flash-exp"):
         return None
 
 
-def generate_response(prompt, model_name="gemini-2.0-flash-exp"):
+def _classify_error(error_msg):
+    """
+    Classify a model error message
+
+    Args:
+        error_msg: Exception message
+
+    Returns:
+        str: One of "auth", "quota", "rate_limit", "overload", "other"
+    """
+    upper = error_msg.upper()
+    if "API_KEY" in upper:
+        return "auth"
+    if "QUOTA" in upper or "RESOURCE_EXHAUSTED" in upper:
+        return "quota"
+    if "RATE_LIMIT" in upper or "429" in upper:
+        return "rate_limit"
+    if "503" in upper or "UNAVAILABLE" in upper or "OVERLOADED" in upper:
+        return "overload"
+    return "other"
+
+
+def _format_error(error_msg):
+    """Map a model error message to the user-facing error string"""
+    kind = _classify_error(error_msg)
+    if kind == "auth":
+        return "Error: Invalid API key. Please check your GOOGLE_API_KEY in .env file"
+    elif kind == "quota":
+        return "Error: API quota exceeded. Please try again later"
+    elif kind == "rate_limit":
+        return "Error: Rate limit exceeded. Please wait a moment and try again"
+    else:
+        return f"Error generating response: {error_msg}"
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a Gemini model instance cannot be created"""
+
+
+def _call_model(prompt, model_name):
+    """
+    Send a prompt to one model, raising on any failure
+
+    Returns:
+        tuple: (generated response text, usage dict with prompt_tokens and output_tokens,
+                plus connect_latency, ttfb and stream_latency on the pooled transport)
+    """
+    if GEMINI_TRANSPORT == "pooled":
+        transport = get_transport()
+        if transport is None:
+            raise ModelLoadError("Could not load Gemini model")
+        return transport.generate(model_name, prompt)
+    
+    model = get_gemini_model(model_name)
+    if not model:
+        raise ModelLoadError("Could not load Gemini model")
+    response = model.generate_content(prompt)
+    metadata = getattr(response, "usage_metadata", None)
+    usage = {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", None),
+        "output_tokens": getattr(metadata, "candidates_token_count", None),
+    }
+    return response.text, usage
+
+
+def last_call_info():
+    """
+    Details of the last generate_response call made by this thread
+
+    Returns:
+        dict: model, latency (seconds), prompt_tokens and output_tokens (plus connect_latency,
+              ttfb and stream_latency on the pooled transport), or None
+    """
+    return getattr(_call_info, "last", None)
+
+
+@traced("llm.generate")
+def generate_response(prompt, model_name=None, analysis_type=None):
     """
     Generate response from Gemini AI
     
+    Calls wait for a slot from the fair scheduler, as the current session's;
+    a call rejected as busy returns BUSY_RESPONSE without reaching the model.
+    
     Args:
         prompt: Input prompt text
-        model_name: Name of the Gemini model to use
+        model_name: Name of the Gemini model to use; routed by analysis type if omitted
+        analysis_type: Analysis key ("hr", "skills", "ats", "comparison", "chat") used for routing
         
     Returns:
         str: Generated response text
     """
+    _call_info.last = None
+    set_attributes(analysis=analysis_type, prompt_chars=len(prompt))
+    if is_degraded():
+        set_attributes(degraded=True)
+        return DEGRADED_RESPONSE
+    
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return _generate_routed(prompt, model_name, analysis_type)
     try:
-        model = get_gemini_model(model_name)
-        
-        if not model:
-            return "Error: Could not load Gemini model"
-        
-        response = model.generate_content(prompt)
-        return response.text
+        ticket = scheduler.acquire(analysis_type, call_cost(prompt))
+    except SchedulerBusy as e:
+        # Rejected before queueing; not a model failure, so health stats are untouched
+        set_attributes(rejected=e.reason, estimated_wait_s=round(e.wait, 2))
+        return BUSY_RESPONSE.format(wait=e.wait)
+    with ticket:
+        set_attributes(queue_wait_s=round(ticket.waited, 4))
+        return _generate_routed(prompt, model_name, analysis_type)
+
+
+def _generate_routed(prompt, model_name, analysis_type):
+    """generate_response body: call the routed models in order, failing over on quota and overload errors"""
+    candidates = [model_name] if model_name else route_models(analysis_type)
+    start = time.perf_counter()
+    last_error = None
+    attempt = 0
     
-    except Exception as e:
-        error_msg = str(e)
+    for attempt, name in enumerate(candidates):
+        attempt_start = time.perf_counter()
+        try:
+            with span("llm.attempt", model=name, attempt=attempt) as call_span:
+                text, usage = _call_model(prompt, name)
+                call_span.set(**usage)
+        except Exception as e:
+            last_error = e
+            kind = _classify_error(str(e))
+            _record_call(name, time.perf_counter() - attempt_start, kind)
+            if kind in FAILOVER_ERRORS and attempt + 1 < len(candidates):
+                continue
+            break
         
-        # Handle common errors
-        if "API_KEY" in error_msg.upper():
-            return "Error: Invalid API key. Please check your GOOGLE_API_KEY in .env file"
-        elif "QUOTA" in error_msg.upper():
-            return "Error: API quota exceeded. Please try again later"
-        elif "RATE_LIMIT" in error_msg.upper():
-            return "Error: Rate limit exceeded. Please wait a moment and try again"
-        else:
-            return f"Error generating response: {error_msg}"
+        _record_call(name, time.perf_counter() - attempt_start, None)
+        _record_outcome(None)
+        _call_info.last = {"model": name, "latency": time.perf_counter() - start, **usage}
+        _record_decision(analysis_type, name, attempt, time.perf_counter() - start,
+                         attempt_start - start)
+        # Time spent on failed attempts before this one is the retry time
+        set_attributes(model=name, attempts=attempt + 1, retry_s=attempt_start - start, **usage)
+        return text
+    
+    _record_decision(analysis_type, None, attempt, time.perf_counter() - start, None)
+    set_attributes(attempts=attempt + 1, error=_classify_error(str(last_error)) if last_error else "model")
+    if last_error is not None:
+        _record_outcome(_classify_error(str(last_error)))
+    if last_error is None or isinstance(last_error, ModelLoadError):
+        return "Error: Could not load Gemini model"
+    return _format_error(str(last_error))
 
 
-@st.cache_data(ttl=3600)
-def generate_cached_response(prompt, model_name="gemini-2.0-flash-exp"):
+@traced("llm.cached")
+def generate_cached_response(prompt, model_name=None, analysis_type=None):
     """
     Cached version of generate_response to avoid redundant API calls
     
+    Responses are shared through the "llm" cache (local LRU plus the shared
+    tier, if configured), so replicas do not regenerate the same prompt.
+    Errors are never cached.
+    
     Args:
         prompt: Input prompt text
-        model_name: Name of the Gemini model to use
+        model_name: Name of the Gemini model to use; routed by analysis type if omitted
+        analysis_type: Analysis key used for routing
         
     Returns:
         str: Generated response text
     """
-    return generate_response(prompt, model_name)
+    if LLM_CACHE_TTL <= 0:
+        return generate_response(prompt, model_name, analysis_type)
+    
+    computed = []
+    
+    def compute():
+        computed.append(True)
+        text = generate_response(prompt, model_name, analysis_type)
+        return {"text": text, "info": last_call_info()}
+    
+    _call_info.last = None
+    start = time.perf_counter()
+    cache = get_cache("llm", ttl=LLM_CACHE_TTL, local_size=LLM_CACHE_SIZE)
+    entry = cache.get_or_compute(
+        (prompt, model_name, analysis_type), compute,
+        should_cache=lambda entry: not entry["text"].startswith("Error")
+    )
+    # Failed and degraded calls leave no call info, so only the callback tells a miss apart
+    hit = not computed
+    set_attributes(analysis=analysis_type, hit=hit)
+    if hit and entry["info"] is not None:
+        # Served from cache: report the original model with the lookup latency
+        _call_info.last = {**entry["info"], "latency": time.perf_counter() - start, "cached": True}
+    return entry["text"]
+
+
+def prime_cached_response(prompt, text, info=None, model_name=None, analysis_type=None):
+    """
+    Store a response produced elsewhere under the cache key of a prompt
+    
+    Used when one combined call answers several prompts, so a later
+    generate_cached_response for any of them is served from the cache.
+    
+    Args:
+        prompt: Prompt whose cache entry to set
+        text: Response text for that prompt
+        info: Call info to report on cache hits (model, tokens)
+        model_name: Model name argument the lookup will use
+        analysis_type: Analysis key the lookup will use
+    """
+    if LLM_CACHE_TTL <= 0 or text.startswith("Error"):
+        return
+    cache = get_cache("llm", ttl=LLM_CACHE_TTL, local_size=LLM_CACHE_SIZE)
+    cache.set((prompt, model_name, analysis_type), {"text": text, "info": info})
 
 
-def chat_with_gemini(messages, model_name="gemini-2.0-flash-exp"):
+def chat_with_gemini(messages, model_name=None):
     """
     Have a conversation with Gemini AI
     
     Args:
         messages: List of message dictionaries with 'role' and 'content'
-        model_name: Name of the Gemini model to use
+        model_name: Name of the Gemini model to use; routed as "chat" if omitted
         
     Returns:
         str: AI response
     """
     try:
-        model = get_gemini_model(model_name)
+        model = get_gemini_model(model_name or route_models("chat")[0])
         
         if not model:
             return "Error: Could not load Gemini model"
         
-        # Start chat session
-        chat = model.start_chat(history=[])
-        
-        # Send all messages except the last one as history
-        for msg in messages[:-1]:
-            if msg['role'] == 'user':
-                chat.send_message(msg['content'])
-        
-        # Send the last message and get response
-        response = chat.send_message(messages[-1]['content'])
-        return response.text
+        scheduler = get_scheduler()
+        ticket = scheduler.acquire("chat", call_cost("".join(m['content'] for m in messages))) if scheduler else None
+        try:
+            # Start chat session
+            chat = model.start_chat(history=[])
+            
+            # Send all messages except the last one as history
+            for msg in messages[:-1]:
+                if msg['role'] == 'user':
+                    chat.send_message(msg['content'])
+            
+            # Send the last message and get response
+            response = chat.send_message(messages[-1]['content'])
+            return response.text
+        finally:
+            if ticket:
+                scheduler.release(ticket)
     
+    except SchedulerBusy as e:
+        return BUSY_RESPONSE.format(wait=e.wait)
     except Exception as e:
         return f"Error in chat: {str(e)}"
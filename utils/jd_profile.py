@@ -0,0 +1,205 @@
+"""
+Job Description Profiles
+Extracts a compact requirements profile once per job description and reuses it for every resume
+"""
+import json
+import logging
+import os
+import re
+
+from utils.cache import get_cache
+from utils.dedup import text_key
+from utils.gemini_client import generate_response, is_degraded
+from utils.local_analysis import EDUCATION_NAMES, local_jd_profile
+from utils.prompts import get_ats_match_prompt, get_jd_profile_prompt, get_resume_comparison_prompt
+from utils.tracing import set_attributes, traced
+
+
+logger = logging.getLogger(__name__)
+
+# "model": one model call per job description, local extraction when the model is
+# unavailable or returns something unusable; "local": never call the model;
+# "off": prompts carry the raw job description as before
+JD_PROFILE_SOURCE = os.getenv("JD_PROFILE_SOURCE", "model").lower()
+JD_PROFILE_TTL = int(os.getenv("JD_PROFILE_TTL", str(7 * 24 * 3600)))
+# Bump when the profile format or extraction changes so stale entries are not reused
+PROFILE_VERSION = 1
+
+EDUCATION_LEVELS = {name: level for level, name in EDUCATION_NAMES.items() if name}
+JSON_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def _string_list(value, limit):
+    if not isinstance(value, list):
+        return []
+    items = []
+    for item in value:
+        if isinstance(item, str) and item.strip() and item.strip() not in items:
+            items.append(item.strip())
+    return items[:limit]
+
+
+def parse_model_profile(response):
+    """
+    Validate a model response to get_jd_profile_prompt
+
+    Args:
+        response: Model response text (code fences and surrounding prose are tolerated)
+
+    Returns:
+        dict: Profile in the local_jd_profile format, or None if the response is unusable
+    """
+    match = JSON_PATTERN.search(response or "")
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    keywords = []
+    for item in data.get("keywords") or []:
+        if not isinstance(item, dict) or not isinstance(item.get("keyword"), str) or not item["keyword"].strip():
+            continue
+        try:
+            weight = min(1.0, max(0.1, float(item.get("weight", 0.5))))
+        except (TypeError, ValueError):
+            weight = 0.5
+        keywords.append([item["keyword"].strip().lower(), round(weight, 2)])
+    required_skills = _string_list(data.get("required_skills"), 15)
+    if not keywords and not required_skills:
+        return None
+
+    try:
+        min_years = max(0, int(data.get("min_years") or 0))
+    except (TypeError, ValueError):
+        min_years = 0
+    education = str(data.get("education") or "").lower()
+    title = data.get("title")
+    return {
+        "title": title.strip() if isinstance(title, str) and title.strip().lower() not in ("", "null") else None,
+        "required_skills": required_skills,
+        "nice_to_have": [s for s in _string_list(data.get("nice_to_have"), 10) if s not in required_skills],
+        "min_years": min_years,
+        "education_level": next((lvl for name, lvl in EDUCATION_LEVELS.items() if name in education), 0),
+        "keywords": sorted(keywords, key=lambda item: (-item[1], item[0]))[:25],
+    }
+
+
+def _extract(job_description):
+    """Profile from the configured source, falling back to local extraction"""
+    if JD_PROFILE_SOURCE == "model":
+        if is_degraded():
+            # The model is expected back soon: do not pin the local profile in the cache
+            return {**local_jd_profile(job_description), "source": "local", "retry": True}
+        response = generate_response(get_jd_profile_prompt(job_description), analysis_type="jd_profile")
+        if response.startswith("Error"):
+            # Transient failure: serve a local profile now, ask the model again next time
+            return {**local_jd_profile(job_description), "source": "local", "retry": True}
+        profile = parse_model_profile(response)
+        if profile is not None:
+            return {**profile, "source": "model"}
+        logger.warning("Model job profile unusable, using local extraction: %.120s", response)
+    return {**local_jd_profile(job_description), "source": "local"}
+
+
+@traced("jd.profile")
+def get_jd_profile(job_description):
+    """
+    Requirements profile of a job description, extracted once per normalized text
+
+    Profiles are shared through the "jd_profile" cache (local LRU plus the
+    shared tier), so every resume screened against the same job description,
+    in any session or replica, reuses one extraction. A local fallback made
+    because the model call failed or the model is degraded is not cached, so
+    the next request retries; one made because the answer was not valid JSON
+    is.
+
+    Args:
+        job_description: Job description text
+
+    Returns:
+        dict: title, required_skills, nice_to_have, min_years, education_level,
+              keywords ([keyword, weight] pairs), source and jd_hash;
+              None when JD_PROFILE_SOURCE is "off" or the text is empty
+    """
+    if JD_PROFILE_SOURCE == "off" or not job_description or not job_description.strip():
+        return None
+    jd_hash = text_key(job_description)
+    computed = []
+
+    def compute():
+        computed.append(True)
+        return {**_extract(job_description), "jd_hash": jd_hash}
+
+    profile = get_cache("jd_profile", ttl=JD_PROFILE_TTL).get_or_compute(
+        (jd_hash, JD_PROFILE_SOURCE, PROFILE_VERSION), compute,
+        should_cache=lambda profile: not profile.get("retry")
+    )
+    set_attributes(jd_hash=jd_hash, source=profile["source"], hit=not computed)
+    return profile
+
+
+def format_jd_profile(profile):
+    """
+    Compact text form of a profile, sent to the model in place of the job description
+
+    Args:
+        profile: Output of get_jd_profile
+
+    Returns:
+        str: A few labelled lines
+    """
+    lines = []
+    if profile.get("title"):
+        lines.append(f"Role: {profile['title']}")
+    if profile["required_skills"]:
+        lines.append("Required skills: " + ", ".join(profile["required_skills"]))
+    if profile["nice_to_have"]:
+        lines.append("Nice to have: " + ", ".join(profile["nice_to_have"]))
+    if profile["min_years"]:
+        lines.append(f"Minimum experience: {profile['min_years']} years")
+    if profile["education_level"]:
+        lines.append(f"Minimum education: {EDUCATION_NAMES[profile['education_level']]}'s degree"
+                     if profile["education_level"] < 3 else "Minimum education: PhD")
+    if profile["keywords"]:
+        lines.append("Weighted keywords (1.0 = must-have): "
+                     + ", ".join(f"{keyword} {weight:g}" for keyword, weight in profile["keywords"]))
+    return "\n".join(lines)
+
+
+def build_ats_prompt(resume_text, job_description, profile=None):
+    """
+    ATS prompt using the job profile when one is available
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        profile: Precomputed profile; looked up (or extracted) if omitted
+
+    Returns:
+        str: Prompt text
+    """
+    profile = profile or get_jd_profile(job_description)
+    return get_ats_match_prompt(resume_text, job_description, format_jd_profile(profile) if profile else None)
+
+
+def build_comparison_prompt(resume1_text, resume2_text, job_description, profile=None):
+    """
+    Resume comparison prompt using the job profile when one is available
+
+    Args:
+        resume1_text: First resume text
+        resume2_text: Second resume text
+        job_description: Job description text
+        profile: Precomputed profile; looked up (or extracted) if omitted
+
+    Returns:
+        str: Prompt text
+    """
+    profile = profile or get_jd_profile(job_description)
+    return get_resume_comparison_prompt(
+        resume1_text, resume2_text, job_description, format_jd_profile(profile) if profile else None
+    )
@@ -0,0 +1,374 @@
+"""
+Local Analysis Utilities
+Deterministic keyword and skill matching used when the Gemini API is unavailable
+"""
+import re
+from collections import Counter
+
+from utils.skill_matcher import get_skill_matcher
+
+
+STOPWORDS = {
+    "a", "about", "above", "across", "after", "all", "also", "an", "and", "any", "are", "as", "at",
+    "be", "been", "being", "both", "but", "by", "can", "candidate", "company", "could", "do", "does",
+    "each", "etc", "for", "from", "good", "has", "have", "having", "he", "her", "his", "how", "i",
+    "if", "in", "including", "into", "is", "it", "its", "job", "join", "looking", "may", "me", "more",
+    "most", "must", "my", "new", "not", "of", "on", "or", "other", "our", "out", "over", "per",
+    "plus", "preferred", "required", "requirements", "responsibilities", "role", "she", "should",
+    "so", "some", "strong", "such", "team", "than", "that", "the", "their", "them", "then", "there",
+    "these", "they", "this", "those", "through", "to", "under", "up", "us", "use", "using", "very",
+    "via", "was", "we", "well", "were", "what", "when", "where", "which", "while", "who", "will",
+    "with", "within", "work", "working", "would", "year", "years", "you", "your",
+}
+
+DEGREE_LEVELS = [
+    (3, re.compile(r"\b(ph\.?d|doctorate)\b")),
+    (2, re.compile(r"\b(master'?s?|m\.?sc|m\.?s\.|mba|m\.?tech)\b")),
+    (1, re.compile(r"\b(bachelor'?s?|b\.?sc|b\.?s\.|b\.?a\.|b\.?tech|b\.?e\.|undergraduate degree)\b")),
+]
+
+YEARS_PATTERN = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)")
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#./-]*[a-z0-9+#]|[a-z]")
+
+# Job description lines that open (or are) a nice-to-have part, and headings that end one
+NICE_TO_HAVE_PATTERN = re.compile(
+    r"nice[ -]to[ -]have|good[ -]to[ -]have|preferred|bonus|\bplus\b|desirable|advantage|not required"
+)
+REQUIRED_HEADING_PATTERN = re.compile(
+    r"^\W*(requirements|required|qualifications|must[ -]have|responsibilities|what you|you have|about)"
+)
+EDUCATION_NAMES = {0: None, 1: "bachelor", 2: "master", 3: "phd"}
+# Words common to job ads that say nothing about the candidate; left out of profile keywords
+JD_FILLER = {"bonus", "experience", "hiring", "ideal", "nice", "opportunity", "seeking", "apply", "benefits"}
+
+
+def normalize_text(text):
+    """Lowercase text and collapse whitespace"""
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def tokenize(text):
+    """
+    Split normalized text into keyword tokens
+
+    Args:
+        text: Normalized text
+
+    Returns:
+        list: Tokens with stopwords and very short words removed
+    """
+    return [
+        token for token in TOKEN_PATTERN.findall(text)
+        if token not in STOPWORDS and len(token) > 2
+    ]
+
+
+def extract_keywords(text, top_n=30):
+    """
+    Most frequent keywords in a text, ordered deterministically
+
+    Args:
+        text: Input text
+        top_n: Number of keywords to return
+
+    Returns:
+        list: (keyword, count) tuples
+    """
+    counts = Counter(tokenize(normalize_text(text)))
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:top_n]
+
+
+def find_skills(text):
+    """
+    Known skills mentioned in a text
+
+    Args:
+        text: Input text
+
+    Returns:
+        set: Canonical skill names from the skill taxonomy
+    """
+    return set(get_skill_matcher().scan(text))
+
+
+def _degree_level(text):
+    """Highest degree level mentioned (0 = none)"""
+    for level, pattern in DEGREE_LEVELS:
+        if pattern.search(text):
+            return level
+    return 0
+
+
+def _max_years(text):
+    """Largest 'N years' figure mentioned (0 = none)"""
+    years = [int(y) for y in YEARS_PATTERN.findall(text)]
+    return max(years) if years else 0
+
+
+def _ratio(part, whole):
+    """Percentage of whole covered by part, 100 when there is nothing to cover"""
+    return round(100 * part / whole) if whole else 100
+
+
+def split_requirements(job_description):
+    """
+    Split a job description into its required and nice-to-have parts
+
+    A line mentioning "preferred", "nice to have", "bonus", "a plus", ... is
+    nice-to-have; a heading-like line with such a phrase opens a nice-to-have
+    block that lasts until the next requirements heading.
+
+    Returns:
+        tuple: (required text, nice-to-have text)
+    """
+    required, nice = [], []
+    in_nice_block = False
+    for line in job_description.splitlines():
+        stripped = line.strip().lower()
+        if not stripped:
+            continue
+        is_heading = stripped.endswith(":") or stripped.startswith("#") or len(stripped.split()) <= 4
+        if NICE_TO_HAVE_PATTERN.search(stripped):
+            in_nice_block = in_nice_block or is_heading
+            nice.append(line)
+        elif is_heading and REQUIRED_HEADING_PATTERN.search(stripped):
+            in_nice_block = False
+            required.append(line)
+        else:
+            (nice if in_nice_block else required).append(line)
+    return "\n".join(required), "\n".join(nice)
+
+
+def local_jd_profile(job_description, top_n=30):
+    """
+    Structured job profile extracted with the local keyword and skill matchers
+
+    Keyword weights start from relative frequency; known skills and terms from
+    the required part are boosted and terms only found in the nice-to-have
+    part are halved.
+
+    Args:
+        job_description: Job description text
+        top_n: Number of weighted keywords
+
+    Returns:
+        dict: title, required_skills, nice_to_have, min_years, education_level
+              and keywords as [keyword, weight] pairs, heaviest first
+    """
+    required_text, nice_text = split_requirements(job_description)
+    required_skills = find_skills(required_text)
+    nice_to_have = find_skills(nice_text) - required_skills
+    required_tokens = set(tokenize(normalize_text(required_text)))
+
+    keywords = [item for item in extract_keywords(job_description, top_n=top_n + len(JD_FILLER))
+                if item[0] not in JD_FILLER][:top_n]
+    top_count = keywords[0][1] if keywords else 1
+    weighted = []
+    for keyword, count in keywords:
+        weight = 0.5 + 0.5 * count / top_count
+        if find_skills(keyword):
+            weight += 0.5
+        if keyword not in required_tokens:
+            weight *= 0.5
+        weighted.append([keyword, round(min(weight, 1.0), 2)])
+    weighted.sort(key=lambda item: (-item[1], item[0]))
+
+    first_line = next((line.strip(" #*:") for line in job_description.splitlines() if line.strip()), "")
+    jd = normalize_text(job_description)
+    return {
+        "title": first_line if 0 < len(first_line.split()) <= 8 else None,
+        "required_skills": sorted(required_skills),
+        "nice_to_have": sorted(nice_to_have),
+        "min_years": _max_years(normalize_text(required_text)) or _max_years(jd),
+        "education_level": _degree_level(normalize_text(required_text)),
+        "keywords": weighted,
+    }
+
+
+def _mentions(keyword, resume, resume_tokens):
+    """Whether a profile keyword (single token or phrase) appears in normalized resume text"""
+    if keyword in resume_tokens:
+        return True
+    return " " in keyword and re.search(r"(?<![a-z0-9])" + re.escape(keyword) + r"(?![a-z0-9])", resume) is not None
+
+
+def _canonical_skills(skills):
+    """
+    Taxonomy names for profile skills, in order and without duplicates
+
+    Model profiles name skills freely ("Spark" for "Apache Spark"); a skill
+    the taxonomy does not know is kept as written.
+    """
+    matcher = get_skill_matcher()
+    names, seen = [], set()
+    for skill in skills:
+        for name in matcher.scan(skill) or [skill]:
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                names.append(name)
+    return names
+
+
+def local_ats_match(resume_text, job_description, profile=None):
+    """
+    Score a resume against a job description without calling the model
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        profile: Precomputed job profile (see local_jd_profile and
+                 utils.jd_profile.get_jd_profile); extracted locally if omitted
+
+    Returns:
+        dict: Component scores (0-100) and matched/missing keywords and skills
+    """
+    resume = normalize_text(resume_text)
+    if profile is None:
+        profile = local_jd_profile(job_description)
+
+    resume_tokens = set(tokenize(resume))
+    keyword_weights = [(keyword.lower(), weight) for keyword, weight in profile["keywords"]]
+    matched_keywords = [k for k, _ in keyword_weights if _mentions(k, resume, resume_tokens)]
+    missing_keywords = [k for k, _ in keyword_weights if k not in matched_keywords]
+    matched_weight = sum(w for k, w in keyword_weights if k in matched_keywords)
+    total_weight = sum(w for _, w in keyword_weights)
+
+    # Required skills count fully, nice-to-haves half
+    resume_skills = {skill.lower() for skill in find_skills(resume)}
+    required_skills = _canonical_skills(profile["required_skills"])
+    nice_to_have = [s for s in _canonical_skills(profile["nice_to_have"]) if s not in required_skills]
+    skill_weights = [(s, 1.0) for s in required_skills] + [(s, 0.5) for s in nice_to_have]
+    # Skills outside the taxonomy are looked for as written
+    present = {s for s, _ in skill_weights if s.lower() in resume_skills or _mentions(s.lower(), resume, resume_tokens)}
+    present_skills = sorted(present)
+    missing_skills = [s for s, _ in skill_weights if s not in present]
+    present_weight = sum(w for s, w in skill_weights if s in present)
+    skill_total = sum(w for _, w in skill_weights)
+
+    required_years = profile["min_years"]
+    resume_years = _max_years(resume)
+    if not required_years:
+        experience = 100
+    elif not resume_years:
+        experience = 50
+    else:
+        experience = min(100, _ratio(resume_years, required_years))
+
+    required_degree = profile["education_level"]
+    resume_degree = _degree_level(resume)
+    if resume_degree >= required_degree:
+        education = 100
+    elif resume_degree:
+        education = 50
+    else:
+        education = 0
+
+    keyword = _ratio(matched_weight, total_weight)
+    skills = _ratio(present_weight, skill_total)
+    overall = round(0.4 * keyword + 0.3 * skills + 0.2 * experience + 0.1 * education)
+
+    return {
+        "overall": overall,
+        "keyword": keyword,
+        "skills": skills,
+        "experience": experience,
+        "education": education,
+        "matched_keywords": matched_keywords,
+        "missing_keywords": missing_keywords,
+        "present_skills": present_skills,
+        "missing_skills": missing_skills,
+        "required_years": required_years,
+        "resume_years": resume_years,
+    }
+
+
+def format_local_ats_report(result):
+    """
+    Render a local ATS result in the same layout as the model's ATS report
+
+    Args:
+        result: Output of local_ats_match
+
+    Returns:
+        str: Markdown report
+    """
+    def bullet_list(items):
+        return "\n".join(f"- {item}" for item in items) if items else "- None found"
+
+    years = (
+        f"{result['resume_years']} mentioned vs {result['required_years']} required"
+        if result["required_years"] else "No explicit requirement"
+    )
+    return f"""
+## 📊 Overall Match Score
+Overall Match Score: {result['overall']}%
+- Keyword Match: {result['keyword']}%
+- Skills Match: {result['skills']}%
+- Experience Match: {result['experience']}%
+- Education Match: {result['education']}%
+
+## 🔑 Keyword Analysis
+
+### Matched Keywords
+{bullet_list(result['matched_keywords'])}
+
+### Missing Keywords
+{bullet_list(result['missing_keywords'])}
+
+## 🛠️ Skills Assessment
+
+### Present Skills
+{bullet_list(result['present_skills'])}
+
+### Missing Skills
+{bullet_list(result['missing_skills'])}
+
+## 💼 Experience Alignment
+- Years of experience: {years}
+
+*Generated by local keyword analysis while the AI service is unavailable.*
+"""
+
+
+def _presentation_score(text):
+    """Rough 0-10 presentation score from length, sections and bullet use"""
+    words = len(text.split())
+    score = 10 if 300 <= words <= 1200 else 7 if 150 <= words <= 2000 else 4
+    sections = sum(
+        1 for heading in ("experience", "education", "skills", "projects", "summary")
+        if heading in text.lower()
+    )
+    if sections < 3:
+        score -= 2
+    if not re.search(r"^\s*[•\-\*▪●]", text, re.MULTILINE):
+        score -= 1
+    return max(0, score)
+
+
+def local_comparison_scores(resume1_text, resume2_text, job_description, profile=None):
+    """
+    Side-by-side local scores for two resumes, ready for create_comparison_table
+
+    Args:
+        resume1_text: First resume text
+        resume2_text: Second resume text
+        job_description: Job description text
+        profile: Precomputed job profile, shared by both resumes
+
+    Returns:
+        tuple: (categories, resume1 scores, resume2 scores), scores on a 0-10 scale
+    """
+    categories = ["Keyword Match", "Technical Skills", "Experience Relevance", "Education", "Presentation"]
+    if profile is None:
+        profile = local_jd_profile(job_description)
+    scores = []
+    for resume_text in (resume1_text, resume2_text):
+        result = local_ats_match(resume_text, job_description, profile)
+        scores.append([
+            round(result["keyword"] / 10),
+            round(result["skills"] / 10),
+            round(result["experience"] / 10),
+            round(result["education"] / 10),
+            _presentation_score(resume_text),
+        ])
+    return categories, scores[0], scores[1]
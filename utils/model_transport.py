@@ -0,0 +1,364 @@
+"""
+Pooled Model Transport
+Keep-alive HTTPS connections to the Gemini REST API, pre-connected at startup and kept warm while idle
+"""
+import http.client
+import json
+import logging
+import os
+import select
+import ssl
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+# Idle connections kept open; extra concurrent calls open short-lived connections
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "8"))
+# Connections opened at process start and kept open through idle periods
+GEMINI_POOL_WARM = int(os.getenv("GEMINI_POOL_WARM", "2"))
+# Ping a connection after this many idle seconds so neither side drops it (0 disables)
+GEMINI_IDLE_PING = float(os.getenv("GEMINI_IDLE_PING", "45"))
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "120"))
+# Extra CA certificates, e.g. for a TLS-intercepting proxy or a local stub
+GEMINI_CA_BUNDLE = os.getenv("GEMINI_CA_BUNDLE")
+PING_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+TIMINGS_WINDOW = 200
+
+logger = logging.getLogger(__name__)
+
+# A reused connection the server already closed fails with one of these before any response
+STALE_CONNECTION_ERRORS = (ConnectionError, http.client.RemoteDisconnected, ssl.SSLEOFError, ssl.SSLZeroReturnError)
+
+
+def _is_dropped(conn):
+    """Whether the server closed an idle keep-alive connection"""
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        if not select.select([sock], [], [], 0)[0]:
+            return False
+        # Readable can also mean TLS 1.3 session tickets sent after the handshake;
+        # a non-blocking read consumes those and only reports a real close or data
+        sock.setblocking(False)
+        try:
+            sock.recv(1)
+            return True
+        except (ssl.SSLWantReadError, BlockingIOError):
+            return False
+        finally:
+            sock.settimeout(conn.timeout)
+    except (OSError, ValueError):
+        return True
+
+
+class TransportError(RuntimeError):
+    """Raised when the API returns an error or an unusable response"""
+
+
+class ConnectionPool:
+    """
+    Keep-alive connections to one API host
+
+    A background thread opens `warm` connections at start, keeps at least that
+    many open, and pings connections that have been idle for `idle_ping`
+    seconds. Each request records its connect time (DNS, TCP and TLS; zero on
+    a reused connection) and its time to first byte.
+    """
+
+    def __init__(self, base_url, api_key, size=GEMINI_POOL_SIZE, warm=GEMINI_POOL_WARM,
+                 idle_ping=GEMINI_IDLE_PING, timeout=GEMINI_REQUEST_TIMEOUT, ca_bundle=GEMINI_CA_BUNDLE):
+        """
+        Args:
+            base_url: API base URL, e.g. https://generativelanguage.googleapis.com/v1beta
+            api_key: Sent in the x-goog-api-key header
+            size: Maximum idle connections kept
+            warm: Connections kept open at all times
+            idle_ping: Idle seconds before a keep-alive ping (0 disables pings)
+            timeout: Socket timeout in seconds
+            ca_bundle: Optional CA file trusted in addition to the system store
+        """
+        url = urlsplit(base_url)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.base_path = url.path.rstrip("/")
+        self.api_key = api_key
+        self.size = size
+        self.warm = min(warm, size)
+        self.idle_ping = idle_ping
+        self.timeout = timeout
+        self.ssl_context = None
+        if self.scheme == "https":
+            self.ssl_context = ssl.create_default_context()
+            if ca_bundle:
+                self.ssl_context.load_verify_locations(ca_bundle)
+
+        self.lock = threading.Lock()
+        self.idle = []          # (connection, last used), most recently used last
+        self.busy = 0
+        self.closed = False
+        self.timings = deque(maxlen=TIMINGS_WINDOW)
+        self.counters = {
+            "connections_opened": 0, "requests": 0, "reused": 0,
+            "dropped": 0, "stale_retries": 0, "pings": 0, "ping_failures": 0,
+        }
+        self.first_request = None
+        self.connect_failing = False
+        self.keepalive = threading.Thread(target=self._keepalive_loop, name="gemini-transport", daemon=True)
+        self.keepalive.start()
+
+    def _open(self):
+        """Open and connect a new connection; returns (connection, connect seconds)"""
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.ssl_context)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        start = time.perf_counter()
+        conn.connect()
+        connect = time.perf_counter() - start
+        with self.lock:
+            self.counters["connections_opened"] += 1
+        return conn, connect
+
+    def _acquire(self):
+        """Most recently used idle connection the server has not closed, or None"""
+        with self.lock:
+            self.busy += 1
+            while self.idle:
+                conn = self.idle.pop()[0]
+                if not _is_dropped(conn):
+                    return conn
+                conn.close()
+                self.counters["dropped"] += 1
+            return None
+
+    def _release(self, conn, reusable):
+        """Return a connection to the pool, or close it"""
+        with self.lock:
+            self.busy -= 1
+            if conn is not None and reusable and not self.closed and len(self.idle) < self.size:
+                self.idle.append((conn, time.monotonic()))
+                return
+        if conn is not None:
+            conn.close()
+
+    def _send(self, conn, method, path, body):
+        """Send one request and read the whole response; returns (status, data, will_close, ttfb, stream)"""
+        headers = {"x-goog-api-key": self.api_key, "Connection": "keep-alive"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        conn.request(method, self.base_path + path, body=body, headers=headers)
+        response = conn.getresponse()
+        ttfb = time.perf_counter() - start
+        data = response.read()
+        return response.status, data, response.will_close, ttfb, time.perf_counter() - start - ttfb
+
+    def request(self, method, path, payload=None):
+        """
+        Send a request over a pooled connection
+
+        A warm connection the server has meanwhile closed is retried once on
+        a new connection.
+
+        Args:
+            method: HTTP method
+            path: Path below the base URL, e.g. "/models/gemini-2.0-flash:generateContent"
+            payload: JSON-serializable body, or None
+
+        Returns:
+            tuple: (status, parsed JSON body, timings dict with connect, ttfb, stream, total and reused)
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        start = time.perf_counter()
+        conn = self._acquire()
+        reused, connect = conn is not None, 0.0
+        try:
+            if conn is None:
+                conn, connect = self._open()
+            try:
+                status, data, will_close, ttfb, stream = self._send(conn, method, path, body)
+            except STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                with self.lock:
+                    self.counters["stale_retries"] += 1
+                conn, connect = self._open()
+                reused = False
+                status, data, will_close, ttfb, stream = self._send(conn, method, path, body)
+        except Exception:
+            self._release(conn, False)
+            raise
+        self._release(conn, not will_close)
+
+        timings = {"connect": connect, "ttfb": ttfb, "stream": stream, "total": time.perf_counter() - start, "reused": reused}
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["reused"] += reused
+            self.timings.append(timings)
+            if self.first_request is None:
+                self.first_request = timings
+        try:
+            parsed = json.loads(data) if data else {}
+        except ValueError:
+            parsed = {"error": {"message": data[:200].decode("utf-8", "replace")}}
+        return status, parsed, timings
+
+    def _ping(self, conn):
+        """Cheap metadata request on an idle connection; returns True if it can be kept"""
+        try:
+            status, data, will_close, _, _ = self._send(conn, "GET", f"/models/{PING_MODEL}", None)
+            return not will_close
+        except Exception as e:
+            logger.debug("Keep-alive ping failed: %s", e)
+            return False
+
+    def _keepalive_loop(self):
+        """Open warm connections and keep idle ones alive until the pool is closed"""
+        interval = max(0.05, min(self.idle_ping / 4, 5.0)) if self.idle_ping > 0 else 5.0
+        while not self.closed:
+            self._maintain()
+            time.sleep(interval)
+
+    def _maintain(self):
+        # Ping connections idle for too long
+        if self.idle_ping > 0:
+            now = time.monotonic()
+            with self.lock:
+                due = [entry for entry in self.idle if now - entry[1] >= self.idle_ping]
+                self.idle = [entry for entry in self.idle if now - entry[1] < self.idle_ping]
+            for conn, _ in due:
+                ok = self._ping(conn)
+                with self.lock:
+                    self.counters["pings"] += 1
+                    self.counters["ping_failures"] += not ok
+                    if ok and not self.closed and len(self.idle) < self.size:
+                        # Pinged connections go to the cold end so active ones stay in use
+                        self.idle.insert(0, (conn, time.monotonic()))
+                        continue
+                conn.close()
+
+        # Top up to the warm count
+        with self.lock:
+            missing = self.warm - len(self.idle) - self.busy
+        for _ in range(max(0, missing)):
+            try:
+                conn, _ = self._open()
+            except OSError as e:
+                # Warn once per outage; keep retrying quietly
+                (logger.debug if self.connect_failing else logger.warning)(
+                    "Could not pre-connect to %s: %s", self.host, e)
+                self.connect_failing = True
+                return
+            self.connect_failing = False
+            with self.lock:
+                if self.closed or len(self.idle) >= self.size:
+                    conn.close()
+                    return
+                self.idle.insert(0, (conn, time.monotonic()))
+
+    def wait_warm(self, timeout=10.0):
+        """Block until the warm connections are open (for scripts and tests)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if len(self.idle) + self.busy >= self.warm:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def stats(self):
+        """
+        Pool counters and connect/TTFB summary over recent requests
+
+        Returns:
+            dict: Counters, open connections, avg connect and TTFB in ms, and the first request's timings
+        """
+        with self.lock:
+            timings = list(self.timings)
+            stats = dict(self.counters, idle=len(self.idle), busy=self.busy)
+            first = self.first_request
+        cold = [t["connect"] for t in timings if not t["reused"]]
+        stats.update({
+            "cold_requests": len(cold),
+            "avg_connect_ms": round(sum(cold) / len(cold) * 1000, 1) if cold else 0.0,
+            "avg_ttfb_ms": round(sum(t["ttfb"] for t in timings) / len(timings) * 1000, 1) if timings else 0.0,
+            "first_request": {k: round(v * 1000, 1) if k != "reused" else v for k, v in first.items()} if first else None,
+        })
+        return stats
+
+    def close(self):
+        """Close all connections and stop the keep-alive thread"""
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+        for conn, _ in idle:
+            conn.close()
+
+
+class GeminiRestTransport:
+    """generateContent over a warm connection pool"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def generate(self, model_name, prompt):
+        """
+        Generate a response for a single-turn prompt
+
+        Args:
+            model_name: Gemini model name
+            prompt: Prompt text
+
+        Returns:
+            tuple: (response text, usage dict with prompt_tokens, output_tokens,
+                    connect_latency, ttfb and stream_latency)
+
+        Raises:
+            TransportError: On an API error or a response without text
+        """
+        status, body, timings = self.pool.request(
+            "POST", f"/models/{model_name}:generateContent",
+            {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        )
+        if status != 200:
+            error = body.get("error", {})
+            reasons = [d.get("reason") for d in error.get("details", []) if d.get("reason")]
+            detail = " ".join([str(status), error.get("status", "")] + reasons).strip()
+            raise TransportError(f"{detail}: {error.get('message', 'request failed')}")
+        candidates = body.get("candidates") or []
+        parts = (candidates[0].get("content") or {}).get("parts", []) if candidates else []
+        text = "".join(part.get("text", "") for part in parts)
+        if not text:
+            reason = (body.get("promptFeedback") or {}).get("blockReason") or (
+                candidates[0].get("finishReason") if candidates else "no candidates")
+            raise TransportError(f"Response contained no text ({reason})")
+        metadata = body.get("usageMetadata", {})
+        usage = {
+            "prompt_tokens": metadata.get("promptTokenCount"),
+            "output_tokens": metadata.get("candidatesTokenCount"),
+            "connect_latency": timings["connect"],
+            "ttfb": timings["ttfb"],
+            "stream_latency": timings["stream"],
+        }
+        return text, usage
+
+
+@lru_cache(maxsize=1)
+def get_transport():
+    """
+    Process-wide pooled transport; creating it starts pre-connecting
+
+    Returns:
+        GeminiRestTransport: Shared instance, or None without GOOGLE_API_KEY
+    """
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+    return GeminiRestTransport(ConnectionPool(GEMINI_API_BASE, api_key))
@@ -0,0 +1,158 @@
+"""
+Multi-Job Matching
+Scores one resume against many job descriptions concurrently and ranks the results
+"""
+import contextvars
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.dedup import text_key
+from utils.embeddings import evidence_coverage, requirement_evidence, resume_index
+from utils.gemini_client import last_call_info
+from utils.jd_profile import format_jd_profile, get_jd_profile
+from utils.local_analysis import local_ats_match, local_jd_profile
+from utils.prompts import get_job_fit_prompt
+from utils.scores import parse_ats_scores
+from utils.tracing import span
+
+
+MULTI_JD_MAX = int(os.getenv("MULTI_JD_MAX", "20"))
+# Model calls in flight at once for one multi-job run
+MULTI_JD_CONCURRENCY = int(os.getenv("MULTI_JD_CONCURRENCY", "4"))
+
+SEPARATOR_PATTERN = re.compile(r"^\s*(?:-{3,}|={3,})\s*$", re.MULTILINE)
+VERDICT_PATTERN = re.compile(r"\*\*Verdict:?\*\*:?\s*(.+)")
+GAPS_PATTERN = re.compile(r"\*\*Top Gaps:?\*\*:?\s*\n((?:\s*[-*•].+\n?)+)")
+SCORE_FIELDS = ("overall", "keyword", "skills", "experience", "education")
+
+
+def split_job_descriptions(text, limit=MULTI_JD_MAX):
+    """
+    Split pasted job descriptions on separator lines ("---" or "===")
+
+    Args:
+        text: Pasted text
+        limit: Maximum number of job descriptions kept
+
+    Returns:
+        list: Distinct non-empty job descriptions, in input order
+    """
+    seen, jobs = set(), []
+    for part in SEPARATOR_PATTERN.split(text or ""):
+        part = part.strip()
+        if part and text_key(part) not in seen:
+            seen.add(text_key(part))
+            jobs.append(part)
+    return jobs[:limit]
+
+
+def job_title(job_description, profile=None):
+    """Short label for a job: the profile's title, else the first line of the posting"""
+    if profile and profile.get("title"):
+        return profile["title"]
+    first_line = job_description.strip().splitlines()[0].strip(" #*:")
+    return first_line if len(first_line) <= 60 else first_line[:57] + "..."
+
+
+def _local_result(resume_text, job_description, profile):
+    """Job fit from the local keyword and skill matcher, in the model report layout"""
+    result = local_ats_match(resume_text, job_description, profile)
+    gaps = result["missing_skills"][:3] or result["missing_keywords"][:3]
+    report = (
+        f"Overall Match Score: {result['overall']}%\n"
+        f"- Keyword Match: {result['keyword']}%\n"
+        f"- Skills Match: {result['skills']}%\n"
+        f"- Experience Match: {result['experience']}%\n"
+        f"- Education Match: {result['education']}%\n\n"
+        "**Top Gaps:**\n" + ("\n".join(f"- {gap}" for gap in gaps) or "- None found")
+        + "\n\n*Generated by local keyword analysis.*"
+    )
+    return {field: result[field] for field in SCORE_FIELDS}, gaps, report
+
+
+def score_job(resume_text, job_description, generate=None):
+    """
+    Score a resume against one job description
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        generate: Cached model call (prompt, analysis_type=...) -> text; None scores locally
+
+    Returns:
+        dict: jd_hash, title, the five scores (0-100), verdict, gaps, report,
+              source ("model", "cache" or "local"), call_info, evidence (share of
+              requirements with semantic evidence, 0-100) and unsupported requirements
+    """
+    jd_hash = text_key(job_description)
+    with span("multi_jd.job", jd_hash=jd_hash) as job_span:
+        profile = get_jd_profile(job_description)
+        result = {"jd_hash": jd_hash, "title": job_title(job_description, profile), "verdict": None,
+                  "source": "local", "call_info": None}
+
+        response = None
+        if generate is not None:
+            requirements = format_jd_profile(profile) if profile else job_description
+            response = generate(get_job_fit_prompt(resume_text, requirements), analysis_type="jd_fit")
+            result["call_info"] = last_call_info()
+        scores = parse_ats_scores(response) if response and not response.startswith("Error") else {}
+
+        if scores.get("overall") is None:
+            # Unavailable service, an error or an unparseable answer: score this job locally
+            scores, gaps, response = _local_result(
+                resume_text, job_description, profile or local_jd_profile(job_description)
+            )
+        else:
+            verdict = VERDICT_PATTERN.search(response)
+            gap_lines = GAPS_PATTERN.search(response)
+            gaps = [line.strip(" -*•\t") for line in gap_lines.group(1).strip().splitlines()] if gap_lines else []
+            cached = bool(result["call_info"] and result["call_info"].get("cached"))
+            result.update(verdict=verdict.group(1).strip() if verdict else None,
+                          source="cache" if cached else "model")
+        result.update({field: scores.get(field) for field in SCORE_FIELDS}, gaps=gaps, report=response)
+        evidence = requirement_evidence(resume_text, job_description, profile)
+        result.update(evidence=evidence_coverage(evidence),
+                      unsupported=[item["requirement"] for item in evidence if not item["met"]][:5])
+        job_span.set(source=result["source"], overall=result["overall"])
+    return result
+
+
+def score_jobs(resume_text, job_descriptions, generate=None, max_in_flight=MULTI_JD_CONCURRENCY):
+    """
+    Score a resume against several job descriptions, yielding results as they finish
+
+    At most max_in_flight jobs (and so model calls) run at once. Job profiles
+    are cached per job description, so re-running a set of postings only pays
+    for the postings that are new.
+
+    Args:
+        resume_text: Extracted resume text
+        job_descriptions: Job description texts
+        generate: Cached model call; None scores every job locally
+        max_in_flight: Concurrency bound
+
+    Yields:
+        tuple: (index into job_descriptions, score_job result)
+    """
+    if not job_descriptions:
+        return
+    resume_index(resume_text)  # embed the resume once, before the jobs share it
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(job_descriptions))),
+                                  thread_name_prefix="multi-jd")
+    try:
+        # copy_context keeps each job's spans in the caller's trace
+        futures = {
+            executor.submit(contextvars.copy_context().run, score_job, resume_text, jd, generate): index
+            for index, jd in enumerate(job_descriptions)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def rank_results(results):
+    """Results sorted best match first (ties by evidence coverage, then title), with a 1-based "rank" added"""
+    ranked = sorted(results, key=lambda r: (-(r["overall"] or 0), -(r.get("evidence") or 0), r["title"]))
+    return [{**result, "rank": rank} for rank, result in enumerate(ranked, 1)]
@@ -0,0 +1,220 @@
+"""
+OCR Fallback
+Rasterizes pages without a text layer and reads them with Tesseract across a process pool
+"""
+import hashlib
+import multiprocessing
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+
+OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_PAGE_TIMEOUT = float(os.getenv("OCR_PAGE_TIMEOUT", "60"))
+OCR_WORKER_MEMORY_MB = int(os.getenv("OCR_WORKER_MEMORY_MB", "1024"))
+OCR_CACHE_PAGES = int(os.getenv("OCR_CACHE_PAGES", "500"))
+# Pages with fewer non-whitespace characters than this are treated as having no text layer
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", "10"))
+
+_page_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def ocr_available():
+    """
+    Whether the OCR toolchain is installed
+
+    Needs pytesseract with the tesseract binary, plus pypdfium2 or pdf2image
+    for rasterizing.
+
+    Returns:
+        bool: True if OCR can run
+    """
+    try:
+        import pytesseract
+    except ImportError:
+        return False
+    if not shutil.which(pytesseract.pytesseract.tesseract_cmd):
+        return False
+    for module in ("pypdfium2", "pdf2image"):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def pages_needing_ocr(pages, min_chars=OCR_MIN_CHARS):
+    """Indexes of pages whose extracted text is missing or too short"""
+    return [i for i, text in enumerate(pages) if len("".join(text.split())) < min_chars]
+
+
+def page_key(pdf_hash, index, dpi, lang):
+    """Cache key of one OCR'd page: document content hash, page number and OCR settings"""
+    return f"{pdf_hash}:{index}:{dpi}:{lang}"
+
+
+def render_page(pdf_bytes, index, dpi):
+    """
+    Rasterize one page to a grayscale PIL image
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        index: Zero-based page number
+        dpi: Render resolution
+
+    Returns:
+        PIL.Image.Image: Rendered page
+    """
+    try:
+        import pypdfium2
+    except ImportError:
+        from pdf2image import convert_from_bytes
+
+        return convert_from_bytes(
+            pdf_bytes, dpi=dpi, first_page=index + 1, last_page=index + 1, grayscale=True
+        )[0]
+
+    pdf = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        page = pdf[index]
+        try:
+            return page.render(scale=dpi / 72, grayscale=True).to_pil()
+        finally:
+            page.close()
+    finally:
+        pdf.close()
+
+
+def _init_worker(memory_mb):
+    from utils.pdf_sandbox import _apply_worker_limits
+
+    _apply_worker_limits(memory_mb, None)
+
+
+def _ocr_page(pdf_bytes, index, dpi, lang, timeout):
+    """Render and OCR one page; runs in a pool worker"""
+    import pytesseract
+
+    image = render_page(pdf_bytes, index, dpi)
+    text = pytesseract.image_to_string(image, lang=lang, timeout=timeout).replace("\f", "")
+    return text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+
+
+def create_ocr_executor(workers=OCR_WORKERS, memory_mb=OCR_WORKER_MEMORY_MB):
+    """
+    Process pool for OCR jobs
+
+    Args:
+        workers: Number of OCR processes
+        memory_mb: Address-space limit per process
+
+    Returns:
+        ProcessPoolExecutor: Pool using the spawn start method
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(memory_mb,)
+    )
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _page_cache:
+            _page_cache.move_to_end(key)
+            return _page_cache[key]
+    return None
+
+
+def _cache_put(key, text):
+    with _cache_lock:
+        _page_cache[key] = text
+        _page_cache.move_to_end(key)
+        while len(_page_cache) > OCR_CACHE_PAGES:
+            _page_cache.popitem(last=False)
+
+
+def ocr_pages(pdf_bytes, indexes, executor, dpi=OCR_DPI, lang=OCR_LANG, timeout=OCR_PAGE_TIMEOUT):
+    """
+    OCR the given pages, yielding each one as soon as it is ready
+
+    Cached pages are yielded first. The rest are submitted in page order, so
+    early pages tend to finish first; a page that fails or times out yields
+    None and is not cached.
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        indexes: Zero-based page numbers to OCR
+        executor: Pool from create_ocr_executor
+        dpi: Render resolution; higher is more accurate but slower
+        lang: Tesseract language code(s), e.g. "eng" or "eng+deu"
+        timeout: Seconds allowed per page
+
+    Yields:
+        tuple: (page index, text or None, cached)
+
+    Raises:
+        BrokenProcessPool: If a worker died, so the caller can replace the pool
+    """
+    pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    futures = {}
+    for index in indexes:
+        key = page_key(pdf_hash, index, dpi, lang)
+        cached = _cache_get(key)
+        if cached is not None:
+            yield index, cached, True
+            continue
+        futures[executor.submit(_ocr_page, pdf_bytes, index, dpi, lang, timeout)] = (index, key)
+
+    for future in as_completed(futures):
+        index, key = futures[future]
+        try:
+            text = future.result()
+        except BrokenProcessPool:
+            raise
+        except Exception:
+            yield index, None, False
+            continue
+        _cache_put(key, text)
+        yield index, text, False
+
+
+def fill_missing_pages(pdf_bytes, pages, executor, on_page=None, **settings):
+    """
+    Replace pages without a text layer by their OCR text
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        pages: Page texts from the text extractor (not modified)
+        executor: Pool from create_ocr_executor
+        on_page: Optional progress callback(index, text, done, total) run as each
+            page arrives; the pages are only returned once all are done
+        **settings: dpi, lang or timeout overrides for ocr_pages
+
+    Returns:
+        tuple: (list of page texts, number of pages with OCR text, number of pages that failed)
+
+    Raises:
+        BrokenProcessPool: If a worker died, so the caller can replace the pool
+    """
+    indexes = pages_needing_ocr(pages)
+    filled = list(pages)
+    ocr_count = failed = 0
+    for done, (index, text, _) in enumerate(ocr_pages(pdf_bytes, indexes, executor, **settings), start=1):
+        if text is None:
+            failed += 1
+        elif text.strip():
+            filled[index] = text if text.endswith("\n") else text + "\n"
+            ocr_count += 1
+        if on_page:
+            on_page(index, text or "", done, len(indexes))
+    return filled, ocr_count, failed
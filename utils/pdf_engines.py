@@ -0,0 +1,313 @@
+"""
+PDF Extraction Engines
+Interchangeable text extraction backends, an engine benchmark and automatic engine selection
+"""
+import difflib
+import io
+import json
+import os
+import re
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# "auto" picks the fastest engine that passed the quality check in the last benchmark
+PDF_ENGINE = os.getenv("PDF_ENGINE", "auto").lower()
+PDF_ENGINE_PROFILE = os.getenv(
+    "PDF_ENGINE_PROFILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".pdf_engine_benchmark.json")
+)
+QUALITY_THRESHOLD = float(os.getenv("PDF_ENGINE_QUALITY", "0.9"))
+
+# Used by "auto" when no benchmark profile exists yet
+ENGINE_PREFERENCE = ["pypdfium2", "pdfminer", "pypdf2"]
+
+READABLE_TOKEN = re.compile(r"^[A-Za-z][A-Za-z'.+#-]*$")
+
+
+def clean_page_text(page_text):
+    """Remove invalid surrogate characters that cause encoding issues"""
+    return page_text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
+
+
+def _pypdf2_pages(pdf_bytes, max_pages, on_page=None):
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_count = len(pdf_reader.pages)
+    total = min(page_count, max_pages)
+    pages = []
+    for page in pdf_reader.pages[:max_pages]:
+        try:
+            page_text = page.extract_text()
+            pages.append(clean_page_text(page_text) if page_text else "")
+        except Exception:
+            # Skip problematic pages but continue with others
+            pages.append("")
+        if on_page:
+            on_page(len(pages), total)
+    return pages, page_count
+
+
+def _pypdf2_count(pdf_bytes):
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    _ = pdf_reader.pages[0]
+    return len(pdf_reader.pages)
+
+
+def _pypdfium2_pages(pdf_bytes, max_pages, on_page=None):
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        page_count = len(pdf)
+        total = min(page_count, max_pages)
+        pages = []
+        for index in range(total):
+            page = pdf[index]
+            try:
+                text_page = page.get_textpage()
+                page_text = text_page.get_text_range().replace("\r\n", "\n")
+                text_page.close()
+                pages.append(clean_page_text(page_text) + "\n" if page_text.strip() else "")
+            except Exception:
+                pages.append("")
+            finally:
+                page.close()
+            if on_page:
+                on_page(len(pages), total)
+        return pages, page_count
+    finally:
+        pdf.close()
+
+
+def _pypdfium2_count(pdf_bytes):
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(pdf_bytes)
+    try:
+        if not len(pdf):
+            raise ValueError("PDF has no pages")
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pdfminer_pages(pdf_bytes, max_pages, on_page=None):
+    from pdfminer.high_level import extract_pages as layout_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+
+    page_count = _pdfminer_count(pdf_bytes)
+    total = min(page_count, max_pages)
+    pages = []
+    # Layout analysis groups text into boxes, which keeps two-column resumes in reading order
+    for layout in layout_pages(io.BytesIO(pdf_bytes), maxpages=max_pages, laparams=LAParams()):
+        page_text = "".join(item.get_text() for item in layout if isinstance(item, LTTextContainer))
+        pages.append(clean_page_text(page_text) if page_text.strip() else "")
+        if on_page:
+            on_page(len(pages), total)
+    return pages, page_count
+
+
+def _pdfminer_count(pdf_bytes):
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    document = PDFDocument(PDFParser(io.BytesIO(pdf_bytes)))
+    count = resolve1(resolve1(document.catalog["Pages"])["Count"])
+    if not count:
+        raise ValueError("PDF has no pages")
+    return int(count)
+
+
+# name -> (module to import, page extractor, page counter)
+ENGINES = {
+    "pypdf2": ("PyPDF2", _pypdf2_pages, _pypdf2_count),
+    "pypdfium2": ("pypdfium2", _pypdfium2_pages, _pypdfium2_count),
+    "pdfminer": ("pdfminer", _pdfminer_pages, _pdfminer_count),
+}
+
+
+def available_engines():
+    """
+    Engines whose backing library is installed
+
+    Returns:
+        list: Engine names in preference order
+    """
+    names = []
+    for name in ENGINE_PREFERENCE:
+        try:
+            __import__(ENGINES[name][0])
+            names.append(name)
+        except ImportError:
+            continue
+    return names
+
+
+def load_profile(path=PDF_ENGINE_PROFILE):
+    """Saved benchmark results, or None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def resolve_engine(name=PDF_ENGINE, profile_path=PDF_ENGINE_PROFILE):
+    """
+    Concrete engine name for a configured name
+
+    "auto" selects the fastest installed engine that passed the quality check
+    in the saved benchmark profile, falling back to ENGINE_PREFERENCE order.
+
+    Args:
+        name: Engine name or "auto"
+        profile_path: Benchmark profile written by save_profile
+
+    Returns:
+        str: Installed engine name
+    """
+    installed = available_engines()
+    if name != "auto":
+        if name not in ENGINES:
+            raise ValueError(f"Unknown PDF engine '{name}'. Choose from: auto, {', '.join(ENGINES)}")
+        if name not in installed:
+            raise ValueError(f"PDF engine '{name}' is not installed")
+        return name
+
+    profile = load_profile(profile_path)
+    if profile and profile.get("selected") in installed:
+        return profile["selected"]
+    return installed[0] if installed else "pypdf2"
+
+
+def extract_pages(pdf_bytes, max_pages, engine="pypdf2", on_page=None):
+    """
+    Extract cleaned text per page with the given engine
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        max_pages: Stop after this many pages
+        engine: Concrete engine name
+        on_page: Optional progress callback(pages done, pages to extract)
+
+    Returns:
+        tuple: (list of page texts, total page count)
+    """
+    return ENGINES[engine][1](pdf_bytes, max_pages, on_page)
+
+
+def count_pages(pdf_bytes, engine="pypdf2"):
+    """Number of pages, raising if the PDF cannot be parsed"""
+    return ENGINES[engine][2](pdf_bytes)
+
+
+def text_quality(text, reference=None):
+    """
+    Score extracted text between 0 and 1
+
+    With a reference text the score is the word-sequence similarity, so
+    missing words and scrambled reading order both lower it. Without one it
+    is the share of tokens that look like readable words.
+
+    Args:
+        text: Extracted text
+        reference: Expected text, if known
+
+    Returns:
+        float: Quality score
+    """
+    words = text.split()
+    if reference is not None:
+        expected = reference.split()
+        if not expected:
+            return 1.0 if not words else 0.0
+        return difflib.SequenceMatcher(None, expected, words, autojunk=False).ratio()
+    if not words:
+        return 0.0
+    readable = sum(1 for word in words if READABLE_TOKEN.match(word.strip(",;:()")))
+    return readable / len(words)
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return 0.0
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _benchmark_one(engine, corpus, max_pages, repeat):
+    """Run one engine over the corpus; meant to run in a fresh process"""
+    __import__(ENGINES[engine][0])
+    rss_before = _peak_rss_mb()
+    pages_done = 0
+    scores = []
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for pdf_bytes, reference in corpus:
+            try:
+                pages, _ = extract_pages(pdf_bytes, max_pages, engine)
+            except Exception:
+                errors += 1
+                scores.append(0.0)
+                continue
+            pages_done += len(pages)
+            scores.append(text_quality("".join(pages), reference))
+    seconds = time.perf_counter() - start
+    return {
+        "engine": engine,
+        "pages": pages_done,
+        "seconds": round(seconds, 4),
+        "pages_per_second": round(pages_done / seconds, 1) if seconds else 0.0,
+        "peak_memory_mb": round(max(_peak_rss_mb() - rss_before, 0.0), 1),
+        "quality": round(min(scores), 3) if scores else 0.0,
+        "mean_quality": round(sum(scores) / len(scores), 3) if scores else 0.0,
+        "errors": errors,
+    }
+
+
+def benchmark_engines(corpus, engines=None, max_pages=50, repeat=1, threshold=QUALITY_THRESHOLD):
+    """
+    Benchmark installed engines over a sample corpus
+
+    Each engine runs in its own subprocess so memory figures are not mixed.
+
+    Args:
+        corpus: List of (pdf_bytes, reference text or None)
+        engines: Engine names to try (default: all installed)
+        max_pages: Page limit per document
+        repeat: Passes over the corpus
+        threshold: Minimum worst-document quality to qualify
+
+    Returns:
+        dict: {"results": [...], "selected": fastest qualifying engine or None, "threshold": ...}
+    """
+    import multiprocessing
+
+    engines = engines or available_engines()
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for engine in engines:
+        with context.Pool(1) as pool:
+            result = pool.apply(_benchmark_one, (engine, corpus, max_pages, repeat))
+        result["passed"] = result["quality"] >= threshold and not result["errors"]
+        results.append(result)
+
+    qualified = [r for r in results if r["passed"]]
+    selected = max(qualified, key=lambda r: r["pages_per_second"])["engine"] if qualified else None
+    return {"results": results, "selected": selected, "threshold": threshold}
+
+
+def save_profile(report, path=PDF_ENGINE_PROFILE):
+    """Persist a benchmark report so "auto" uses its selection"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -2,11 +2,200 @@
 PDF Processing Utilities
 Handles PDF text extraction and validation
 """
-import PyPDF2
-import io
+import atexit
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
 import streamlit as st
 
+from utils.cache import get_cache
+from utils.document import Document
+from utils.ocr import OCR_ENABLED, create_ocr_executor, fill_missing_pages, ocr_available, pages_needing_ocr
+from utils.pdf_engines import resolve_engine, count_pages
+from utils.pdf_sandbox import ExtractionPool, extract_pages, PDF_MAX_BYTES
+from utils.profiler import annotate_profile
+from utils.tracing import set_attributes, span, traced
+
+
+# Parse PDFs in sandboxed subprocess workers instead of the server process
+PDF_SANDBOX = os.getenv("PDF_SANDBOX", "true").lower() in ("1", "true", "yes")
+# Extracted documents kept in memory, shared by all sessions
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "64"))
+PDF_CACHE_TTL = int(os.getenv("PDF_CACHE_TTL", str(7 * 24 * 3600)))
+
+_documents = OrderedDict()
+_documents_lock = threading.Lock()
+
+
+@st.cache_resource
+def get_pdf_engine():
+    """
+    Resolve the configured extraction engine once per process (cached)
+    
+    Returns:
+        str: Engine name, e.g. "pypdfium2"
+    """
+    return resolve_engine()
+
+
+@st.cache_resource
+def get_extraction_pool():
+    """
+    Get the process-wide sandboxed extraction pool (cached)
+    
+    Returns:
+        ExtractionPool: Shared worker pool
+    """
+    pool = ExtractionPool(engine=get_pdf_engine())
+    atexit.register(pool.shutdown)
+    return pool
+
+
+@st.cache_resource
+def get_ocr_executor():
+    """
+    Get the process-wide OCR process pool (cached), or None if OCR is unavailable
+    
+    Returns:
+        ProcessPoolExecutor: Shared OCR pool
+    """
+    if not (OCR_ENABLED and ocr_available()):
+        return None
+    executor = create_ocr_executor()
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+
+def _read_bytes(pdf_file):
+    """Read an uploaded file object as bytes without moving its position"""
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    position = pdf_file.tell()
+    pdf_file.seek(0)
+    data = pdf_file.read()
+    pdf_file.seek(position)
+    return data
+
+
+def _extract_pages(pdf_bytes, on_page=None):
+    """
+    Extract page texts, in the sandbox pool when enabled
+    
+    Returns:
+        tuple: (list of page texts, total page count)
+    """
+    if PDF_SANDBOX:
+        return get_extraction_pool().extract(pdf_bytes, on_page)
+    if len(pdf_bytes) > PDF_MAX_BYTES:
+        raise ValueError(f"PDF is larger than the {PDF_MAX_BYTES // (1024 * 1024)} MB limit")
+    return extract_pages(pdf_bytes, engine=get_pdf_engine(), on_page=on_page)
+
+
+def count_pdf_pages(pdf_bytes):
+    """
+    Page count of a PDF, in the sandbox pool when enabled
+    
+    Raises:
+        Exception: If the file is not a readable PDF
+    """
+    if PDF_SANDBOX:
+        return get_extraction_pool().count_pages(pdf_bytes)
+    return count_pages(pdf_bytes, get_pdf_engine())
+
+
+def _ocr_missing_pages(pdf_bytes, pages, on_ocr_page=None):
+    """
+    OCR pages without a text layer, replacing the OCR pool once if a worker died
+    
+    Returns:
+        tuple: (page texts, number of pages with OCR text, number of pages that failed)
+    """
+    for _ in range(2):
+        try:
+            return fill_missing_pages(pdf_bytes, pages, get_ocr_executor(), on_page=on_ocr_page)
+        except BrokenProcessPool:
+            # The cached pool is unusable from now on; pages finished before the crash are in the OCR cache
+            get_ocr_executor.clear()
+    return pages, 0, len(pages_needing_ocr(pages))
 
+
+def _extract_document(pdf_bytes, pdf_hash, on_ocr_page=None, on_page=None):
+    """
+    Loader for Document: extract pages and OCR those without a text layer
+    
+    Results are shared through the "pdf" cache, so other replicas reuse them.
+    A result with failed or timed-out OCR pages is neither cached nor kept
+    as the shared Document, so the next load tries those pages again.
+    
+    Returns:
+        tuple: (page texts, total page count, number of OCR'd pages)
+    """
+    ocr_failed = []
+
+    def extract():
+        with span("pdf.parse", engine=get_pdf_engine(), sandbox=PDF_SANDBOX, bytes=len(pdf_bytes)):
+            pages, page_count = _extract_pages(pdf_bytes, on_page)
+        ocr_count = 0
+        if get_ocr_executor() and pages_needing_ocr(pages):
+            with span("pdf.ocr", pages=len(pages_needing_ocr(pages))) as ocr_span:
+                pages, ocr_count, failed = _ocr_missing_pages(pdf_bytes, pages, on_ocr_page)
+                ocr_span.set(failed=failed)
+            if failed:
+                ocr_failed.append(failed)
+        return [pages, page_count, ocr_count]
+    
+    # Documents are the local tier, so only the shared tier is used here
+    cache = get_cache("pdf", ttl=PDF_CACHE_TTL, local_size=0)
+    with span("pdf.load", pdf_hash=pdf_hash):
+        pages, page_count, ocr_count = cache.get_or_compute(
+            (pdf_hash, get_pdf_engine(), get_ocr_executor() is not None), extract,
+            should_cache=lambda result: not ocr_failed
+        )
+    if ocr_failed:
+        with _documents_lock:
+            _documents.pop(pdf_hash, None)
+    return pages, page_count, ocr_count
+
+
+def load_document(pdf_bytes, on_ocr_page=None, on_page=None):
+    """
+    Shared lazily extracted Document for a PDF, keyed by content hash
+    
+    Every session and background job that sees the same file gets the same
+    Document, so the text is extracted and held in memory once. Progress
+    callbacks are those of the caller that first created the Document.
+    
+    Args:
+        pdf_bytes: PDF file as bytes
+        on_ocr_page: Optional OCR progress callback(index, text, done, total)
+        on_page: Optional extraction progress callback(pages done, pages to extract)
+        
+    Returns:
+        Document: Extracted on first access to its pages or text
+    """
+    key = hashlib.sha256(pdf_bytes).hexdigest()
+    with _documents_lock:
+        document = _documents.get(key)
+        if document is None:
+            document = Document(loader=partial(_extract_document, pdf_bytes, key, on_ocr_page, on_page))
+            _documents[key] = document
+        _documents.move_to_end(key)
+        while len(_documents) > DOCUMENT_CACHE_SIZE:
+            _documents.popitem(last=False)
+    return document
+
+
+def is_current_document(pdf_hash, document):
+    """Whether document is still the shared Document for pdf_hash (not evicted or dropped after failed OCR)"""
+    with _documents_lock:
+        return _documents.get(pdf_hash) is document
+
+
+@traced("pdf.extract_text")
 def extract_text_from_pdf(pdf_file):
     """
     Extract text content from a PDF file with robust error handling
@@ -15,39 +204,64 @@ def extract_text_from_pdf(pdf_file):
         pdf_file: Uploaded PDF file object
         
     Returns:
-        str: Extracted text content
+        Document: Extracted document (use str() or .text for the full text), or None
     """
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
+        progress = {}
         
-        for page_num, page in enumerate(pdf_reader.pages):
-            try:
-                # Extract text from page
-                page_text = page.extract_text()
-                
-                # Clean invalid surrogate characters
-                if page_text:
-                    # Remove surrogate pairs that cause encoding issues
-                    page_text = page_text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                    text += page_text
-                    
-            except Exception as page_error:
-                # Skip problematic pages silently but continue with others
-                continue
+        def on_ocr_page(index, page_text, done, total):
+            if "bar" not in progress:
+                progress["bar"] = st.progress(0.0, text="🔍 Scanned pages found, running OCR...")
+            progress["bar"].progress(done / total, text=f"🔍 OCR: page {index + 1} ready ({done}/{total})")
         
-        if not text.strip():
-            st.error("❌ No text could be extracted from the PDF. It might be a scanned image or encrypted.")
-            return None
-            
-        return text.strip()
+        document = load_document(_read_bytes(pdf_file), on_ocr_page)
+        document.has_text()
+        if "bar" in progress:
+            progress["bar"].empty()
+        return report_extraction(document)
     
     except Exception as e:
-        st.error(f"❌ Error reading PDF file: {str(e)}")
-        st.info("💡 Try: 1) Re-saving the PDF, 2) Using a different PDF, or 3) Converting to a text-based PDF")
+        report_extraction_error(e)
+        return None
+
+
+def report_extraction(document):
+    """
+    Show the notices for an extracted document (no text, OCR'd or skipped pages)
+    
+    Args:
+        document: Loaded Document
+        
+    Returns:
+        Document: The document, or None if it has no text
+    """
+    if not document.has_text():
+        if get_ocr_executor():
+            st.error("❌ No text could be extracted from the PDF, even with OCR. It might be blank or encrypted.")
+        else:
+            st.error("❌ No text could be extracted from the PDF. It might be a scanned image or encrypted.")
+            st.info("💡 Install Tesseract and pytesseract to read scanned resumes with OCR")
         return None
+    
+    set_attributes(pages=len(document.pages), page_count=document.page_count,
+                   ocr_pages=document.ocr_pages, chars=len(document))
+    annotate_profile(pdf_pages=document.page_count)
+    if document.ocr_pages:
+        st.info(f"🔍 Text for {document.ocr_pages} scanned page(s) was recognized with OCR. Please double-check it.")
+    
+    if document.truncated:
+        st.warning(f"⚠️ Only the first {len(document.pages)} of {document.page_count} pages were processed.")
+    
+    return document
+
+
+def report_extraction_error(error):
+    """Show an extraction failure with tips for fixing the file"""
+    st.error(f"❌ Error reading PDF file: {str(error)}")
+    st.info("💡 Try: 1) Re-saving the PDF, 2) Using a different PDF, or 3) Converting to a text-based PDF")
 
 
+@traced("pdf.validate")
 def validate_pdf(pdf_file):
     """
     Validate if the uploaded file is a valid PDF
@@ -59,10 +273,7 @@ def validate_pdf(pdf_file):
         bool: True if valid PDF, False otherwise
     """
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        # Try to access first page
-        _ = pdf_reader.pages[0]
-        pdf_file.seek(0)
+        count_pdf_pages(_read_bytes(pdf_file))
         return True
     
     except Exception as e:
@@ -70,7 +281,6 @@ def validate_pdf(pdf_file):
         return False
 
 
-@st.cache_data
 def process_pdf_cached(pdf_bytes):
     """
     Cached version of PDF processing to avoid re-processing same file
@@ -82,21 +292,7 @@ def process_pdf_cached(pdf_bytes):
         str: Extracted text content
     """
     try:
-        pdf_file = io.BytesIO(pdf_bytes)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        
-        for page in pdf_reader.pages:
-            try:
-                page_text = page.extract_text()
-                if page_text:
-                    # Clean invalid surrogate characters
-                    page_text = page_text.encode('utf-8', errors='ignore').decode('utf-8', errors='ignore')
-                    text += page_text
-            except:
-                continue
-        
-        return text.strip()
+        return load_document(pdf_bytes).text
     
     except Exception as e:
         return f"Error: {str(e)}"
@@ -0,0 +1,251 @@
+"""
+Sandboxed PDF Extraction
+Runs PDF parsing in a pool of reusable subprocess workers with timeouts and resource limits
+"""
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from utils import pdf_engines
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+PDF_JOB_TIMEOUT = float(os.getenv("PDF_JOB_TIMEOUT", "15"))
+PDF_WORKER_MEMORY_MB = int(os.getenv("PDF_WORKER_MEMORY_MB", "768"))
+PDF_WORKER_CPU_SECONDS = int(os.getenv("PDF_WORKER_CPU_SECONDS", "15"))
+# Lifetime CPU seconds per worker; it is recycled once a full job no longer fits
+PDF_WORKER_CPU_BUDGET = int(os.getenv("PDF_WORKER_CPU_BUDGET", "600"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_MB", "20")) * 1024 * 1024
+PDF_MAX_JOBS_PER_WORKER = int(os.getenv("PDF_MAX_JOBS_PER_WORKER", "200"))
+
+
+class ExtractionError(Exception):
+    """Raised when a PDF cannot be processed within the sandbox limits"""
+
+
+def extract_pages(pdf_bytes, max_pages=PDF_MAX_PAGES, engine="pypdf2", on_page=None):
+    """
+    Extract cleaned text per page in the current process
+
+    Pages that fail to extract are returned as empty strings.
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        max_pages: Stop after this many pages
+        engine: Extraction engine name (see utils.pdf_engines)
+        on_page: Optional progress callback(pages done, pages to extract)
+
+    Returns:
+        tuple: (list of page texts, total page count)
+    """
+    return pdf_engines.extract_pages(pdf_bytes, max_pages, engine, on_page)
+
+
+def _cpu_spent():
+    # Rounded up: CPU limits are whole seconds, so a job still gets at least cpu_seconds
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    return math.ceil(used.ru_utime + used.ru_stime)
+
+
+def _apply_worker_limits(memory_mb, cpu_budget):
+    """
+    Cap address space and lifetime CPU time once, when the worker starts
+
+    Hard limits can be lowered but never raised again by an unprivileged
+    process, so the CPU hard limit is the worker's whole budget.
+
+    Returns:
+        int: CPU hard limit in seconds, or None if unlimited
+    """
+    if resource is None:
+        return None
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_budget:
+        hard = cpu_budget if hard == resource.RLIM_INFINITY else min(hard, cpu_budget)
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+    return None if hard == resource.RLIM_INFINITY else hard
+
+
+def _apply_job_limit(cpu_seconds, cpu_hard):
+    """Move the CPU soft limit to cpu_seconds past what this worker has used so far"""
+    if resource is None or not cpu_seconds:
+        return
+    soft = _cpu_spent() + cpu_seconds
+    # Exceeding the soft limit delivers SIGXCPU, which ends the worker
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if cpu_hard is None else min(soft, cpu_hard),
+                                             resource.RLIM_INFINITY if cpu_hard is None else cpu_hard))
+
+
+def _budget_spent(cpu_seconds, cpu_hard):
+    """Whether the worker's CPU budget can no longer cover a full job"""
+    return resource is not None and cpu_hard is not None and cpu_hard - _cpu_spent() < cpu_seconds
+
+
+def _worker_main(conn, memory_mb, cpu_seconds, max_pages, engine, cpu_budget):
+    """
+    Worker loop: receive (operation, bytes) jobs, send ("page", progress) messages, then the result
+
+    Messages are (status, payload, retire) tuples; retire asks the parent to
+    replace this worker because its CPU budget is used up.
+    """
+    cpu_hard = _apply_worker_limits(memory_mb, cpu_budget)
+    while True:
+        try:
+            operation, pdf_bytes = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            _apply_job_limit(cpu_seconds, cpu_hard)
+            if operation == "extract":
+                result = ("ok", pdf_engines.extract_pages(
+                    pdf_bytes, max_pages, engine,
+                    on_page=lambda done, total: conn.send(("page", (done, total), False))
+                ))
+            else:
+                result = ("ok", pdf_engines.count_pages(pdf_bytes, engine))
+        except MemoryError:
+            result = ("error", "PDF exceeded the memory limit for extraction")
+        except Exception as e:
+            result = ("error", str(e))
+        conn.send(result + (_budget_spent(cpu_seconds, cpu_hard),))
+
+
+class _Worker:
+    """One sandboxed extraction subprocess and its pipe"""
+
+    def __init__(self, context, limits):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn,) + limits, daemon=True, name="pdf-extract"
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    Pool of reusable extraction subprocesses
+
+    Each job has a wall-clock timeout; workers run under address-space and
+    CPU-time limits. A worker that times out, crashes or hits a limit is
+    killed and replaced, so a hostile PDF cannot slow down other jobs.
+    """
+
+    def __init__(self, size=PDF_WORKERS, timeout=PDF_JOB_TIMEOUT, memory_mb=PDF_WORKER_MEMORY_MB,
+                 cpu_seconds=PDF_WORKER_CPU_SECONDS, max_pages=PDF_MAX_PAGES,
+                 max_bytes=PDF_MAX_BYTES, max_jobs_per_worker=PDF_MAX_JOBS_PER_WORKER, engine=None,
+                 cpu_budget=PDF_WORKER_CPU_BUDGET):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.engine = engine or pdf_engines.resolve_engine()
+        self.limits = (memory_mb, cpu_seconds, max_pages, self.engine, max(cpu_budget, cpu_seconds))
+        self.context = multiprocessing.get_context("spawn")
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = set()
+        self.replaced = 0
+        for _ in range(size):
+            self._spawn()
+
+    def _spawn(self):
+        worker = _Worker(self.context, self.limits)
+        with self.lock:
+            self.workers.add(worker)
+        self.idle.put(worker)
+
+    def _replace(self, worker):
+        worker.kill()
+        with self.lock:
+            self.workers.discard(worker)
+            self.replaced += 1
+        self._spawn()
+
+    def _run(self, operation, pdf_bytes, on_page=None):
+        if len(pdf_bytes) > self.max_bytes:
+            raise ExtractionError(f"PDF is larger than the {self.max_bytes // (1024 * 1024)} MB limit")
+
+        while True:
+            try:
+                worker = self.idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise ExtractionError("All PDF extraction workers are busy, please try again")
+            if worker.process.is_alive():
+                break
+            self._replace(worker)
+
+        # A worker left mid-job (timeout, crash, or an on_page callback raising,
+        # e.g. a Streamlit rerun) may still write to its pipe, so it is replaced
+        finished = retire = False
+        try:
+            worker.conn.send((operation, pdf_bytes))
+            # The time limit covers the whole job, however many page messages arrive
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if not worker.conn.poll(max(deadline - time.monotonic(), 0)):
+                    raise ExtractionError(f"PDF processing exceeded the {self.timeout:g}s time limit")
+                status, payload, retire = worker.conn.recv()
+                if status != "page":
+                    break
+                if on_page:
+                    on_page(*payload)
+            finished = True
+        except (EOFError, OSError, BrokenPipeError):
+            raise ExtractionError("PDF processing was stopped for exceeding resource limits")
+        finally:
+            worker.jobs += finished
+            if not finished or retire or worker.jobs >= self.max_jobs_per_worker:
+                self._replace(worker)
+            else:
+                self.idle.put(worker)
+
+        if status != "ok":
+            raise ExtractionError(payload)
+        return payload
+
+    def extract(self, pdf_bytes, on_page=None):
+        """
+        Extract page texts in a sandboxed worker
+
+        Args:
+            pdf_bytes: PDF file as bytes
+            on_page: Optional progress callback(pages done, pages to extract), run in this process
+
+        Returns:
+            tuple: (list of page texts, total page count)
+
+        Raises:
+            ExtractionError: On invalid PDFs, timeouts or exceeded limits
+        """
+        return self._run("extract", pdf_bytes, on_page)
+
+    def count_pages(self, pdf_bytes):
+        """Page count from a sandboxed worker, raising ExtractionError if unreadable"""
+        return self._run("validate", pdf_bytes)
+
+    def shutdown(self):
+        """Stop all workers"""
+        with self.lock:
+            workers = list(self.workers)
+            self.workers.clear()
+        for worker in workers:
+            worker.kill()
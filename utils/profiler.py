@@ -0,0 +1,299 @@
+"""
+Sampling Profiler
+On-demand stack sampling with collapsed-stack and flamegraph output, for admins diagnosing slow reruns
+"""
+import contextvars
+import hmac
+import html
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+
+# Captures are only offered to requests presenting this token; empty disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+)
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "120"))
+
+# Leaf frames of threads parked waiting for work; dropped from whole-process captures
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),  # ThreadPoolExecutor worker blocked in SimpleQueue.get
+    ("connection.py", "wait"),
+}
+
+_active = contextvars.ContextVar("active_profile", default=None)
+
+
+def check_admin_token(token):
+    """
+    Check an admin token in constant time
+
+    Returns:
+        bool: True when ADMIN_TOKEN is set and the token matches it
+    """
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(str(token), ADMIN_TOKEN)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples Python stacks of selected threads from a background thread
+
+    The sampled code is not instrumented: every interval the sampler reads
+    sys._current_frames() and counts the stacks, so the cost is one stack
+    walk per thread per sample and nothing at all while stopped.
+    """
+
+    def __init__(self, thread_ids=None, interval=PROFILE_INTERVAL_MS / 1000, include_idle=None):
+        """
+        Args:
+            thread_ids: Threads to sample; None samples every thread but the sampler
+            interval: Seconds between samples
+            include_idle: Keep samples of threads waiting for work (default: only
+                          when specific threads are sampled)
+        """
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.interval = interval
+        self.include_idle = self.thread_ids is not None if include_idle is None else include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampler_cpu = 0.0
+        self.started = self.stopped = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling; returns the Counter of collapsed stacks"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped = time.perf_counter()
+        return self.stacks
+
+    @property
+    def duration(self):
+        return (self.stopped or time.perf_counter()) - (self.started or time.perf_counter())
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        cpu_start = time.thread_time()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, frame in frames.items():
+                if thread_id == own or (self.thread_ids and thread_id not in self.thread_ids):
+                    continue
+                if not self.include_idle and (
+                        os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if self.thread_ids is None:
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    # Thread pools share code, so keep the pool prefix and drop the worker number
+                    stack.append(re.sub(r"[_-]\d+$", "", names.get(thread_id, str(thread_id))))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            del frames
+        self.sampler_cpu = time.thread_time() - cpu_start
+
+
+def to_collapsed(stacks):
+    """Stacks in Brendan Gregg's collapsed format ("root;child;leaf count" per line)"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def render_flamegraph(stacks, title="Flame Graph", width=1200, row_height=17):
+    """
+    Render collapsed stacks as a self-contained SVG flamegraph
+
+    Frame width is proportional to the number of samples it appears in;
+    hovering shows the frame, its sample count and share of the total.
+
+    Args:
+        stacks: Counter of collapsed stacks
+        title: Heading drawn above the graph
+
+    Returns:
+        str: SVG document
+    """
+    # Build the call tree: node = [count, {child label: node}]
+    root = [0, {}]
+    for stack, count in stacks.items():
+        node = root
+        node[0] += count
+        for label in stack.split(";"):
+            node = node[1].setdefault(label, [0, {}])
+            node[0] += count
+    total = root[0] or 1
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node[1].values()), default=0)
+
+    levels = depth(root) - 1
+    top = 40
+    height = top + levels * row_height + 10
+    scale = (width - 20) / total
+    rects = []
+
+    def draw(label, node, x, level):
+        w = node[0] * scale
+        if w < 0.3:
+            return
+        y = height - 10 - (level + 1) * row_height
+        # Warm colours, stable per function name
+        hue = sum(map(ord, label.split(" (")[0])) % 55
+        tooltip = html.escape(f"{label}: {node[0]} samples ({node[0] / total:.1%})")
+        text = html.escape(label[:int(w / 7)]) if w > 35 else ""
+        rects.append(
+            f'<g><title>{tooltip}</title><rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},85%,60%)" rx="2"/><text x="{x + 3:.1f}" y="{y + row_height - 5}">{text}</text></g>'
+        )
+        child_x = x
+        for child_label, child in sorted(node[1].items()):
+            draw(child_label, child, child_x, level + 1)
+            child_x += child[0] * scale
+
+    x = 10
+    for label, child in sorted(root[1].items()):
+        draw(label, child, x, 0)
+        x += child[0] * scale
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#fafafa"/>'
+        f'<text x="10" y="24" font-size="15" font-family="sans-serif">{html.escape(title)}</text>'
+        + "".join(rects) + "</svg>"
+    )
+
+
+def write_profile(profiler, label, metadata=None, directory=None):
+    """
+    Write a finished capture as .collapsed, .svg and .json files
+
+    Args:
+        profiler: Stopped SamplingProfiler
+        label: Short name used in the file names, e.g. "rerun" or "process"
+        metadata: Context of the capture (page, PDF size, ...)
+        directory: Output directory (default: PROFILE_DIR)
+
+    Returns:
+        dict: "collapsed", "svg" and "json" paths
+    """
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(directory, f"{stamp}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', label)}")
+    info = {
+        "label": label,
+        "pid": os.getpid(),
+        "duration_s": round(profiler.duration, 3),
+        "interval_ms": profiler.interval * 1000,
+        "samples": profiler.samples,
+        "stack_samples": sum(profiler.stacks.values()),
+        "sampler_cpu_s": round(profiler.sampler_cpu, 4),
+        **(metadata or {}),
+    }
+    context = ", ".join(f"{k}={v}" for k, v in (metadata or {}).items() if v is not None)
+    title = f"{label} · {info['duration_s']}s · {info['samples']} samples" + (f" · {context}" if context else "")
+
+    paths = {"collapsed": base + ".collapsed", "svg": base + ".svg", "json": base + ".json"}
+    with open(paths["collapsed"], "w", encoding="utf-8") as f:
+        f.write(to_collapsed(profiler.stacks))
+    with open(paths["svg"], "w", encoding="utf-8") as f:
+        f.write(render_flamegraph(profiler.stacks, title))
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2, default=str)
+    return paths
+
+
+class capture:
+    """
+    Context manager profiling a block and writing the result
+
+    Metadata can be added from inside the block with annotate_profile(),
+    e.g. the page and PDF size once they are known. Files are written even
+    if the block raises (including st.stop and st.rerun).
+
+    Usage:
+        with capture("rerun", thread_ids=[threading.get_ident()]) as profile:
+            main()
+        profile.paths  # {"collapsed": ..., "svg": ..., "json": ...}
+    """
+
+    def __init__(self, label, thread_ids=None, directory=None, **metadata):
+        self.label = label
+        self.directory = directory
+        self.metadata = metadata
+        self.profiler = SamplingProfiler(thread_ids)
+        self.paths = None
+
+    def __enter__(self):
+        self.token = _active.set(self)
+        self.profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.stop()
+        _active.reset(self.token)
+        self.paths = write_profile(self.profiler, self.label, self.metadata, self.directory)
+        return False
+
+
+def annotate_profile(**metadata):
+    """Record context (page, PDF size, ...) on the capture running in this thread, if any"""
+    active = _active.get()
+    if active is not None:
+        active.metadata.update(metadata)
+
+
+def list_profiles(directory=None, limit=10):
+    """
+    Most recent captures, newest first
+
+    Returns:
+        list: Dicts of the capture metadata plus "svg" and "collapsed" paths
+    """
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        base = os.path.join(directory, name[:-len(".json")])
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        profiles.append({**info, "svg": base + ".svg", "collapsed": base + ".collapsed"})
+        if len(profiles) >= limit:
+            break
+    return profiles
@@ -1,22 +1,11 @@
 """
 Prompt Templates for Different Analysis Types
 """
+from utils.tracing import traced
 
 
-def get_hr_evaluation_prompt(resume_text, job_description):
-    """
-    Generate prompt for HR-style resume evaluation
-    """
-    return f"""
-You are an experienced HR professional with 15+ years of experience in recruitment and talent acquisition.
-Analyze the following resume against the job description and provide a comprehensive HR evaluation.
-
-**Job Description:**
-{job_description}
-
-**Resume:**
-{resume_text}
-
+# Report instructions, shared by the single-analysis prompts and the full report prompt
+HR_EVALUATION_INSTRUCTIONS = """\
 Please provide a detailed HR evaluation report with the following sections:
 
 ## 📋 Overall Impression
@@ -44,21 +33,7 @@ Include a brief justification for your recommendation.
 Be honest, constructive, and professional in your evaluation.
 """
 
-
-def get_skill_enhancement_prompt(resume_text, job_description):
-    """
-    Generate prompt for skill enhancement suggestions
-    """
-    return f"""
-You are a career development coach and skills mentor specializing in helping professionals advance their careers.
-Analyze the following resume and job description to provide personalized skill enhancement recommendations.
-
-**Job Description:**
-{job_description}
-
-**Resume:**
-{resume_text}
-
+SKILL_ENHANCEMENT_INSTRUCTIONS = """\
 Please provide a comprehensive skill enhancement plan with the following sections:
 
 ## 🎯 Skill Gap Analysis
@@ -103,21 +78,7 @@ Provide 3-5 actionable tips for professional development beyond technical skills
 Be specific, practical, and encouraging in your recommendations.
 """
 
-
-def get_ats_match_prompt(resume_text, job_description):
-    """
-    Generate prompt for ATS compatibility analysis
-    """
-    return f"""
-You are an ATS (Applicant Tracking System) expert and recruitment technology specialist.
-Analyze the following resume against the job description to determine ATS compatibility and match percentage.
-
-**Job Description:**
-{job_description}
-
-**Resume:**
-{resume_text}
-
+ATS_MATCH_INSTRUCTIONS = """\
 Please provide a detailed ATS compatibility analysis with the following sections:
 
 ## 📊 Overall Match Score
@@ -174,16 +135,120 @@ Be precise with percentages and specific with recommendations.
 """
 
 
-def get_resume_comparison_prompt(resume1_text, resume2_text, job_description):
+@traced("prompt.build", analysis="hr")
+def get_hr_evaluation_prompt(resume_text, job_description):
+    """
+    Generate prompt for HR-style resume evaluation
+    """
+    return f"""
+You are an experienced HR professional with 15+ years of experience in recruitment and talent acquisition.
+Analyze the following resume against the job description and provide a comprehensive HR evaluation.
+
+**Job Description:**
+{job_description}
+
+**Resume:**
+{resume_text}
+
+{HR_EVALUATION_INSTRUCTIONS}"""
+
+
+@traced("prompt.build", analysis="skills")
+def get_skill_enhancement_prompt(resume_text, job_description):
+    """
+    Generate prompt for skill enhancement suggestions
+    """
+    return f"""
+You are a career development coach and skills mentor specializing in helping professionals advance their careers.
+Analyze the following resume and job description to provide personalized skill enhancement recommendations.
+
+**Job Description:**
+{job_description}
+
+**Resume:**
+{resume_text}
+
+{SKILL_ENHANCEMENT_INSTRUCTIONS}"""
+
+
+def _job_section(job_description, jd_profile=None):
+    """Job description block of a prompt, or the compact job profile when one is given"""
+    if jd_profile:
+        return f"**Job Requirements (extracted from the job description):**\n{jd_profile}"
+    return f"**Job Description:**\n{job_description}"
+
+
+@traced("prompt.build", analysis="ats")
+def get_ats_match_prompt(resume_text, job_description, jd_profile=None):
+    """
+    Generate prompt for ATS compatibility analysis
+
+    When jd_profile (the formatted job profile) is given it is sent in place
+    of the raw job description.
+    """
+    return f"""
+You are an ATS (Applicant Tracking System) expert and recruitment technology specialist.
+Analyze the following resume against the job description to determine ATS compatibility and match percentage.
+
+{_job_section(job_description, jd_profile)}
+
+**Resume:**
+{resume_text}
+
+{ATS_MATCH_INSTRUCTIONS}"""
+
+
+# Marker line that opens each part of the full report, in output order
+FULL_REPORT_PARTS = (
+    ("hr", "HR EVALUATION", HR_EVALUATION_INSTRUCTIONS),
+    ("skills", "SKILL ENHANCEMENT", SKILL_ENHANCEMENT_INSTRUCTIONS),
+    ("ats", "ATS MATCH", ATS_MATCH_INSTRUCTIONS),
+)
+FULL_REPORT_MARKER = "[[REPORT: {}]]"
+
+
+@traced("prompt.build", analysis="full")
+def get_full_report_prompt(resume_text, job_description):
+    """
+    Generate prompt for the HR, skill enhancement and ATS reports in one call
+    
+    The resume and job description are sent once; each report starts with a
+    marker line so the response can be split back into the three views.
+    """
+    parts = "\n".join(
+        f"{FULL_REPORT_MARKER.format(title)}\n{instructions}"
+        for _, title, instructions in FULL_REPORT_PARTS
+    )
+    return f"""
+You are an experienced HR professional, career development coach and ATS (Applicant Tracking System) expert.
+Analyze the following resume against the job description and write three separate reports.
+
+**Job Description:**
+{job_description}
+
+**Resume:**
+{resume_text}
+
+Write the three reports below in order. Start each report with its marker line exactly as shown,
+on a line of its own, followed by the report itself following the instructions under that marker.
+Do not write anything before the first marker.
+
+{parts}"""
+
+
+@traced("prompt.build", analysis="comparison")
+def get_resume_comparison_prompt(resume1_text, resume2_text, job_description, jd_profile=None):
     """
     Generate prompt for comparing two resumes
+
+    When jd_profile (the formatted job profile) is given it is sent in place
+    of the raw job description.
     """
     return f"""
 You are a senior recruitment consultant specializing in candidate evaluation and comparison.
 Compare the following two resumes against the job description and provide a detailed analysis.
 
-**Job Description:**
-{job_description}
+{_job_section(job_description, jd_profile)}
 
 **Resume 1:**
 {resume1_text}
@@ -293,3 +358,111 @@ You are a helpful career advisor and resume expert.
 Provide general advice about resumes, job applications, career development, and interview preparation.
 Be friendly, encouraging, and provide actionable tips.
 """
+
+
+def get_section_assessment_prompt(section_name, section_text, job_description):
+    """
+    Generate prompt for assessing a single resume section against the job description
+    """
+    return f"""
+You are an experienced HR professional reviewing one section of a candidate's resume.
+Assess only this section against the job description.
+
+**Job Description:**
+{job_description}
+
+**Resume Section ({section_name}):**
+{section_text}
+
+Respond in exactly this format:
+
+Section Score: X/10
+
+**Strengths:**
+- 1-3 specific strengths of this section for the role
+
+**Improvements:**
+- 1-3 specific, actionable improvements for this section
+
+Be concise, honest and specific to the content of this section.
+"""
+
+
+def get_chat_summary_prompt(previous_summary, conversation):
+    """
+    Generate prompt for folding older chat turns into a running summary
+    """
+    return f"""
+Summarize this conversation between a user and a career advisor so it can replace the original turns.
+Keep facts about the user, their goals, questions already answered and advice already given.
+Write at most 150 words as plain sentences.
+
+**Summary So Far:**
+{previous_summary or "None"}
+
+**New Turns:**
+{conversation}
+"""
+
+
+@traced("prompt.build", analysis="jd_profile")
+def get_jd_profile_prompt(job_description):
+    """
+    Generate prompt for extracting a structured profile of a job description
+    """
+    return f"""
+You are a recruitment specialist preparing a job description for automated resume screening.
+Extract the requirements of this job as JSON.
+
+**Job Description:**
+{job_description}
+
+Respond with a single JSON object and nothing else, in exactly this shape:
+{{
+  "title": "job title or null",
+  "required_skills": ["skills and technologies the job requires"],
+  "nice_to_have": ["skills described as preferred, a plus or a bonus"],
+  "min_years": 0,
+  "education": "none | bachelor | master | phd",
+  "keywords": [{{"keyword": "lowercase term", "weight": 1.0}}]
+}}
+
+Rules:
+- List at most 15 required skills and 10 nice-to-have skills, using short canonical names
+- min_years is the minimum years of experience asked for (0 if none)
+- education is the minimum degree required, not a preferred one
+- List at most 25 keywords an ATS would scan for, each 1-3 words, weighted from 0.1 to 1.0
+  by importance (1.0 for must-haves, 0.3-0.5 for nice-to-haves)
+"""
+
+
+@traced("prompt.build", analysis="jd_fit")
+def get_job_fit_prompt(resume_text, job_requirements):
+    """
+    Generate prompt for a short ATS match of a resume against one of several jobs
+
+    The resume comes before the job so the prompts for every job share one
+    prefix, which the model provider can serve from its prompt cache.
+    """
+    return f"""
+You are an ATS (Applicant Tracking System) expert helping a candidate decide which job postings fit them best.
+
+**Resume:**
+{resume_text}
+
+**Job Requirements:**
+{job_requirements}
+
+Score how well the resume matches this job. Respond in exactly this format:
+
+Overall Match Score: X%
+- Keyword Match: X%
+- Skills Match: X%
+- Experience Match: X%
+- Education Match: X%
+
+**Verdict:** One sentence on how well the candidate fits this job.
+
+**Top Gaps:**
+- Up to 3 missing requirements, most important first
+"""
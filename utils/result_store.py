@@ -0,0 +1,194 @@
+"""
+Analysis Result Store
+Persists every analysis in a local SQLite database (WAL mode) with indexed lookups
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from utils.scores import parse_ats_scores
+
+
+RESULT_STORE_ENABLED = os.getenv("RESULT_STORE", "true").lower() in ("1", "true", "yes")
+# Serve a stored result for the same resume, job description and analysis instead of calling the model
+RESULT_REUSE = os.getenv("RESULT_REUSE", "true").lower() in ("1", "true", "yes")
+RESULT_STORE_PATH = os.getenv(
+    "RESULT_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resume_insight.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    analysis TEXT NOT NULL,
+    resume_hash TEXT NOT NULL,
+    jd_hash TEXT,
+    model TEXT,
+    source TEXT NOT NULL,
+    overall_score INTEGER,
+    scores TEXT,
+    latency REAL,
+    prompt_tokens INTEGER,
+    output_tokens INTEGER,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_lookup ON analyses (resume_hash, jd_hash, analysis, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_resume ON analyses (resume_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_jd ON analyses (jd_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_model ON analyses (model, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_source ON analyses (analysis, source, created_at);
+"""
+
+SUMMARY_COLUMNS = (
+    "id, created_at, analysis, resume_hash, jd_hash, model, source, overall_score, "
+    "latency, prompt_tokens, output_tokens"
+)
+
+
+class ResultStore:
+    """
+    SQLite-backed store of analysis results
+
+    Each thread gets its own connection; WAL mode lets readers run while a
+    write is in progress.
+    """
+
+    def __init__(self, path=RESULT_STORE_PATH):
+        self.path = path
+        self.local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def record(self, analysis, resume_hash, jd_hash, response, source="model", call_info=None):
+        """
+        Store one analysis result
+
+        Args:
+            analysis: Analysis key ("hr", "skills", "ats", "comparison", ...)
+            resume_hash: Content hash of the resume (or resume pair)
+            jd_hash: Hash of the job description, if any
+            response: Report text
+            source: "model", "cache", "combined", "speculative", "reused", "sections" or "local"
+            call_info: Optional dict with model, latency, prompt_tokens, output_tokens
+
+        Returns:
+            int: Row id
+        """
+        call_info = call_info or {}
+        scores = parse_ats_scores(response) if analysis == "ats" else None
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO analyses (created_at, analysis, resume_hash, jd_hash, model, source, "
+                "overall_score, scores, latency, prompt_tokens, output_tokens, response) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(), analysis, resume_hash, jd_hash, call_info.get("model"), source,
+                    scores["overall"] if scores else None, json.dumps(scores) if scores else None,
+                    call_info.get("latency"), call_info.get("prompt_tokens"), call_info.get("output_tokens"),
+                    response,
+                )
+            )
+        return cursor.lastrowid
+
+    def latest(self, analysis, resume_hash, jd_hash):
+        """
+        Most recent result of an analysis for a resume and job description
+
+        Local fallbacks and results reused from a near-duplicate resume are
+        skipped, so only reports made for these exact inputs are returned.
+
+        Returns:
+            dict: Full row including the response, or None
+        """
+        row = self._connect().execute(
+            "SELECT * FROM analyses WHERE resume_hash = ? AND jd_hash IS ? AND analysis = ? "
+            "AND source NOT IN ('local', 'reused') ORDER BY created_at DESC LIMIT 1",
+            (resume_hash, jd_hash, analysis)
+        ).fetchone()
+        return _row_dict(row)
+
+    def history(self, resume_hash, limit=50):
+        """
+        Past analyses of a resume, newest first, without the report text
+
+        Returns:
+            list: Row dicts
+        """
+        rows = self._connect().execute(
+            f"SELECT {SUMMARY_COLUMNS} FROM analyses WHERE resume_hash = ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (resume_hash, limit)
+        ).fetchall()
+        return [_row_dict(row) for row in rows]
+
+    def averages(self, analyses, source="model", limit=50):
+        """
+        Average latency and token counts of recent results per analysis
+
+        Args:
+            analyses: Analysis keys to include
+            source: Only count results with this source
+            limit: Most recent results per analysis to average over
+
+        Returns:
+            dict: Analysis -> {"latency", "prompt_tokens", "output_tokens", "count"}
+        """
+        averages = {}
+        conn = self._connect()
+        for analysis in analyses:
+            row = conn.execute(
+                "SELECT AVG(latency), AVG(prompt_tokens), AVG(output_tokens), COUNT(*) FROM ("
+                "SELECT latency, prompt_tokens, output_tokens FROM analyses "
+                "WHERE analysis = ? AND source = ? AND latency IS NOT NULL "
+                "ORDER BY created_at DESC LIMIT ?)",
+                (analysis, source, limit)
+            ).fetchone()
+            if row[3]:
+                averages[analysis] = {
+                    "latency": row[0], "prompt_tokens": row[1], "output_tokens": row[2], "count": row[3]
+                }
+        return averages
+
+    def get(self, result_id):
+        """Full stored result by id, or None"""
+        row = self._connect().execute("SELECT * FROM analyses WHERE id = ?", (result_id,)).fetchone()
+        return _row_dict(row)
+
+
+def _row_dict(row):
+    if row is None:
+        return None
+    result = dict(row)
+    if result.get("scores"):
+        result["scores"] = json.loads(result["scores"])
+    return result
+
+
+@lru_cache(maxsize=1)
+def get_result_store():
+    """
+    Shared result store for this process
+
+    Returns:
+        ResultStore: Process-wide instance, or None when disabled or unavailable
+    """
+    if not RESULT_STORE_ENABLED:
+        return None
+    try:
+        return ResultStore()
+    except sqlite3.Error:
+        return None
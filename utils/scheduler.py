@@ -0,0 +1,397 @@
+"""
+Model Call Scheduler
+Weighted fair queuing and per-session admission control in front of model calls
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from functools import lru_cache
+
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Model calls in flight at once across all sessions in this process
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "8"))
+# Model calls in flight per session while other sessions are waiting
+SCHEDULER_SESSION_CONCURRENCY = int(os.getenv("SCHEDULER_SESSION_CONCURRENCY", "2"))
+# Extra calls a session may run on capacity no other session is waiting for
+SCHEDULER_SESSION_BURST = int(os.getenv("SCHEDULER_SESSION_BURST", "6"))
+SCHEDULER_MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "64"))
+SCHEDULER_SESSION_QUEUE = int(os.getenv("SCHEDULER_SESSION_QUEUE", "32"))
+# Reject a call up front when its estimated wait is longer than this many seconds
+SCHEDULER_MAX_WAIT = float(os.getenv("SCHEDULER_MAX_WAIT", "60"))
+# Share of each analysis type's queue, relative to 1.0; e.g. SCHEDULER_WEIGHTS='{"chat": 4}'
+SCHEDULER_WEIGHTS = {"chat": 3.0, "chat_summary": 2.0, "jd_profile": 2.0}
+SCHEDULER_WEIGHTS.update(json.loads(os.getenv("SCHEDULER_WEIGHTS", "{}")))
+# Prompt characters per unit of cost (about 1,000 tokens), so long prompts use more of a share
+COST_CHARS = 4000
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+_session = contextvars.ContextVar("scheduler_session", default=None)
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised when a model call is rejected at admission"""
+
+    def __init__(self, reason, wait):
+        """
+        Args:
+            reason: "queue_full", "session_queue_full" or "wait"
+            wait: Estimated queueing delay in seconds
+        """
+        super().__init__(f"Model call rejected ({reason}), estimated wait {wait:.0f}s")
+        self.reason = reason
+        self.wait = wait
+
+
+class session_scope:
+    """
+    Attribute model calls made in this block to a session
+
+    Threads started with contextvars.copy_context() inherit the session;
+    other pool threads enter session_scope themselves.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+
+    def __enter__(self):
+        self.token = _session.set(self.session_id)
+        return self.session_id
+
+    def __exit__(self, exc_type, exc, tb):
+        _session.reset(self.token)
+        return False
+
+
+def current_session():
+    """Session the current model calls are attributed to, or None"""
+    return _session.get()
+
+
+def call_cost(prompt):
+    """Scheduling cost of a prompt: 1 per started COST_CHARS characters"""
+    return max(1.0, len(prompt) / COST_CHARS)
+
+
+class Histogram:
+    """Histogram with fixed upper bounds, exported in cumulative (Prometheus) layout"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if above the last bucket), or None"""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        """Bucket bounds, cumulative counts (the last is +Inf), sum and count"""
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return {"buckets": list(self.buckets), "counts": cumulative, "sum": round(self.sum, 4), "count": self.count}
+
+
+class Ticket:
+    """
+    One admitted model call; use as a context manager to release its slot
+
+    Usage:
+        with scheduler.acquire("ats", cost) as ticket:
+            ...  # ticket.waited seconds were spent queueing
+    """
+
+    __slots__ = ("scheduler", "session", "flow", "cost", "start_tag", "finish_tag",
+                 "enqueued", "granted", "waited", "started")
+
+    def __init__(self, scheduler, session, flow, cost, start_tag, finish_tag):
+        self.scheduler = scheduler
+        self.session = session
+        self.flow = flow
+        self.cost = cost
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.enqueued = time.perf_counter()
+        self.granted = threading.Event()
+        self.waited = 0.0
+        self.started = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.scheduler.release(self)
+        return False
+
+
+class FairScheduler:
+    """
+    Admission control and weighted fair queuing for model calls
+
+    Each (session, analysis type) pair is a flow with its own FIFO queue.
+    Calls are dispatched in start-tag order (start-time fair queuing, a WFQ
+    variant that suits several parallel servers): a flow's tags advance by
+    cost / weight per call, so a session sending a burst of large prompts
+    falls behind sessions sending a few small ones, and heavily weighted
+    analysis types (chat) get a larger share. A session runs at most
+    session_concurrency calls while other sessions are waiting, and up to
+    session_burst more on capacity nobody else wants. Calls whose estimated
+    wait is too long, or that would overflow the queues, are rejected
+    immediately with SchedulerBusy instead of queueing.
+    """
+
+    def __init__(self, concurrency=SCHEDULER_CONCURRENCY, session_concurrency=SCHEDULER_SESSION_CONCURRENCY,
+                 session_burst=SCHEDULER_SESSION_BURST, max_queue=SCHEDULER_MAX_QUEUE,
+                 session_queue=SCHEDULER_SESSION_QUEUE, max_wait=SCHEDULER_MAX_WAIT, weights=None):
+        # Clamp misconfigured values: wait estimates divide by the concurrencies and tags by the weights,
+        # and a zero queue size would reject every call
+        self.concurrency = max(1, concurrency)
+        self.session_concurrency = max(1, session_concurrency)
+        self.session_burst = max(0, session_burst)
+        self.max_queue = max(1, max_queue)
+        self.session_queue = max(1, session_queue)
+        self.max_wait = max_wait
+        weights = SCHEDULER_WEIGHTS if weights is None else weights
+        self.weights = {name: max(float(weight), 0.01) for name, weight in weights.items()}
+        self.lock = threading.Lock()
+        self.queues = {}
+        self.last_finish = {}
+        self.virtual_time = 0.0
+        self.queued = 0
+        self.in_flight = 0
+        self.session_queued = Counter()
+        self.session_in_flight = Counter()
+        # Moving average of seconds per call, used for wait estimates
+        self.service_time = 1.0
+        self.wait_histogram = Histogram(WAIT_BUCKETS)
+        self.depth_histogram = Histogram(DEPTH_BUCKETS)
+        self.counters = Counter()
+        self.rejected = Counter()
+
+    def _tags(self, flow, cost):
+        start = max(self.virtual_time, self.last_finish.get(flow, 0.0))
+        return start, start + cost / self.weights.get(flow[1], 1.0)
+
+    def _estimate_wait(self, session, start_tag, count=1):
+        """Seconds until the last of count new calls from a session would start (lock held)"""
+        own = self.session_queued[session] + count - 1
+        if not self.queued and count <= self.concurrency - self.in_flight \
+                and self.session_in_flight[session] + count <= self.session_concurrency + self.session_burst:
+            return 0.0
+        ahead = sum(1 for queue in self.queues.values() for ticket in queue if ticket.start_tag <= start_tag)
+        rounds = max(ahead // self.concurrency, own // self.session_concurrency) + 1
+        return rounds * self.service_time
+
+    def _check(self, session, flow, cost, count):
+        """Raise SchedulerBusy if count more calls should not be queued (lock held)"""
+        wait = self._estimate_wait(session, self._tags(flow, cost)[0], count)
+        if self.queued + count > self.max_queue:
+            reason = "queue_full"
+        elif self.session_queued[session] + count > self.session_queue:
+            reason = "session_queue_full"
+        elif wait > self.max_wait:
+            reason = "wait"
+        else:
+            return wait
+        self.rejected[reason] += 1
+        raise SchedulerBusy(reason, wait)
+
+    def admit(self, analysis=None, cost=1.0, count=1, session=None):
+        """
+        Check up front whether count calls would be accepted, without queueing them
+
+        Args:
+            analysis: Analysis type of the calls
+            cost: Cost of each call (see call_cost)
+            count: Number of calls
+            session: Session id; defaults to the current session_scope
+
+        Returns:
+            float: Estimated wait in seconds
+
+        Raises:
+            SchedulerBusy: If the calls would be rejected
+        """
+        session = current_session() if session is None else session
+        with self.lock:
+            return self._check(session, (session, analysis), cost, count)
+
+    def acquire(self, analysis=None, cost=1.0, session=None):
+        """
+        Queue a model call and block until it may run
+
+        Args:
+            analysis: Analysis type; selects the flow and its weight
+            cost: Call cost (see call_cost)
+            session: Session id; defaults to the current session_scope
+
+        Returns:
+            Ticket: Release it when the call ends, e.g. by using it in a with block
+
+        Raises:
+            SchedulerBusy: If the call is rejected at admission
+        """
+        session = current_session() if session is None else session
+        flow = (session, analysis)
+        with self.lock:
+            self._check(session, flow, cost, 1)
+            self.depth_histogram.observe(self.queued)
+            ticket = Ticket(self, session, flow, cost, *self._tags(flow, cost))
+            self.last_finish[flow] = ticket.finish_tag
+            self.queues.setdefault(flow, deque()).append(ticket)
+            self.queued += 1
+            self.session_queued[session] += 1
+            self.counters["admitted"] += 1
+            self._dispatch()
+        ticket.granted.wait()
+        return ticket
+
+    def release(self, ticket):
+        """Free a ticket's slot and start the next eligible calls"""
+        service = time.perf_counter() - ticket.started
+        with self.lock:
+            self.in_flight -= 1
+            self.session_in_flight[ticket.session] -= 1
+            if not self.session_in_flight[ticket.session]:
+                del self.session_in_flight[ticket.session]
+            self.service_time += 0.2 * (service - self.service_time)
+            self.counters["completed"] += 1
+            self._dispatch()
+            # Idle flows whose tags the virtual time has passed carry no state worth keeping
+            for flow in [flow for flow, finish in self.last_finish.items()
+                         if finish <= self.virtual_time and flow not in self.queues]:
+                del self.last_finish[flow]
+
+    def _eligible(self, session, starved):
+        running = self.session_in_flight[session]
+        if running < self.session_concurrency:
+            return True
+        # Burst only while no other session is waiting below its cap
+        return running < self.session_concurrency + self.session_burst and starved <= {session}
+
+    def _dispatch(self):
+        """Grant slots to queued tickets in start-tag order (lock held)"""
+        while self.in_flight < self.concurrency and self.queued:
+            starved = {session for session in self.session_queued
+                       if self.session_in_flight[session] < self.session_concurrency}
+            best = None
+            for queue in self.queues.values():
+                head = queue[0]
+                if (best is None or (head.start_tag, head.finish_tag) < (best.start_tag, best.finish_tag)) \
+                        and self._eligible(head.session, starved):
+                    best = head
+            if best is None:
+                return
+
+            queue = self.queues[best.flow]
+            queue.popleft()
+            if not queue:
+                del self.queues[best.flow]
+            self.queued -= 1
+            self.session_queued[best.session] -= 1
+            if not self.session_queued[best.session]:
+                del self.session_queued[best.session]
+            self.in_flight += 1
+            self.session_in_flight[best.session] += 1
+            self.virtual_time = max(self.virtual_time, best.start_tag)
+
+            best.started = time.perf_counter()
+            best.waited = best.started - best.enqueued
+            self.wait_histogram.observe(best.waited)
+            best.granted.set()
+
+    def stats(self):
+        """
+        Current load, counters and histograms
+
+        Returns:
+            dict: in_flight, queued, active sessions, admitted/completed/rejected counts,
+                  avg service time, p50/p95 wait upper bounds, and wait and queue depth histograms
+        """
+        with self.lock:
+            return {
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "concurrency": self.concurrency,
+                "sessions": len(set(self.session_in_flight) | set(self.session_queued)),
+                "admitted": self.counters["admitted"],
+                "completed": self.counters["completed"],
+                "rejected": dict(self.rejected),
+                "avg_service_s": round(self.service_time, 3),
+                "p50_wait_s": self.wait_histogram.quantile(0.5),
+                "p95_wait_s": self.wait_histogram.quantile(0.95),
+                "wait_seconds": self.wait_histogram.snapshot(),
+                "queue_depth": self.depth_histogram.snapshot(),
+            }
+
+
+def _prometheus_histogram(name, help_text, snapshot):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for bound, count in zip(snapshot["buckets"] + ["+Inf"], snapshot["counts"]):
+        lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+    lines += [f"{name}_sum {snapshot['sum']}", f"{name}_count {snapshot['count']}"]
+    return lines
+
+
+def prometheus_text(stats):
+    """
+    Scheduler stats in the Prometheus text exposition format
+
+    Args:
+        stats: FairScheduler.stats() result
+
+    Returns:
+        str: Metrics text
+    """
+    lines = [
+        "# HELP model_scheduler_in_flight Model calls running",
+        "# TYPE model_scheduler_in_flight gauge",
+        f"model_scheduler_in_flight {stats['in_flight']}",
+        "# HELP model_scheduler_queued Model calls waiting",
+        "# TYPE model_scheduler_queued gauge",
+        f"model_scheduler_queued {stats['queued']}",
+        "# HELP model_scheduler_admitted_total Model calls admitted",
+        "# TYPE model_scheduler_admitted_total counter",
+        f"model_scheduler_admitted_total {stats['admitted']}",
+        "# HELP model_scheduler_rejected_total Model calls rejected at admission",
+        "# TYPE model_scheduler_rejected_total counter",
+    ]
+    lines += [f'model_scheduler_rejected_total{{reason="{reason}"}} {count}'
+              for reason, count in sorted(stats["rejected"].items())]
+    lines += _prometheus_histogram("model_scheduler_wait_seconds", "Time model calls spent queued",
+                                   stats["wait_seconds"])
+    lines += _prometheus_histogram("model_scheduler_queue_depth", "Queued model calls seen by each new call",
+                                   stats["queue_depth"])
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=1)
+def get_scheduler():
+    """
+    Process-wide scheduler shared by every model call
+
+    Returns:
+        FairScheduler: Shared instance, or None when SCHEDULER_ENABLED is false
+    """
+    return FairScheduler() if SCHEDULER_ENABLED else None
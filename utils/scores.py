@@ -0,0 +1,52 @@
+"""
+Score Parsing
+Extracts numeric scores from analysis reports
+"""
+import re
+
+
+MATCH_SCORE_PATTERN = re.compile(r"Overall Match Score[:\s*]+(\d+)\s*%")
+ATS_COMPONENT_PATTERNS = {
+    "keyword": re.compile(r"Keyword Match[:\s*]+(\d+)\s*%"),
+    "skills": re.compile(r"Skills Match[:\s*]+(\d+)\s*%"),
+    "experience": re.compile(r"Experience Match[:\s*]+(\d+)\s*%"),
+    "education": re.compile(r"Education Match[:\s*]+(\d+)\s*%"),
+}
+SECTION_SCORE_PATTERN = re.compile(r"Section Score[:\s*]+(\d+(?:\.\d+)?)\s*/\s*10")
+
+
+def parse_match_score(response):
+    """
+    Extract the overall ATS match percentage from a report
+
+    Args:
+        response: ATS report text
+
+    Returns:
+        int: Match percentage, or None if not found
+    """
+    match = MATCH_SCORE_PATTERN.search(response)
+    return int(match.group(1)) if match else None
+
+
+def parse_ats_scores(response):
+    """
+    Extract the overall and component percentages from an ATS report
+
+    Args:
+        response: ATS report text
+
+    Returns:
+        dict: "overall", "keyword", "skills", "experience", "education" -> int or None
+    """
+    scores = {"overall": parse_match_score(response)}
+    for name, pattern in ATS_COMPONENT_PATTERNS.items():
+        match = pattern.search(response)
+        scores[name] = int(match.group(1)) if match else None
+    return scores
+
+
+def parse_section_score(assessment):
+    """Extract 'Section Score: X/10' from an assessment, or None"""
+    match = SECTION_SCORE_PATTERN.search(assessment)
+    return float(match.group(1)) if match else None
@@ -0,0 +1,195 @@
+"""
+Section-Level Resume Analysis
+Splits resumes into sections and memoizes per-section assessments for incremental re-analysis
+"""
+import contextvars
+import difflib
+import hashlib
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache import get_cache
+from utils.prompts import get_section_assessment_prompt
+from utils.scores import parse_section_score
+
+
+SECTION_HEADINGS = {
+    "summary": "Summary", "professional summary": "Summary", "profile": "Summary",
+    "objective": "Summary", "about me": "Summary",
+    "experience": "Experience", "work experience": "Experience",
+    "professional experience": "Experience", "employment history": "Experience",
+    "work history": "Experience", "internships": "Experience",
+    "education": "Education", "academic background": "Education",
+    "skills": "Skills", "technical skills": "Skills", "core competencies": "Skills",
+    "key skills": "Skills",
+    "projects": "Projects", "personal projects": "Projects", "academic projects": "Projects",
+    "certifications": "Certifications", "licenses and certifications": "Certifications",
+    "courses": "Certifications",
+    "awards": "Achievements", "achievements": "Achievements", "honors and awards": "Achievements",
+    "publications": "Publications",
+    "languages": "Languages",
+    "volunteer experience": "Volunteering", "volunteering": "Volunteering",
+    "interests": "Interests", "hobbies": "Interests",
+}
+
+SECTION_CACHE_SIZE = 2048
+
+
+def _heading_name(line):
+    """Canonical section name if the line is a section heading, else None"""
+    cleaned = re.sub(r"[^a-z& ]", "", line.strip().lower()).replace("&", "and").strip()
+    return SECTION_HEADINGS.get(" ".join(cleaned.split()))
+
+
+def split_sections(text):
+    """
+    Split resume text into sections by recognized headings
+
+    Text before the first heading is kept as "Header". Repeated headings
+    are merged into one section.
+
+    Args:
+        text: Extracted resume text
+
+    Returns:
+        OrderedDict: Section name -> section text
+    """
+    sections = OrderedDict()
+    current = "Header"
+    for line in text.splitlines():
+        name = _heading_name(line) if len(line.strip()) <= 40 else None
+        if name:
+            current = name
+            sections.setdefault(current, [])
+            continue
+        sections.setdefault(current, []).append(line)
+    return OrderedDict(
+        (name, "\n".join(lines).strip()) for name, lines in sections.items()
+        if "\n".join(lines).strip()
+    )
+
+
+def content_hash(text):
+    """Hash of whitespace-normalized text"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _section_cache():
+    """Per-section assessments, shared with other replicas through the cache's shared tier"""
+    return get_cache("sections", local_size=SECTION_CACHE_SIZE)
+
+
+def analyze_sections(resume_text, job_description, generate, max_workers=4):
+    """
+    Assess each section, reusing cached results for unchanged sections
+
+    Assessments are cached by (section hash, job description hash); only
+    sections without a cached assessment are sent to the model.
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        generate: Function mapping a prompt to a response string
+        max_workers: Concurrent model calls for changed sections
+
+    Returns:
+        list: Dicts with name, text, hash, assessment, score and cached flag
+    """
+    jd_hash = content_hash(job_description)
+    cache = _section_cache()
+    results = []
+    pending = []
+    for name, section_text in split_sections(resume_text).items():
+        section_hash = content_hash(name + "\n" + section_text)
+        assessment = cache.get(section_hash, jd_hash)
+        result = {
+            "name": name,
+            "text": section_text,
+            "hash": section_hash,
+            "assessment": assessment,
+            "cached": assessment is not None,
+        }
+        results.append(result)
+        if assessment is None:
+            pending.append(result)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            prompts = [
+                get_section_assessment_prompt(r["name"], r["text"], job_description) for r in pending
+            ]
+            # Each call runs in a copy of this context, keeping its spans and scheduler session
+            futures = [executor.submit(contextvars.copy_context().run, generate, prompt) for prompt in prompts]
+            for result, future in zip(pending, futures):
+                assessment = future.result()
+                result["assessment"] = assessment
+                if not assessment.startswith("Error"):
+                    cache.set((result["hash"], jd_hash), assessment)
+
+    for result in results:
+        result["score"] = parse_section_score(result["assessment"])
+    return results
+
+
+def assemble_report(results):
+    """
+    Combine section assessments into one report
+
+    Args:
+        results: Output of analyze_sections
+
+    Returns:
+        str: Markdown report
+    """
+    scores = [r["score"] for r in results if r["score"] is not None]
+    overall = f"{sum(scores) / len(scores):.1f}/10" if scores else "N/A"
+    parts = [
+        "## 📋 Section-by-Section Evaluation",
+        f"**Average Section Score:** {overall}",
+    ]
+    for r in results:
+        parts.append(f"### {r['name']}\n{r['assessment'].strip()}")
+    return "\n\n".join(parts)
+
+
+def diff_versions(old_results, new_results):
+    """
+    Compare two analyzed versions of a resume section by section
+
+    Args:
+        old_results: analyze_sections output for the previous version
+        new_results: analyze_sections output for the current version
+
+    Returns:
+        list: Dicts with name, status ("added", "removed", "changed", "unchanged"),
+              old_score, new_score and unified diff lines
+    """
+    old = {r["name"]: r for r in old_results}
+    new = {r["name"]: r for r in new_results}
+    names = list(new) + [name for name in old if name not in new]
+
+    changes = []
+    for name in names:
+        before, after = old.get(name), new.get(name)
+        if before is None:
+            status = "added"
+        elif after is None:
+            status = "removed"
+        elif before["hash"] == after["hash"]:
+            status = "unchanged"
+        else:
+            status = "changed"
+        diff = list(difflib.unified_diff(
+            before["text"].splitlines() if before else [],
+            after["text"].splitlines() if after else [],
+            fromfile="previous", tofile="current", lineterm=""
+        ))
+        changes.append({
+            "name": name,
+            "status": status,
+            "old_score": before["score"] if before else None,
+            "new_score": after["score"] if after else None,
+            "diff": diff,
+        })
+    return changes
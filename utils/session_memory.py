@@ -0,0 +1,373 @@
+"""
+Session Memory
+Per-session memory accounting, spilling of idle sessions to a local cache and a global memory ceiling
+"""
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from functools import lru_cache
+
+from utils.cache import SQLiteBackend, make_key
+
+
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "900"))
+SESSION_MEMORY_LIMIT_MB = float(os.getenv("SESSION_MEMORY_LIMIT_MB", "512"))
+# Session state values smaller than this stay in memory
+SESSION_SPILL_MIN_KB = float(os.getenv("SESSION_SPILL_MIN_KB", "16"))
+SESSION_SPILL_PATH = os.getenv(
+    "SESSION_SPILL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".session_spill.db")
+)
+SESSION_SPILL_TTL = float(os.getenv("SESSION_SPILL_TTL", "86400"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "30"))
+
+logger = logging.getLogger(__name__)
+
+# Shared, process-wide objects a session only references; never counted or spilled
+_SKIPPED_TYPES = (type, type(sys), type(len), type(lambda: None), threading.Event,
+                  type(threading.Lock()))
+
+
+def approx_size(obj, seen=None, depth=0):
+    """
+    Approximate bytes held by an object and everything it references
+
+    Containers, instance attributes and slots are followed; each object is
+    counted once. Uploaded files count their buffer size.
+
+    Args:
+        obj: Any object
+        seen: Ids already counted (internal)
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _SKIPPED_TYPES) or depth > 20:
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, "size") and hasattr(obj, "file_id"):
+        # Streamlit UploadedFile: a BytesIO over the upload buffer
+        return sys.getsizeof(obj) + int(obj.size)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(approx_size(k, seen, depth + 1) + approx_size(v, seen, depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approx_size(item, seen, depth + 1) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += approx_size(vars(obj), seen, depth + 1)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += approx_size(getattr(obj, slot), seen, depth + 1)
+    return size
+
+
+class SessionEntry:
+    """Bookkeeping for one browser session"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.state = None
+        self.file_mgr = None
+        self.last_seen = 0.0
+        self.running = False
+        self.state_bytes = 0
+        self.upload_bytes = 0
+        self.key_bytes = {}
+        # key -> spill cache key; list of (file_id, name, type, spill cache key)
+        self.spilled_keys = {}
+        self.spilled_files = []
+
+    @property
+    def bytes(self):
+        return self.state_bytes + self.upload_bytes
+
+
+class SessionRegistry:
+    """
+    Tracks memory held by each Streamlit session and spills idle ones
+
+    The app calls enter() at the start of every rerun and leave() at its
+    end. leave() measures the session and, at most every sweep_interval
+    seconds, spills large state values and upload buffers of sessions idle
+    longer than idle_seconds, then spills least recently used sessions
+    while the total is above the memory limit. Spilled values are pickled
+    into a local SQLite cache under their content hash and restored by
+    enter() when the session comes back.
+    """
+
+    def __init__(self, spill=None, idle_seconds=SESSION_IDLE_SECONDS,
+                 memory_limit=SESSION_MEMORY_LIMIT_MB * 1024 * 1024,
+                 min_spill_bytes=SESSION_SPILL_MIN_KB * 1024,
+                 sweep_interval=SESSION_SWEEP_INTERVAL, ttl=SESSION_SPILL_TTL, clock=time.monotonic):
+        self.spill_store = spill
+        self.idle_seconds = idle_seconds
+        self.memory_limit = memory_limit
+        self.min_spill_bytes = min_spill_bytes
+        self.sweep_interval = sweep_interval
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = {}
+        self.lock = threading.RLock()
+        self.last_sweep = 0.0
+        self.counters = {"spilled_sessions": 0, "spilled_bytes": 0, "restored_sessions": 0, "restore_misses": 0}
+
+    def enter(self, ctx):
+        """
+        Mark a session as running and restore anything spilled from it
+
+        Args:
+            ctx: Streamlit ScriptRunContext (session_id, session_state, uploaded_file_mgr)
+
+        Returns:
+            list: Restored session state keys and file names
+        """
+        with self.lock:
+            entry = self.entries.get(ctx.session_id)
+            if entry is None:
+                entry = self.entries[ctx.session_id] = SessionEntry(ctx.session_id)
+            entry.state = ctx.session_state
+            entry.file_mgr = ctx.uploaded_file_mgr
+            entry.running = True
+            entry.last_seen = self.clock()
+            spilled_keys, entry.spilled_keys = entry.spilled_keys, {}
+            spilled_files, entry.spilled_files = entry.spilled_files, []
+        if not (spilled_keys or spilled_files):
+            return []
+        return self._restore(ctx, spilled_keys, spilled_files)
+
+    def leave(self, ctx):
+        """Measure a session at the end of its rerun and sweep if due"""
+        with self.lock:
+            entry = self.entries.get(ctx.session_id)
+            if entry is None:
+                return
+            entry.running = False
+            entry.last_seen = self.clock()
+        self.measure(entry)
+        if self.clock() - self.last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def measure(self, entry):
+        """Update a session's state and upload byte counts"""
+        state = entry.state
+        if state is None:
+            return
+        try:
+            values = state.filtered_state
+        except Exception:
+            # A rerun is being set up; keep the previous figures
+            return
+        seen = set()
+        key_bytes = {key: approx_size(value, seen) for key, value in values.items()}
+        upload_bytes = sum(size for key, size in key_bytes.items() if _is_upload(values[key]))
+        files = getattr(entry.file_mgr, "file_storage", {}).get(entry.session_id, {})
+        if files:
+            # The file manager holds the buffers even before a widget has read them
+            upload_bytes = max(upload_bytes, sum(len(rec.data) for rec in files.values()))
+        entry.key_bytes = key_bytes
+        entry.upload_bytes = upload_bytes
+        entry.state_bytes = sum(size for key, size in key_bytes.items() if not _is_upload(values[key]))
+
+    def sweep(self):
+        """Spill idle sessions, then least recently used ones while over the memory limit"""
+        self.last_sweep = now = self.clock()
+        with self.lock:
+            candidates = sorted(
+                (e for e in self.entries.values() if not e.running),
+                key=lambda e: e.last_seen
+            )
+        for entry in candidates:
+            active = _session_active(entry.session_id)
+            # Disconnected sessions are spilled right away; Streamlit may keep them for a reconnect
+            if (not active or now - entry.last_seen >= self.idle_seconds) and entry.bytes:
+                self.spill(entry)
+            if not active and now - entry.last_seen >= self.ttl:
+                with self.lock:
+                    self.entries.pop(entry.session_id, None)
+        total = self.total_bytes()
+        for entry in candidates:
+            if total <= self.memory_limit:
+                break
+            if entry.bytes:
+                before = entry.bytes
+                self.spill(entry)
+                total -= before - entry.bytes
+        if self.spill_store is not None:
+            self.spill_store.purge_expired()
+
+    def total_bytes(self):
+        with self.lock:
+            return sum(entry.bytes for entry in self.entries.values())
+
+    def spill(self, entry):
+        """
+        Move a session's large state values and upload buffers to the spill cache
+
+        Values that cannot be pickled (threads, futures) stay in memory.
+
+        Returns:
+            int: Bytes moved out of the session
+        """
+        state = entry.state
+        if state is None or self.spill_store is None:
+            return 0
+        # Holding the lock makes a returning session's enter() wait for the spill to finish
+        with self.lock:
+            if entry.running:
+                return 0
+            try:
+                values = state.filtered_state
+            except Exception:
+                return 0
+            moved = self._spill_state(entry, state, values) + self._spill_uploads(entry, state, values)
+            if moved:
+                self.counters["spilled_sessions"] += 1
+                self.counters["spilled_bytes"] += moved
+        return moved
+
+    def _spill_state(self, entry, state, values):
+        widgets = _widget_keys(state)
+        if widgets is None:
+            return 0
+        moved = 0
+        for key, value in values.items():
+            size = entry.key_bytes.get(key, 0)
+            if key in widgets or size < self.min_spill_bytes:
+                continue
+            try:
+                data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                continue
+            spill_key = make_key("session", data)
+            self.spill_store.set(spill_key, data, ttl=self.ttl)
+            del state[key]
+            entry.spilled_keys[key] = spill_key
+            entry.key_bytes.pop(key, None)
+            entry.state_bytes -= size
+            moved += size
+        return moved
+
+    def _spill_uploads(self, entry, state, values):
+        files = getattr(entry.file_mgr, "file_storage", {}).get(entry.session_id)
+        if not files:
+            return 0
+        for rec in list(files.values()):
+            spill_key = make_key("upload", rec.data)
+            self.spill_store.set(spill_key, rec.data, ttl=self.ttl)
+            entry.spilled_files.append((rec.file_id, rec.name, rec.type, spill_key))
+        entry.file_mgr.remove_session_files(entry.session_id)
+        # Widget values hold their own reference to the buffers
+        for key, value in values.items():
+            if _is_upload(value) and key in state:
+                del state[key]
+        moved, entry.upload_bytes = entry.upload_bytes, 0
+        return moved
+
+    def _restore(self, ctx, spilled_keys, spilled_files):
+        restored = []
+        for key, spill_key in spilled_keys.items():
+            data = self.spill_store.get(spill_key)
+            if data is None:
+                with self.lock:
+                    self.counters["restore_misses"] += 1
+                continue
+            # Only this process writes the spill cache, so unpickling it is safe
+            ctx.session_state[key] = pickle.loads(data)
+            restored.append(key)
+        if spilled_files:
+            from streamlit.runtime.uploaded_file_manager import UploadedFileRec
+            for file_id, name, mime, spill_key in spilled_files:
+                data = self.spill_store.get(spill_key)
+                if data is None:
+                    with self.lock:
+                        self.counters["restore_misses"] += 1
+                    continue
+                ctx.uploaded_file_mgr.add_file(ctx.session_id, UploadedFileRec(file_id, name, mime, data))
+                restored.append(name)
+        with self.lock:
+            self.counters["restored_sessions"] += 1
+        return restored
+
+    def metrics(self):
+        """
+        Memory held by sessions
+
+        Returns:
+            dict: totals, limit, counters and a per-session list (largest first)
+        """
+        now = self.clock()
+        with self.lock:
+            sessions = [
+                {
+                    "session": entry.session_id[:8],
+                    "idle_s": round(now - entry.last_seen),
+                    "state_kb": round(entry.state_bytes / 1024, 1),
+                    "upload_kb": round(entry.upload_bytes / 1024, 1),
+                    "largest_key": max(entry.key_bytes, key=entry.key_bytes.get) if entry.key_bytes else None,
+                    "spilled": len(entry.spilled_keys) + len(entry.spilled_files),
+                }
+                for entry in self.entries.values()
+            ]
+            counters = dict(self.counters)
+        sessions.sort(key=lambda s: s["state_kb"] + s["upload_kb"], reverse=True)
+        return {
+            "sessions": len(sessions),
+            "total_mb": round(self.total_bytes() / 1024 / 1024, 2),
+            "limit_mb": round(self.memory_limit / 1024 / 1024, 2),
+            **counters,
+            "per_session": sessions,
+        }
+
+
+def _session_active(session_id):
+    """True unless the Streamlit runtime reports the session as disconnected"""
+    try:
+        from streamlit.runtime import Runtime
+        if Runtime.exists():
+            return Runtime.instance().is_active_session(session_id)
+    except Exception:
+        pass
+    return True
+
+
+def _widget_keys(state):
+    """
+    User keys of widgets in a session, or None if they cannot be determined
+
+    Widget values are resent by the browser on every rerun, so they are not
+    spilled (upload buffers are handled separately).
+    """
+    try:
+        return set(state._state._key_id_mapper.id_key_mapping.values())
+    except AttributeError:
+        return None
+
+
+def _is_upload(value):
+    """Streamlit UploadedFile, or a list of them (multi-file uploader)"""
+    if isinstance(value, (list, tuple)):
+        return bool(value) and all(_is_upload(v) for v in value)
+    return hasattr(value, "file_id") and hasattr(value, "size")
+
+
+@lru_cache(maxsize=1)
+def get_session_registry():
+    """
+    Process-wide session registry
+
+    Returns:
+        SessionRegistry: Shared instance; spilling is disabled if the spill
+                         cache cannot be opened
+    """
+    try:
+        spill = SQLiteBackend(SESSION_SPILL_PATH)
+    except Exception as e:
+        logger.warning("Session spill cache unavailable, idle sessions stay in memory: %s", e)
+        spill = None
+    return SessionRegistry(spill)
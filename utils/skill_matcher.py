@@ -0,0 +1,252 @@
+"""
+Skill Taxonomy Matcher
+Finds known skills in resume and job description text with an Aho-Corasick automaton
+"""
+import json
+import os
+from collections import deque
+from functools import lru_cache
+
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "data", "skill_taxonomy.json")
+
+# Extra taxonomy files to merge over the bundled one, separated by os.pathsep
+EXTRA_TAXONOMY_PATHS = [p for p in os.getenv("SKILL_TAXONOMY_PATH", "").split(os.pathsep) if p]
+
+# Characters that continue a token, so a match next to them is not a whole-word match
+WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789+#")
+
+
+def load_taxonomy(paths=None):
+    """
+    Load and merge skill taxonomy files
+
+    Each file holds {"skills": [{"name", "category", "aliases", "match_name"}]}.
+    Later files override earlier entries with the same name and may add aliases.
+
+    Args:
+        paths: Taxonomy file paths; defaults to the bundled file plus SKILL_TAXONOMY_PATH
+
+    Returns:
+        dict: Canonical name -> {"category", "patterns"}
+    """
+    if paths is None:
+        paths = [TAXONOMY_PATH] + EXTRA_TAXONOMY_PATHS
+
+    taxonomy = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)["skills"]
+        for entry in entries:
+            name = entry["name"]
+            patterns = set(taxonomy.get(name, {}).get("patterns", ()))
+            if entry.get("match_name", True):
+                patterns.add(name.lower())
+            patterns.update(alias.lower() for alias in entry.get("aliases", []))
+            taxonomy[name] = {
+                "category": entry.get("category", taxonomy.get(name, {}).get("category", "Other")),
+                "patterns": sorted(patterns),
+            }
+    return taxonomy
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over lowercase patterns
+
+    Built once, then scans any text in a single pass regardless of the number of patterns.
+    """
+
+    __slots__ = ("goto", "fail", "output", "lengths")
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns: Iterable of pattern strings; match ids are their positions
+        """
+        self.goto = [{}]
+        self.output = [()]
+        self.lengths = []
+
+        for pattern_id, pattern in enumerate(patterns):
+            self.lengths.append(len(pattern))
+            node = 0
+            for ch in pattern:
+                next_node = self.goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][ch] = next_node
+                    self.goto.append({})
+                    self.output.append(())
+                node = next_node
+            self.output[node] = self.output[node] + (pattern_id,)
+
+        # Breadth-first pass to set failure links and merge outputs along them
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                if self.output[self.fail[child]]:
+                    self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter_matches(self, text):
+        """
+        Yield every occurrence of every pattern
+
+        Args:
+            text: Lowercase text to scan
+
+        Yields:
+            tuple: (pattern id, start offset, end offset)
+        """
+        goto, fail, output, lengths = self.goto, self.fail, self.output, self.lengths
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                end = i + 1
+                for pattern_id in output[node]:
+                    yield pattern_id, end - lengths[pattern_id], end
+
+
+def _lowercase_same_length(text):
+    """Lowercase text without changing its length, so offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class SkillMatcher:
+    """Matches taxonomy skills, resolving aliases to canonical names"""
+
+    __slots__ = ("taxonomy", "automaton", "pattern_skills")
+
+    def __init__(self, taxonomy):
+        """
+        Args:
+            taxonomy: Output of load_taxonomy
+        """
+        self.taxonomy = taxonomy
+        patterns = []
+        self.pattern_skills = []
+        for name, entry in taxonomy.items():
+            for pattern in entry["patterns"]:
+                patterns.append(pattern)
+                self.pattern_skills.append(name)
+        self.automaton = AhoCorasick(patterns)
+
+    def scan(self, text):
+        """
+        Find whole-word skill mentions in one pass over the text
+
+        Overlapping mentions are resolved leftmost-longest, so "react native"
+        is not also counted as "react".
+
+        Args:
+            text: Resume or job description text
+
+        Returns:
+            dict: Canonical name -> {"category", "count", "offsets": [(start, end), ...]}
+        """
+        lowered = _lowercase_same_length(text)
+        length = len(lowered)
+
+        candidates = []
+        for pattern_id, start, end in self.automaton.iter_matches(lowered):
+            if start > 0 and lowered[start - 1] in WORD_CHARS:
+                continue
+            if end < length and lowered[end] in WORD_CHARS:
+                continue
+            candidates.append((start, -end, pattern_id))
+        candidates.sort()
+
+        results = {}
+        last_end = 0
+        for start, neg_end, pattern_id in candidates:
+            if start < last_end:
+                continue
+            last_end = -neg_end
+            name = self.pattern_skills[pattern_id]
+            entry = results.setdefault(name, {
+                "category": self.taxonomy[name]["category"],
+                "count": 0,
+                "offsets": [],
+            })
+            entry["count"] += 1
+            entry["offsets"].append((start, last_end))
+        return results
+
+
+@lru_cache(maxsize=1)
+def get_skill_matcher():
+    """
+    Compiled matcher for the configured taxonomy (built once per process)
+
+    Returns:
+        SkillMatcher: Shared matcher instance
+    """
+    return SkillMatcher(load_taxonomy())
+
+
+def skills_radar_data(resume_skills, jd_skills=None, max_skills=8):
+    """
+    Build the skills dictionary expected by create_skills_radar
+
+    Proficiency (0-10) is estimated from how often the resume mentions a skill.
+    When job description skills are given, the radar shows those skills.
+
+    Args:
+        resume_skills: SkillMatcher.scan output for the resume
+        jd_skills: Optional SkillMatcher.scan output for the job description
+        max_skills: Maximum number of radar axes
+
+    Returns:
+        dict: Skill name -> proficiency (0-10)
+    """
+    source = jd_skills if jd_skills else resume_skills
+    ranked = sorted(source.items(), key=lambda item: (-item[1]["count"], item[0]))[:max_skills]
+    return {
+        name: min(10, 4 + 2 * resume_skills[name]["count"]) if name in resume_skills else 0
+        for name, _ in ranked
+    }
+
+
+def category_coverage(resume_skills, jd_skills=None):
+    """
+    Build the category dictionary expected by create_category_bars
+
+    With job description skills, each category scores the percentage of its
+    required skills found in the resume; otherwise it scores the share of
+    resume skills in that category.
+
+    Args:
+        resume_skills: SkillMatcher.scan output for the resume
+        jd_skills: Optional SkillMatcher.scan output for the job description
+
+    Returns:
+        dict: Category -> percentage (0-100)
+    """
+    if jd_skills:
+        required = {}
+        for name, entry in jd_skills.items():
+            required.setdefault(entry["category"], []).append(name)
+        return {
+            category: round(100 * sum(1 for n in names if n in resume_skills) / len(names))
+            for category, names in sorted(required.items())
+        }
+
+    total = sum(entry["count"] for entry in resume_skills.values())
+    counts = {}
+    for entry in resume_skills.values():
+        counts[entry["category"]] = counts.get(entry["category"], 0) + entry["count"]
+    return {category: round(100 * count / total) for category, count in sorted(counts.items())}
@@ -0,0 +1,173 @@
+"""
+Speculative Precomputation
+Starts likely analyses in the background once a resume and job description are present
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.pdf_processor import load_document
+from utils.gemini_client import generate_cached_response
+from utils.prompts import get_hr_evaluation_prompt, get_skill_enhancement_prompt
+from utils.jd_profile import build_ats_prompt
+from utils.scheduler import current_session, session_scope
+
+
+SPECULATIVE_MODE = os.getenv("SPECULATIVE_MODE", "false").lower() in ("1", "true", "yes")
+SPECULATIVE_ANALYSES = [
+    name.strip() for name in os.getenv("SPECULATIVE_ANALYSES", "ats").split(",") if name.strip()
+]
+SPECULATIVE_CALL_BUDGET = int(os.getenv("SPECULATIVE_CALL_BUDGET", "3"))
+
+PROMPT_BUILDERS = {
+    "hr": get_hr_evaluation_prompt,
+    "skills": get_skill_enhancement_prompt,
+    "ats": build_ats_prompt,
+}
+
+
+def hash_text(text):
+    """
+    Stable short hash used to key speculative results
+
+    Args:
+        text: Text or bytes to hash
+
+    Returns:
+        str: Hex digest
+    """
+    if isinstance(text, str):
+        text = text.encode("utf-8", errors="ignore")
+    return hashlib.sha256(text).hexdigest()
+
+
+@st.cache_resource
+def _get_executor():
+    """Process-wide worker pool shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+
+def _get_state():
+    """Return this session's speculative bookkeeping"""
+    if "speculative" not in st.session_state:
+        st.session_state.speculative = {
+            "inputs_key": None,
+            "jobs": {},
+            "cancel": threading.Event(),
+            "calls_used": 0,
+        }
+    return st.session_state.speculative
+
+
+def _run_analysis(analysis, pdf_bytes, job_description, cancel_event, session_id=None):
+    """
+    Background job: extract the resume and run one analysis
+
+    The model call is scheduled as the starting session's, so speculation
+    counts against that session's share.
+
+    Returns:
+        tuple: (prompt hash, response) or None when cancelled or failed
+    """
+    if cancel_event.is_set():
+        return None
+
+    # Shares the Document (and its extraction) with the foreground upload path
+    document = load_document(pdf_bytes)
+    try:
+        if not document.has_text():
+            return None
+    except Exception:
+        return None
+
+    prompt = PROMPT_BUILDERS[analysis](document, job_description)
+    if cancel_event.is_set():
+        return None
+
+    with session_scope(session_id):
+        response = generate_cached_response(prompt, analysis_type=analysis)
+    if response.startswith("Error"):
+        return None
+    return hash_text(prompt), response
+
+
+def cancel_speculation():
+    """Cancel all speculative work for the current session"""
+    state = _get_state()
+    state["cancel"].set()
+    for future in state["jobs"].values():
+        future.cancel()
+    state["jobs"] = {}
+    state["inputs_key"] = None
+
+
+def start_speculation(uploaded_file, job_description):
+    """
+    Start background analyses for the current resume and job description
+
+    Restarts (and cancels outstanding work) whenever the inputs change.
+    Each analysis consumes one call from the per-session budget.
+
+    Args:
+        uploaded_file: Validated uploaded PDF file object
+        job_description: Non-empty job description text
+    """
+    if not SPECULATIVE_MODE:
+        return
+
+    pdf_bytes = uploaded_file.getvalue()
+    inputs_key = hash_text(pdf_bytes) + hash_text(job_description)
+
+    state = _get_state()
+    if state["inputs_key"] == inputs_key:
+        return
+
+    cancel_speculation()
+    state["inputs_key"] = inputs_key
+    state["cancel"] = threading.Event()
+
+    executor = _get_executor()
+    for analysis in SPECULATIVE_ANALYSES:
+        if analysis not in PROMPT_BUILDERS:
+            continue
+        if state["calls_used"] >= SPECULATIVE_CALL_BUDGET:
+            break
+        state["calls_used"] += 1
+        state["jobs"][analysis] = executor.submit(
+            _run_analysis, analysis, pdf_bytes, job_description, state["cancel"], current_session()
+        )
+
+
+def get_precomputed(analysis, prompt):
+    """
+    Return a speculative result for this exact prompt, waiting if still running
+
+    Args:
+        analysis: Analysis key ("hr", "skills" or "ats")
+        prompt: Prompt the caller is about to send
+
+    Returns:
+        str: Precomputed response, or None if there is nothing usable
+    """
+    if not SPECULATIVE_MODE:
+        return None
+
+    future = _get_state()["jobs"].get(analysis)
+    if future is None or future.cancelled():
+        return None
+
+    try:
+        result = future.result()
+    except Exception:
+        return None
+
+    if not result:
+        return None
+
+    prompt_hash, response = result
+    if prompt_hash != hash_text(prompt):
+        return None
+    return response
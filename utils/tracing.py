@@ -0,0 +1,318 @@
+"""
+Request Tracing
+Lightweight spans exported as OpenTelemetry (OTLP/JSON) to a local file or an OTLP/HTTP collector
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from functools import lru_cache
+
+
+# "none" (off), "file" (JSON lines, one OTLP ExportTraceServiceRequest per line) or "otlp" (HTTP collector)
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "none").lower()
+TRACE_FILE = os.getenv(
+    "TRACE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "traces.jsonl")
+)
+TRACE_FILE_MAX_MB = float(os.getenv("TRACE_FILE_MAX_MB", "50"))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "resumeinsight")
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("current_span", default=None)
+# Guards root.finished between children ending and the root being exported
+_finish_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation; the root span of a trace collects its finished children"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent", "root", "start_ns", "end_ns",
+                 "attributes", "status", "finished", "trace_attributes", "sampled")
+
+    def __init__(self, name, parent=None, sampled=True, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.root = parent.root if parent else self
+        self.sampled = parent.sampled if parent else sampled
+        self.trace_id = parent.trace_id if parent else "%032x" % random.getrandbits(128)
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.attributes = dict(attributes or {})
+        self.status = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        # Only used on the root: finished spans (None once the root is exported)
+        # and attributes applied to every span of the trace
+        self.finished = [] if parent is None else None
+        self.trace_attributes = {} if parent is None else None
+
+    @property
+    def duration(self):
+        """Seconds from start to end (or to now while running)"""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes):
+        """Add attributes to this span"""
+        self.attributes.update(attributes)
+
+    def end(self, error=None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status = {"code": 2, "message": f"{type(error).__name__}: {error}"[:500]}
+        if not self.sampled:
+            return
+        root = self.root
+        with _finish_lock:
+            late = root.finished is None
+            if late:
+                # Background work that outlived its root: export this span on its own
+                spans = [self]
+            else:
+                root.finished.append(self)
+                if root is not self:
+                    return
+                spans, root.finished = root.finished, None
+        _export(root, spans)
+
+
+class span:
+    """
+    Context manager timing a block as a span
+
+    Nested spans in the same thread or task become children of the enclosing
+    one; a span with no parent starts a new trace, which is exported when it
+    ends. Children still running then (background work in a copied context)
+    are exported on their own when they end, under the same trace id.
+    Exceptions are recorded on the span and re-raised.
+
+    Usage:
+        with span("pdf.extract", pages=3) as s:
+            ...
+            s.set(ocr_pages=1)
+    """
+
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        parent = _current.get()
+        self.span = Span(
+            self.name, parent,
+            sampled=TRACE_EXPORT != "none" and random.random() < TRACE_SAMPLE_RATE,
+            attributes=self.attributes
+        )
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.token)
+        # Control flow exceptions (st.stop, st.rerun, KeyboardInterrupt) derive from
+        # BaseException only and do not mark the span as failed
+        self.span.end(exc if isinstance(exc, Exception) else None)
+        return False
+
+
+def traced(name=None, **attributes):
+    """
+    Decorator running a function inside a span
+
+    Args:
+        name: Span name (defaults to module.function)
+        **attributes: Static span attributes
+    """
+    def decorator(function):
+        span_name = name or f"{function.__module__.split('.')[-1]}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class use_span:
+    """
+    Make a span the parent of spans opened in this block
+
+    Work handed to a thread pool does not inherit the caller's context; the
+    worker wraps its task in use_span(parent) to stay in the same trace.
+    """
+
+    def __init__(self, parent):
+        self.parent = parent
+
+    def __enter__(self):
+        self.token = _current.set(self.parent)
+        return self.parent
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.token)
+        return False
+
+
+def current_span():
+    """The active span in this thread/task, or None"""
+    return _current.get()
+
+
+def set_attributes(**attributes):
+    """Add attributes to the active span, if any"""
+    active = _current.get()
+    if active is not None:
+        active.set(**attributes)
+
+
+def annotate_trace(**attributes):
+    """
+    Attach attributes to every span of the active trace
+
+    Used for identifiers learned part-way through a request, such as the
+    resume and job description hashes.
+    """
+    active = _current.get()
+    if active is not None:
+        active.root.trace_attributes.update(attributes)
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(item, trace_attributes):
+    attributes = {**trace_attributes, **item.attributes}
+    encoded = {
+        "traceId": item.trace_id,
+        "spanId": item.span_id,
+        "name": item.name,
+        "kind": 1,
+        "startTimeUnixNano": str(item.start_ns),
+        "endTimeUnixNano": str(item.end_ns),
+        "attributes": [
+            {"key": key, "value": _attribute_value(value)}
+            for key, value in attributes.items() if value is not None
+        ],
+        "status": item.status or {"code": 1},
+    }
+    if item.parent is not None:
+        encoded["parentSpanId"] = item.parent.span_id
+    return encoded
+
+
+def to_otlp(root, spans):
+    """
+    Encode finished spans of a trace as an OTLP/JSON ExportTraceServiceRequest
+
+    Args:
+        root: Root span of the trace
+        spans: Finished spans to encode
+
+    Returns:
+        dict: {"resourceSpans": [...]}
+    """
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "resumeinsight.tracing"},
+                "spans": [_otlp_span(item, root.trace_attributes) for item in spans],
+            }],
+        }]
+    }
+
+
+class TraceExporter:
+    """Background thread writing finished traces to a file or posting them to a collector"""
+
+    def __init__(self, mode=TRACE_EXPORT, path=TRACE_FILE, endpoint=TRACE_OTLP_ENDPOINT,
+                 max_bytes=TRACE_FILE_MAX_MB * 1024 * 1024):
+        self.mode = mode
+        self.path = path
+        self.endpoint = endpoint
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=1000)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self.thread.start()
+
+    def submit(self, root, spans):
+        try:
+            self.queue.put_nowait((root, spans))
+        except queue.Full:
+            # Never slow a request down for tracing
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.warning("Trace export failed: %s", e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write(self, batch):
+        if self.mode == "otlp":
+            body = {"resourceSpans": [rs for root, spans in batch for rs in to_otlp(root, spans)["resourceSpans"]]}
+            request = urllib.request.Request(
+                self.endpoint, data=json.dumps(body).encode("utf-8"),
+                headers={"Content-Type": "application/json"}, method="POST"
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+            return
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            for root, spans in batch:
+                f.write(json.dumps(to_otlp(root, spans), ensure_ascii=False) + "\n")
+
+    def flush(self, timeout=5.0):
+        """Wait until queued traces are written (for scripts and tests)"""
+        deadline = time.time() + timeout
+        while self.queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+
+@lru_cache(maxsize=1)
+def get_exporter():
+    """
+    Process-wide trace exporter
+
+    Returns:
+        TraceExporter: Shared instance, or None when tracing is disabled
+    """
+    if TRACE_EXPORT == "none":
+        return None
+    return TraceExporter()
+
+
+def _export(root, spans):
+    exporter = get_exporter()
+    if exporter is not None:
+        exporter.submit(root, spans)
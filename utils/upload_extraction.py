@@ -0,0 +1,178 @@
+"""
+Background Resume Extraction
+Validates and extracts an uploaded resume in the background while the user fills in the rest of the form
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import streamlit as st
+
+from utils.pdf_processor import (
+    DOCUMENT_CACHE_SIZE, count_pdf_pages, is_current_document, load_document, report_extraction,
+    report_extraction_error
+)
+from utils.pdf_sandbox import PDF_MAX_PAGES
+from utils.tracing import span
+
+
+UPLOAD_EXTRACT_WORKERS = int(os.getenv("UPLOAD_EXTRACT_WORKERS", "2"))
+# Seconds between progress bar updates while a page waits for the resume
+UPLOAD_POLL_INTERVAL = float(os.getenv("UPLOAD_POLL_INTERVAL", "0.1"))
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+class ExtractionJob:
+    """
+    Background validation and extraction of one PDF, shared by every session that uploads it
+
+    The stage moves through "queued", "validating", "extracting" and "ocr"
+    to "done" or "failed"; pages_done and pages_total count the pages of the
+    current stage.
+    """
+
+    def __init__(self, pdf_hash):
+        self.pdf_hash = pdf_hash
+        self.stage = "queued"
+        self.pages_done = 0
+        self.pages_total = None
+        self.invalid = False
+        self.future = None
+
+    def on_page(self, done, total):
+        """Extraction progress callback"""
+        self.stage, self.pages_done, self.pages_total = "extracting", done, total
+
+    def on_ocr_page(self, index, page_text, done, total):
+        """OCR progress callback"""
+        self.stage, self.pages_done, self.pages_total = "ocr", done, total
+
+    @property
+    def fraction(self):
+        """Progress of the current stage between 0 and 1"""
+        if self.stage in ("extracting", "ocr") and self.pages_total:
+            return min(self.pages_done / self.pages_total, 1.0)
+        return 0.0
+
+    def status_text(self):
+        """Progress bar label for the current stage"""
+        if self.stage == "queued":
+            return "📄 Waiting for a free PDF worker..."
+        if self.stage == "validating":
+            return "📄 Checking the PDF..."
+        if self.stage == "ocr":
+            return f"🔍 OCR: page {self.pages_done} of {self.pages_total}"
+        return f"📄 Extracting text: page {self.pages_done} of {self.pages_total or '?'}"
+
+
+@st.cache_resource
+def _get_executor():
+    """Process-wide pool for upload-time extraction, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=UPLOAD_EXTRACT_WORKERS, thread_name_prefix="upload-extract")
+
+
+def _run(job, pdf_bytes):
+    """
+    Background job: validate, extract and normalize one PDF
+
+    Returns:
+        Document: Loaded document (possibly without text)
+    """
+    with span("pdf.background", pdf_hash=job.pdf_hash) as job_span:
+        try:
+            # Shares the Document with every other path that sees this file
+            document = load_document(pdf_bytes, job.on_ocr_page, job.on_page)
+            if not document.loaded:
+                job.stage = "validating"
+                try:
+                    with span("pdf.validate"):
+                        job.pages_total = min(count_pdf_pages(pdf_bytes), PDF_MAX_PAGES)
+                except Exception:
+                    job.invalid = True
+                    raise
+                job.stage = "extracting"
+            if document.has_text():
+                # Join and hash the pages now, so the first analysis does not pay for it
+                _ = document.content_hash, document.text
+            job_span.set(pages=len(document.pages), chars=len(document))
+        except Exception:
+            job.stage = "failed"
+            raise
+        job.stage = "done"
+        return document
+
+
+def start_extraction(pdf_bytes):
+    """
+    Start validating and extracting a PDF in the background, once per content hash
+
+    A job that failed for a transient reason (busy workers, a timeout), or
+    whose Document was dropped because OCR pages failed, is replaced by a new
+    one; a file that failed validation is not retried.
+
+    Args:
+        pdf_bytes: PDF file as bytes
+
+    Returns:
+        ExtractionJob: Running or finished job
+    """
+    pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    with _jobs_lock:
+        job = _jobs.get(pdf_hash)
+        if (job is None or (job.stage == "failed" and not job.invalid)
+                or (job.stage == "done" and not is_current_document(pdf_hash, job.future.result()))):
+            job = ExtractionJob(pdf_hash)
+            job.future = _get_executor().submit(_run, job, pdf_bytes)
+            _jobs[pdf_hash] = job
+        _jobs.move_to_end(pdf_hash)
+        while len(_jobs) > DOCUMENT_CACHE_SIZE:
+            _jobs.popitem(last=False)
+    return job
+
+
+def on_resume_upload(key):
+    """
+    file_uploader on_change callback: start extracting the new file right away
+
+    Args:
+        key: Widget key of the file uploader
+    """
+    uploaded_file = st.session_state.get(key)
+    if uploaded_file is not None:
+        start_extraction(uploaded_file.getvalue())
+
+
+def await_document(uploaded_file):
+    """
+    Extracted resume for an uploaded file, waiting for its background job with per-page progress
+
+    Starts the job if the upload callback has not (for example after the
+    job was evicted), and shows the same notices as extract_text_from_pdf.
+
+    Args:
+        uploaded_file: Uploaded PDF file object
+
+    Returns:
+        Document: Extracted document, or None (the error has been shown)
+    """
+    job = start_extraction(uploaded_file.getvalue())
+    if not job.future.done():
+        placeholder = st.empty()
+        while not job.future.done():
+            placeholder.progress(job.fraction, text=job.status_text())
+            wait([job.future], timeout=UPLOAD_POLL_INTERVAL)
+        placeholder.empty()
+
+    try:
+        document = job.future.result()
+    except Exception as e:
+        if job.invalid:
+            st.error(f"Invalid PDF file: {str(e)}")
+        else:
+            report_extraction_error(e)
+        return None
+    return report_extraction(document)
@@ -4,13 +4,52 @@ Creates charts, graphs, and visual analytics for resume analysis
 """
 import plotly.graph_objects as go
 import plotly.express as px
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from wordcloud import WordCloud
 import streamlit as st
+import functools
 import io
+import os
 import numpy as np
 
+from utils.cache import LocalLRU, make_key
 
+
+# Rendered charts kept per process, keyed by a hash of the builder inputs
+FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", "128"))
+WORDCLOUD_CACHE_SIZE = int(os.getenv("WORDCLOUD_CACHE_SIZE", "32"))
+
+
+def _memoized(cache_size):
+    """
+    Memoize a chart builder in a bounded LRU keyed by its arguments
+
+    Cached Plotly figures are shared between reruns and sessions, so callers
+    must treat them as read-only (st.plotly_chart copies before serializing).
+    """
+    def decorator(builder):
+        cache = LocalLRU(cache_size)
+
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs):
+            # Dict order decides chart order, so key on items rather than sorted JSON
+            key = make_key(
+                "figure", builder.__name__,
+                [list(a.items()) if isinstance(a, dict) else a for a in args], kwargs
+            )
+            result = cache.get(key)
+            if result is None:
+                result = builder(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+@_memoized(FIGURE_CACHE_SIZE)
 def create_match_gauge(percentage, title="ATS Match Score"):
     """
     Create a gauge chart for match percentage
@@ -65,6 +104,7 @@ def create_match_gauge(percentage, title="ATS Match Score"):
     return fig
 
 
+@_memoized(FIGURE_CACHE_SIZE)
 def create_category_bars(categories_dict):
     """
     Create horizontal bar chart for category-wise scores
@@ -109,6 +149,7 @@ def create_category_bars(categories_dict):
     return fig
 
 
+@_memoized(FIGURE_CACHE_SIZE)
 def create_skills_radar(skills_dict):
     """
     Create radar chart for skills assessment
@@ -160,16 +201,21 @@ def create_skills_radar(skills_dict):
     return fig
 
 
+@_memoized(WORDCLOUD_CACHE_SIZE)
 def create_wordcloud(text, title="Keywords"):
     """
-    Create word cloud from text
+    Render a word cloud from text to PNG bytes
+    
+    The figure is drawn on its own Agg canvas rather than through pyplot, so
+    nothing is left registered in pyplot's figure manager, and it is cleared
+    as soon as the PNG is written.
     
     Args:
         text: Input text or list of keywords
         title: Chart title
         
     Returns:
-        matplotlib figure
+        bytes: PNG image (pass to st.image)
     """
     if isinstance(text, list):
         text = ' '.join(text)
@@ -185,17 +231,23 @@ def create_wordcloud(text, title="Keywords"):
         min_font_size=10
     ).generate(text)
     
-    # Create matplotlib figure
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-    ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
-    
-    plt.tight_layout(pad=0)
-    
-    return fig
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.subplots()
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis('off')
+        ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+        fig.tight_layout(pad=0)
+        
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
+    finally:
+        fig.clear()
 
 
+@_memoized(FIGURE_CACHE_SIZE)
 def create_comparison_table(resume1_scores, resume2_scores, categories):
     """
     Create comparison table for two resumes